@@ -3,22 +3,131 @@ Flask Web Server for Timetable CSP
 Provides REST API for timetable generation
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
+import datetime
 import os
 import sys
+import threading
+import time
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from utils.csv_loader import CSVDataLoader
-from csp.csp_solver import TimetableSolver
+from utils.dataset_registry import DatasetRegistry, UnknownDatasetError, DEFAULT_DATASET
+from csp.csp_solver import TimetableSolver, SOLVER_MODES, RESTART_SCHEDULES, VARIABLE_HEURISTICS, VALUE_ORDERS
+from csp.instructor_balance import check_role_targets
+from csp.pins import parse_pins
+from csp.feasibility import InfeasibleProblemError
+from csp.observers import create_observers, observer_reports
+from csp.scenarios import ScenarioRunner
+from csp.moves import move_candidates
+from csp.violations import check_entries, check_timetable
+from utils.cluster import Coordinator, DistributedScenarioRunner, parse_workers
+from utils.data_watcher import DatasetWatcher
+from utils.exporters import TimetableExporter, EXPORT_FORMATS, EXPORT_GROUPINGS
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Counter, Gauge, MetricsRegistry
+from utils.timetable_store import QUERY_FIELDS, TimetableStore
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
 
-# Initialize data loader
-data_loader = CSVDataLoader('data')
+# Datasets: 'data' itself is 'default', each CSV subdirectory is served under its own name
+registry = DatasetRegistry(
+    os.environ.get('TIMETABLE_DATA_DIR', 'data'),
+    memory_budget_mb=float(os.environ.get('TIMETABLE_MEMORY_BUDGET_MB', 512))
+)
+
+# Last generated timetable per dataset, indexed for the query endpoints; with a directory
+# the prefork server's workers all see the timetable whichever worker generated it
+timetable_store = TimetableStore(os.environ.get('TIMETABLE_STORE_DIR') or None)
+
+# Datasets that must be compiled before the server reports ready, and those that failed to
+# compile at startup with their errors (both set by the production server)
+preload_datasets = []
+failed_datasets = {}
+
+# Background recompilation of edited datasets, started by start_data_watcher
+data_watcher = None
+
+# Bound on concurrent solves in this process; extra generate requests get 503
+solve_slots = threading.BoundedSemaphore(int(os.environ.get('TIMETABLE_MAX_CONCURRENT_SOLVES', 2)))
+
+# Telemetry, per process (each prefork worker is scraped separately)
+metrics = MetricsRegistry()
+http_requests = metrics.counter('timetable_http_requests_total', 'HTTP requests by endpoint and status',
+                                ('endpoint', 'method', 'status'))
+generate_requests = metrics.counter('timetable_generate_requests_total', 'Generate requests by outcome',
+                                    ('outcome',))
+generate_seconds = metrics.histogram('timetable_generate_duration_seconds', 'Wall time of generate requests')
+generate_phase_seconds = metrics.histogram('timetable_generate_phase_seconds',
+                                           'Wall time of each generate phase', ('phase',))
+solver_nodes = metrics.counter('timetable_solver_nodes_total', 'Search nodes visited')
+solver_backtracks = metrics.counter('timetable_solver_backtracks_total', 'Search backtracks')
+solver_checks = metrics.counter('timetable_solver_constraint_checks_total', 'Constraint consistency checks')
+solver_timeouts = metrics.counter('timetable_solver_timeouts_total', 'Searches stopped by the time limit')
+solver_restarts = metrics.counter('timetable_solver_restarts_total', 'Search restarts')
+solves_in_flight = metrics.gauge('timetable_solves_in_flight', 'Generate requests currently solving')
+exports_in_flight = metrics.gauge('timetable_exports_in_flight', 'Export archives currently streaming')
+
+@metrics.register_collector
+def dataset_metrics():
+    """Dataset pool counters, read from the registry at scrape time"""
+    status = registry.status()
+    lookups = Counter('timetable_dataset_cache_lookups_total', 'Compiled model lookups by result', ('result',))
+    for result in ('hits', 'misses'):
+        lookups.inc(status['stats'][result], result=result)
+    reloads = Counter('timetable_dataset_reloads_total', 'Compiled models dropped because their files changed')
+    reloads.inc(status['stats']['reloads'])
+    evictions = Counter('timetable_dataset_evictions_total', 'Compiled models evicted by the memory budget')
+    evictions.inc(status['stats']['evictions'])
+    rebuilds = Counter('timetable_dataset_rebuilds_total', 'Background recompiles of edited datasets by outcome',
+                       ('outcome',))
+    rebuilds.inc(status['stats']['rebuilds'], outcome='swapped')
+    rebuilds.inc(status['stats']['rebuild_failures'], outcome='failed')
+    loaded = Gauge('timetable_datasets_loaded', 'Datasets with a compiled model in memory')
+    loaded.set(sum(1 for dataset in status['datasets'] if dataset['loaded']))
+    memory = Gauge('timetable_dataset_memory_bytes', 'Estimated memory of the pooled compiled models')
+    memory.set(registry.memory_in_use())
+    return [lookups, reloads, evictions, rebuilds, loaded, memory]
+
+@app.after_request
+def count_request(response):
+    http_requests.inc(endpoint=request.endpoint or 'unmatched', method=request.method,
+                      status=response.status_code)
+    return response
+
+def configure_solve_limit(max_concurrent_solves):
+    """Change how many solves this process runs at once"""
+    global solve_slots
+    solve_slots = threading.BoundedSemaphore(max(1, int(max_concurrent_solves)))
+
+def start_data_watcher(interval):
+    """Recompile datasets whose files change in a background thread of this process"""
+    global data_watcher
+    if data_watcher is None:
+        data_watcher = DatasetWatcher(registry, interval)
+        data_watcher.start()
+    return data_watcher
+
+def requested_dataset():
+    """Dataset named by the request (?dataset=... or a JSON 'dataset' field)"""
+    payload = request.get_json(silent=True) or {}
+    return request.args.get('dataset') or payload.get('dataset') or DEFAULT_DATASET
+
+def requested_observers():
+    """Solver observers switched on by the request (?profile=cprofile,depth or a JSON 'profile' list)"""
+    payload = request.get_json(silent=True) or {}
+    names = request.args.get('profile') or payload.get('profile') or []
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    return create_observers(names)
+
+def unknown_dataset_response(error):
+    return jsonify({
+        'success': False,
+        'error': f"Unknown dataset '{error.args[0]}'. Available: {registry.names()}"
+    }), 404
 
 @app.route('/')
 def index():
@@ -35,10 +144,53 @@ def serve_js():
     """Serve JavaScript file"""
     return send_from_directory('../frontend', 'app.js')
 
+@app.route('/timetable-index.js')
+def serve_index_js():
+    """Serve the timetable indexing script (also run as a Web Worker)"""
+    return send_from_directory('../frontend', 'timetable-index.js')
+
+@app.route('/healthz', methods=['GET'])
+def health():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({
+        'status': 'ok',
+        'pid': os.getpid()
+    })
+
+@app.route('/readyz', methods=['GET'])
+def readiness():
+    """Readiness: every preloaded dataset has a compiled model in memory
+
+    Datasets that failed to compile at startup are reported but do not hold readiness
+    back, or one broken dataset would keep the others from ever being served.
+    """
+    pending = []
+    failed = dict(failed_datasets)
+    for name in preload_datasets:
+        try:
+            if not registry.get_entry(name).is_loaded:
+                pending.append(name)
+        except UnknownDatasetError:
+            # Its directory was removed since startup
+            failed[name] = 'dataset is no longer registered'
+    return jsonify({
+        'ready': not pending,
+        'pending_datasets': pending,
+        'failed_datasets': failed,
+        'pid': os.getpid()
+    }), 200 if not pending else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of this process's metrics"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/data-summary', methods=['GET'])
 def get_data_summary():
     """Get summary of loaded data"""
     try:
+        data_loader = registry.get_loader(requested_dataset())
+        
         # Validate data files
         is_valid, message = data_loader.validate_data()
         
@@ -56,50 +208,153 @@ def get_data_summary():
             'message': 'Data loaded successfully'
         })
         
+    except UnknownDatasetError as e:
+        return unknown_dataset_response(e)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/datasets', methods=['GET'])
+def list_datasets():
+    """List datasets and which of them are pooled in memory"""
+    registry.discover()
+    return jsonify({
+        'success': True,
+        'registry': registry.status(),
+        'watcher': data_watcher.status() if data_watcher else None
+    })
+
 @app.route('/api/generate', methods=['POST'])
 def generate_timetable():
     """Generate timetable using CSP solver"""
+    if not solve_slots.acquire(blocking=False):
+        generate_requests.inc(outcome='busy')
+        return jsonify({
+            'success': False,
+            'error': 'Server is busy with other timetable generations, please retry shortly.'
+        }), 503
+    started = time.perf_counter()
+    outcome = 'error'
+    solves_in_flight.inc()
     try:
         print("Starting Timetable Generation...")
+        dataset = requested_dataset()
+        payload = request.get_json(silent=True) or {}
+        mode = request.args.get('mode') or payload.get('mode') or 'greedy'
+        role_targets = payload.get('role_targets')
+        pins = payload.get('pins')
+        restarts = request.args.get('restarts') or payload.get('restarts') or 'none'
+        heuristic = request.args.get('heuristic') or payload.get('heuristic') or 'course_aware'
+        value_order = request.args.get('value_order') or payload.get('value_order') or 'cost'
+        seed = request.args.get('seed', payload.get('seed'))
+        try:
+            observers = requested_observers()
+            if mode not in SOLVER_MODES:
+                raise ValueError(f"Unknown solver mode '{mode}'; choose from {list(SOLVER_MODES)}")
+            if restarts not in RESTART_SCHEDULES:
+                raise ValueError(f"Unknown restart schedule '{restarts}'; choose from {list(RESTART_SCHEDULES)}")
+            if heuristic not in VARIABLE_HEURISTICS:
+                raise ValueError(f"Unknown variable heuristic '{heuristic}'; "
+                                 f"choose from {list(VARIABLE_HEURISTICS)}")
+            if value_order not in VALUE_ORDERS:
+                raise ValueError(f"Unknown value order '{value_order}'; choose from {list(VALUE_ORDERS)}")
+            if seed is not None:
+                try:
+                    seed = int(seed)
+                except (TypeError, ValueError):
+                    raise ValueError(f"seed must be an integer, got {seed!r}")
+            if role_targets is not None and (not isinstance(role_targets, dict) or not all(
+                    isinstance(load, (int, float)) for load in role_targets.values())):
+                raise ValueError("role_targets must map instructor roles to target loads")
+            if role_targets and mode != 'balanced':
+                raise ValueError("role_targets need the 'balanced' solver mode")
+            if pins is not None:
+                if not isinstance(pins, list):
+                    raise ValueError("pins must be a list of {course_id, sections, timeslot or day/start_time, "
+                                     "room, instructor} objects")
+                pins = parse_pins(pins)
+        except ValueError as e:
+            outcome = 'bad_request'
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        # Validate data files first
-        is_valid, message = data_loader.validate_data()
-        if not is_valid:
-            return jsonify({
-                'success': False,
-                'error': f"Data validation failed: {message}"
-            }), 400
-        
-        # Get data summary
-        summary = data_loader.get_data_summary()
+        with generate_phase_seconds.time(phase='load'):
+            data_loader = registry.get_loader(dataset)
+            
+            # Validate data files first
+            is_valid, message = data_loader.validate_data()
+            if not is_valid:
+                outcome = 'bad_request'
+                return jsonify({
+                    'success': False,
+                    'error': f"Data validation failed: {message}"
+                }), 400
+            
+            # Get data summary
+            summary = data_loader.get_data_summary()
         print(f"Data summary: {summary}")
         
-        # Create solver and generate timetable
-        solver = TimetableSolver(data_loader)
-        timetable = solver.generate_timetable()
+        # Refuse searches the pre-analysis proves cannot succeed
+        with generate_phase_seconds.time(phase='feasibility'):
+            feasibility = registry.get_feasibility(dataset)
+        if not feasibility['feasible']:
+            raise InfeasibleProblemError(feasibility)
+        
+        # Create solver and generate timetable from the pooled compiled model
+        with generate_phase_seconds.time(phase='compile'):
+            compiled = registry.get_compiled(dataset)
+        try:
+            check_role_targets(role_targets, compiled.data['instructors'])
+        except ValueError as e:
+            outcome = 'bad_request'
+            return jsonify({'success': False, 'error': str(e)}), 400
+        solver = TimetableSolver(data_loader, mode=mode, role_targets=role_targets, restarts=restarts, seed=seed,
+                                 pins=pins, heuristic=heuristic, value_order=value_order)
+        solve_started = time.perf_counter()
+        timetable = solver.generate_timetable(compiled, observers=observers)
+        record_search(solver.last_stats, time.perf_counter() - solve_started)
         
         if timetable:
+            outcome = 'success'
             print(f"✅ Successfully generated timetable with {len(timetable)} classes")
+            stored = timetable_store.put(dataset, timetable, compiled.records())
             
-            return jsonify({
+            response = {
                 'success': True,
                 'summary': summary,
                 'timetable': timetable,
+                'search': solver.last_stats,
+                'timetable_id': stored.id,
                 'message': f'Generated timetable with {len(timetable)} classes'
-            })
+            }
         else:
+            outcome = 'timeout' if solver.last_stats and solver.last_stats['timed_out'] else 'no_solution'
             print("❌ Failed to generate timetable")
-            return jsonify({
+            response = {
                 'success': False,
-                'error': 'No solution found. Please check constraints and data.'
-            }), 400
+                'error': 'No solution found. Please check constraints and data.',
+                'search': solver.last_stats
+            }
+        if solver.last_balance:
+            response['balance'] = solver.last_balance
+        if solver.last_pins:
+            response['pins'] = solver.last_pins
+        if observers:
+            response['profile'] = observer_reports(observers)
+        return jsonify(response), (200 if timetable else 400)
             
+    except UnknownDatasetError as e:
+        outcome = 'unknown_dataset'
+        return unknown_dataset_response(e)
+    except InfeasibleProblemError as e:
+        outcome = 'infeasible'
+        print(f"❌ {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'feasibility': e.report
+        }), 422
     except Exception as e:
         print(f"❌ Error generating timetable: {e}")
         import traceback
@@ -109,11 +364,201 @@ def generate_timetable():
             'success': False,
             'error': str(e)
         }), 500
+    finally:
+        solves_in_flight.dec()
+        generate_requests.inc(outcome=outcome)
+        generate_seconds.observe(time.perf_counter() - started)
+        solve_slots.release()
+
+def record_search(stats, solve_seconds):
+    """Search counters and the search/format split of one solve"""
+    if not stats:
+        return
+    solver_nodes.inc(stats['nodes'])
+    solver_backtracks.inc(stats['backtracks'])
+    solver_restarts.inc(stats.get('restarts', 0))
+    solver_checks.inc(stats['constraint_checks'])
+    if stats['timed_out']:
+        solver_timeouts.inc()
+    generate_phase_seconds.observe(stats['elapsed_s'], phase='search')
+    generate_phase_seconds.observe(max(0.0, solve_seconds - stats['elapsed_s']), phase='format')
+
+def track_export(chunks):
+    """Count an archive as in flight until its last chunk is sent or the client goes away"""
+    exports_in_flight.inc()
+    try:
+        yield from chunks
+    finally:
+        exports_in_flight.dec()
+
+@app.route('/api/scenarios', methods=['POST'])
+def solve_scenarios():
+    """Solve a dataset and what-if variants of it in parallel, diffing each against the base"""
+    if not solve_slots.acquire(blocking=False):
+        return jsonify({
+            'success': False,
+            'error': 'Server is busy with other timetable generations, please retry shortly.'
+        }), 503
+    solves_in_flight.inc()
+    try:
+        payload = request.get_json(silent=True) or {}
+        scenarios = payload.get('scenarios')
+        mode = payload.get('mode') or 'greedy'
+        time_limit = payload.get('time_limit', 30)
+        if not isinstance(scenarios, list) or not scenarios:
+            return jsonify({'success': False, 'error': "Send a non-empty 'scenarios' list"}), 400
+        if mode not in SOLVER_MODES:
+            return jsonify({'success': False,
+                            'error': f"Unknown solver mode '{mode}'; choose from {list(SOLVER_MODES)}"}), 400
+        if not isinstance(time_limit, (int, float)) or time_limit <= 0:
+            return jsonify({'success': False, 'error': 'time_limit must be a positive number of seconds'}), 400
+
+        compiled = registry.get_compiled(requested_dataset())
+        workers = parse_workers(os.environ.get('TIMETABLE_WORKERS', ''))
+        if workers:
+            # Solved on cluster workers, and here again if every worker is gone
+            coordinator = Coordinator(workers, token=os.environ.get('TIMETABLE_CLUSTER_TOKEN'))
+            runner = DistributedScenarioRunner(compiled, coordinator, mode=mode, time_limit=time_limit)
+        else:
+            runner = ScenarioRunner(compiled, mode=mode, time_limit=time_limit,
+                                    jobs=int(os.environ.get('TIMETABLE_SCENARIO_JOBS', 0)) or None)
+        try:
+            results = runner.run(scenarios, include_timetables=bool(payload.get('include_timetables')))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return jsonify({'success': True, **results})
+
+    except UnknownDatasetError as e:
+        return unknown_dataset_response(e)
+    except Exception as e:
+        print(f"❌ Error solving scenarios: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    finally:
+        solves_in_flight.dec()
+        solve_slots.release()
+
+@app.route('/api/check', methods=['POST'])
+def check_timetable_endpoint():
+    """Every hard-constraint violation of a (hand-edited) timetable against the dataset"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        timetable = payload.get('timetable')
+        if not isinstance(timetable, list) or not timetable:
+            return jsonify({
+                'success': False,
+                'error': 'No timetable provided'
+            }), 400
+        report = check_timetable(registry.get_compiled(requested_dataset()), timetable)
+        return jsonify({'success': True, **report})
+
+    except UnknownDatasetError as e:
+        return unknown_dataset_response(e)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/moves', methods=['POST'])
+def move_candidates_endpoint():
+    """Feasible new places (and swaps) for one session of a timetable, ranked by quality cost"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        timetable = payload.get('timetable')
+        session = payload.get('session')
+        limit = payload.get('limit')
+        if not isinstance(timetable, list) or not timetable:
+            return jsonify({'success': False, 'error': 'No timetable provided'}), 400
+        if not isinstance(session, (str, dict)) or not session:
+            return jsonify({'success': False, 'error': "Send the 'session' to move, as its id "
+                                                       "or as {course_id, session_type, sections}"}), 400
+        if limit is not None and (not isinstance(limit, int) or limit < 1):
+            return jsonify({'success': False, 'error': 'limit must be a positive whole number'}), 400
+        if isinstance(session, dict) and any(not session.get(field) for field in ('course_id', 'session_type', 'sections')):
+            return jsonify({'success': False, 'error': "The session needs course_id, session_type and sections"}), 400
+        result = move_candidates(registry.get_compiled(requested_dataset()), timetable, session,
+                                 swaps=payload.get('swaps', True) is not False, limit=limit)
+        return jsonify({'success': True, **result})
+
+    except UnknownDatasetError as e:
+        return unknown_dataset_response(e)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def stored_timetable():
+    """Index of the requested dataset's last generated timetable, or an error response"""
+    dataset = requested_dataset()
+    registry.get_entry(dataset)
+    index = timetable_store.get(dataset)
+    if index is None:
+        return None, (jsonify({
+            'success': False,
+            'error': f"No timetable has been generated for dataset '{dataset}' yet"
+        }), 404)
+    return index, None
+
+def timetable_query_response(index, body):
+    """JSON response tagged with the timetable id, so pollers get 304 until it changes"""
+    response = jsonify({'success': True, 'timetable': index.summary(), **body})
+    response.set_etag(index.id)
+    return response.make_conditional(request)
+
+@app.route('/api/timetable/sessions', methods=['GET'])
+def query_timetable_sessions():
+    """Sessions of the last generated timetable matching every filter given
+    (?instructor=, room=, year=, section=, group=, day=, timeslot=)"""
+    try:
+        index, error = stored_timetable()
+        if error:
+            return error
+        filters = {field: request.args[field] for field in QUERY_FIELDS if request.args.get(field)}
+        sessions = index.query(**filters)
+        return timetable_query_response(index, {'count': len(sessions), 'sessions': sessions})
+    except UnknownDatasetError as e:
+        return unknown_dataset_response(e)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/timetable/free', methods=['GET'])
+def query_timetable_free():
+    """Rooms (or ?kind=instructor instructors) with no session at ?timeslot=Monday 10:45 AM"""
+    try:
+        index, error = stored_timetable()
+        if error:
+            return error
+        timeslot = request.args.get('timeslot')
+        if not timeslot:
+            return jsonify({'success': False, 'error': "Give a timeslot such as 'Monday 10:45 AM'"}), 400
+        kind = request.args.get('kind', 'room')
+        free = index.free(timeslot, kind)
+        return timetable_query_response(index, {'timeslot': timeslot, 'kind': kind, 'free': free})
+    except UnknownDatasetError as e:
+        return unknown_dataset_response(e)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
 @app.route('/api/validate', methods=['GET'])
 def validate_data():
     """Validate data files and constraints"""
     try:
+        data_loader = registry.get_loader(requested_dataset())
+        
         # Basic file validation
         is_valid, message = data_loader.validate_data()
         
@@ -167,11 +612,68 @@ def validate_data():
         
         validation_results['room_types'] = room_types
         
+        # Counting and flow bounds that prove infeasibility before any search
+        feasibility = registry.get_feasibility(requested_dataset())
+        validation_results['feasibility'] = feasibility
+        validation_results['warnings'].extend(w['message'] for w in feasibility['warnings'])
+        validation_results['errors'].extend(e['message'] for e in feasibility['errors'])
+        
         return jsonify({
             'success': True,
             'validation': validation_results
         })
         
+    except UnknownDatasetError as e:
+        return unknown_dataset_response(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/export', methods=['POST'])
+def export_timetable():
+    """Stream a zip of XLSX/CSV/ICS files per section, instructor and room"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        timetable = payload.get('timetable')
+        if not isinstance(timetable, list) or not timetable:
+            return jsonify({
+                'success': False,
+                'error': 'No timetable provided'
+            }), 400
+        # The archive is streamed, so bad entries must be rejected before the response starts
+        check_entries(timetable)
+
+        formats = payload.get('formats') or list(EXPORT_FORMATS)
+        groupings = payload.get('group_by')
+        if groupings is None:
+            groupings = list(EXPORT_GROUPINGS)
+        term_start = payload.get('term_start')
+        data_loader = registry.get_loader(requested_dataset())
+
+        exporter = TimetableExporter(
+            sections=data_loader.load_sections(),
+            timeslots=data_loader.load_timeslots(),
+            term_start=datetime.date.fromisoformat(term_start) if term_start else None,
+            weeks=int(payload.get('weeks', 14))
+        )
+        # Validate options up front so errors are not raised mid-stream
+        exporter.validate_options(formats, groupings)
+
+        return Response(
+            stream_with_context(track_export(exporter.iter_archive(timetable, formats, groupings))),
+            mimetype='application/zip',
+            headers={'Content-Disposition': 'attachment; filename=timetable_export.zip'}
+        )
+
+    except UnknownDatasetError as e:
+        return unknown_dataset_response(e)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -202,8 +704,8 @@ if __name__ == '__main__':
         print("- timeslots.csv (day, start_time, end_time)")
         print()
     
-    summary = data_loader.get_data_summary()
-    print(f"Data summary: {summary}")
-    print()
+    if os.environ.get('TIMETABLE_WATCH_INTERVAL'):
+        start_data_watcher(float(os.environ['TIMETABLE_WATCH_INTERVAL']))
     
+    # Development server; use `python cli.py serve` for production
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
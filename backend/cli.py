@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Command-line interface for Timetable CSP
+Run `python cli.py --help` from the backend directory for the available commands
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.csv_loader import CSVDataLoader
+from utils.exporters import TimetableExporter, EXPORT_FORMATS, EXPORT_GROUPINGS
+from utils.instance_generator import InstanceGenerator
+from utils.batch import BatchSolver, BATCH_FORMATS
+from utils.benchmark import BenchmarkSuite, DEFAULT_SIZES, compare_results, format_regressions, load_results, save_results
+from utils.cluster import Coordinator, SolverWorker, compile_dataset, parse_workers, portfolio_strategies
+from csp.csp_solver import TimetableSolver, SOLVER_MODES, RESTART_SCHEDULES, VARIABLE_HEURISTICS, VALUE_ORDERS
+from csp.feasibility import InfeasibleProblemError
+
+
+def _split_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _parse_role_targets(value):
+    """'Doctor=4,Assistant=8' -> {'Doctor': 4.0, 'Assistant': 8.0}"""
+    targets = {}
+    for item in _split_list(value or ''):
+        role, _, load = item.partition('=')
+        try:
+            targets[role.strip()] = float(load)
+        except ValueError:
+            raise ValueError(f"Role targets look like 'Doctor=4,Assistant=8', got '{item}'")
+    return targets
+
+
+def _load_timetable_file(path):
+    """Load a timetable saved as a JSON list or as an /api/generate response"""
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        data = data.get('timetable', [])
+    return data
+
+
+def cmd_export(args):
+    """Export a timetable as one zip of XLSX/CSV/ICS files per section, instructor and room"""
+    data_loader = CSVDataLoader(args.data)
+    formats, groupings = _split_list(args.formats), _split_list(args.by)
+
+    term_start = datetime.date.fromisoformat(args.term_start) if args.term_start else None
+    exporter = TimetableExporter(
+        sections=data_loader.load_sections(),
+        timeslots=data_loader.load_timeslots(),
+        term_start=term_start,
+        weeks=args.weeks
+    )
+    exporter.validate_options(formats, groupings)
+
+    if args.timetable:
+        timetable = _load_timetable_file(args.timetable)
+    else:
+        print(f"No --timetable given, solving {args.data} first...")
+        timetable = TimetableSolver(data_loader).generate_timetable()
+    if not timetable:
+        print("❌ No timetable to export", file=sys.stderr)
+        return 1
+
+    with open(args.output, 'wb') as stream:
+        exporter.write_archive(timetable, stream, formats, groupings)
+
+    print(f"✅ Exported {len(timetable)} classes to {args.output}")
+    return 0
+
+
+# Exit codes of `solve`, so scheduled runs can tell data problems from crashes
+EXIT_ALL_SOLVED = 0
+EXIT_UNSOLVED = 1   # some dataset was infeasible, had no solution or hit the time limit
+EXIT_USAGE = 2      # bad arguments (also used for ValueError by main)
+EXIT_ERROR = 3      # some dataset raised an unexpected error
+
+
+def cmd_solve(args):
+    """Solve one or more data directories in parallel worker processes"""
+    batch = BatchSolver(args.output, jobs=args.jobs, formats=_split_list(args.formats), time_limit=args.time_limit,
+                        mode=args.mode, role_targets=_parse_role_targets(args.role_targets) or None,
+                        restarts=args.restarts, seed=args.seed, heuristic=args.heuristic,
+                        value_order=args.value_order)
+
+    def report(result):
+        icon = {'solved': '✅', 'error': '💥'}.get(result['status'], '❌')
+        detail = f"{result['classes']} classes" if result['status'] == 'solved' else (result.get('error') or '')
+        print(f"{icon} {result['name']}: {result['status']} in {result['elapsed_s']:.2f}s {detail}".rstrip())
+
+    results = batch.run(args.data_dirs, progress=None if args.quiet else report)
+    solved = sum(1 for r in results if r['status'] == 'solved')
+    print(f"📊 Solved {solved}/{len(results)} dataset(s); summary in {os.path.join(args.output, 'summary.json')}")
+
+    if any(r['status'] == 'error' for r in results):
+        return EXIT_ERROR
+    if solved < len(results):
+        return EXIT_UNSOLVED
+    return EXIT_ALL_SOLVED
+
+
+def cmd_serve(args):
+    """Run the production server: compile models once, then fork workers"""
+    from server import serve
+
+    preload = _split_list(args.preload) if args.preload else None
+    serve(args.host, args.port, args.workers, preload, args.max_concurrent_solves, watch_interval=args.watch)
+    return 0
+
+
+def cmd_worker(args):
+    """Run a solver worker that coordinators send scenario and portfolio solves to"""
+    SolverWorker(args.host, args.port, slots=args.slots, token=args.token).serve_forever()
+    return 0
+
+
+def cmd_portfolio(args):
+    """Solve a dataset with every combination of strategies, on cluster workers when given"""
+    strategies = portfolio_strategies(
+        modes=_split_list(args.modes),
+        heuristics=_split_list(args.heuristics),
+        value_orders=_split_list(args.value_orders),
+        restarts=_split_list(args.restarts),
+        seeds=[int(seed) for seed in _split_list(args.seeds)] or [None]
+    )
+    compiled = compile_dataset(TimetableSolver(CSVDataLoader(args.data)).load_data())
+    coordinator = Coordinator(parse_workers(args.workers), token=args.token)
+
+    def report(result):
+        icon = {'solved': '✅', 'error': '💥'}.get(result['status'], '❌')
+        score = f"score {result['quality']['score']}" if result.get('quality') else (result.get('error') or '')
+        print(f"{icon} {result['name']}: {result['status']} in {result.get('solve_s', 0.0):.2f}s "
+              f"on {result['worker']} {score}".rstrip())
+
+    outcome = coordinator.portfolio(compiled, strategies, time_limit=args.time_limit, first_solved=args.first,
+                                    progress=None if args.quiet else report)
+    best = outcome['best']
+    if best is None:
+        print(f"❌ None of {len(strategies)} strategies solved {args.data}")
+        return 1
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'strategy': best['strategy'], 'quality': best['quality'], 'search': best['search'],
+                   'runs': [{key: run.get(key) for key in ('name', 'status', 'solve_s', 'worker', 'error')}
+                            for run in outcome['runs']],
+                   'timetable': best['timetable']}, f, indent=2)
+    print(f"🏆 Best: {best['name']} (score {best['quality']['score']}); written to {args.output}")
+    return 0
+
+
+def cmd_generate_data(args):
+    """Write a synthetic dataset in the loader's CSV schemas"""
+    generator = InstanceGenerator(
+        years=args.years,
+        groups_per_year=args.groups_per_year,
+        sections_per_group=args.sections_per_group,
+        courses_per_year=args.courses_per_year,
+        lab_ratio=args.lab_ratio,
+        tutorial_ratio=args.tutorial_ratio,
+        project_years=[int(y) for y in _split_list(args.project_years)],
+        slots_per_day=args.slots_per_day,
+        qualification_density=args.qualification_density,
+        tightness=args.tightness,
+        seed=args.seed
+    )
+    counts = generator.write(args.output)
+    print(f"✅ Wrote dataset to {args.output}: {counts}")
+    return 0
+
+
+def cmd_bench(args):
+    """Benchmark model build, domain reduction and search, and compare with a baseline"""
+    suite = BenchmarkSuite(
+        sizes=_split_list(args.sizes),
+        data_dirs=_split_list(args.data) if args.data else None,
+        time_limit=args.time_limit,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+        seed=args.seed,
+        mode=args.mode,
+        restarts=args.restarts,
+        heuristic=args.heuristic,
+        value_order=args.value_order
+    )
+    results = suite.run(progress=print)
+    save_results(results, args.output)
+    print(f"📝 Results written to {args.output}")
+
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        print(f"📌 Baseline updated at {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    baseline = load_results(args.baseline)
+    settings = baseline.get('settings', {})
+    if settings.get('mode', 'greedy') != args.mode:
+        print(f"⚠️ Baseline was recorded with mode '{settings.get('mode', 'greedy')}', not '{args.mode}'")
+    if settings.get('restarts', 'none') != args.restarts:
+        print(f"⚠️ Baseline was recorded with restarts '{settings.get('restarts', 'none')}', not '{args.restarts}'")
+    if settings.get('heuristic', 'course_aware') != args.heuristic:
+        print(f"⚠️ Baseline was recorded with heuristic '{settings.get('heuristic', 'course_aware')}', "
+              f"not '{args.heuristic}'")
+    if settings.get('value_order', 'cost') != args.value_order:
+        print(f"⚠️ Baseline was recorded with value order '{settings.get('value_order', 'cost')}', "
+              f"not '{args.value_order}'")
+    regressions = compare_results(results, baseline, args.tolerance)
+    print(format_regressions(regressions))
+    return 1 if regressions else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Timetable CSP command-line tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export = subparsers.add_parser('export', help=cmd_export.__doc__)
+    export.add_argument('-o', '--output', default='timetable_export.zip', help='zip archive to write')
+    export.add_argument('--data', default='data', help='data directory (sections and timeslots)')
+    export.add_argument('--timetable', help='timetable JSON to export; solves --data when omitted')
+    export.add_argument('--formats', default=','.join(EXPORT_FORMATS), help='comma-separated: xlsx,csv,ics')
+    export.add_argument('--by', default=','.join(EXPORT_GROUPINGS), help='comma-separated: section,instructor,room')
+    export.add_argument('--term-start', help='first day of term for calendar events (YYYY-MM-DD)')
+    export.add_argument('--weeks', type=int, default=14, help='number of weekly repeats in calendar events')
+    export.set_defaults(func=cmd_export)
+
+    generate = subparsers.add_parser('generate-data', help=cmd_generate_data.__doc__)
+    generate.add_argument('output', help='directory to write the CSV files to')
+    generate.add_argument('--years', type=int, default=4)
+    generate.add_argument('--groups-per-year', type=int, default=3)
+    generate.add_argument('--sections-per-group', type=int, default=3)
+    generate.add_argument('--courses-per-year', type=int, default=5, help='base courses per year')
+    generate.add_argument('--lab-ratio', type=float, default=0.7, help='share of courses with a lab')
+    generate.add_argument('--tutorial-ratio', type=float, default=0.5, help='share of courses with a tutorial')
+    generate.add_argument('--project-years', default='4', help='comma-separated years with a group project')
+    generate.add_argument('--slots-per-day', type=int, default=4)
+    generate.add_argument('--qualification-density', type=int, default=2,
+                          help='qualified instructors per course component')
+    generate.add_argument('--tightness', type=float, default=0.5,
+                          help='share of room and instructor supply the demand uses, in (0, 1]')
+    generate.add_argument('--seed', type=int, default=0)
+    generate.set_defaults(func=cmd_generate_data)
+
+    solve = subparsers.add_parser(
+        'solve', help=cmd_solve.__doc__,
+        epilog=f'exit status: {EXIT_ALL_SOLVED} all solved, {EXIT_UNSOLVED} some infeasible/unsolved/timed out, '
+               f'{EXIT_USAGE} bad arguments, {EXIT_ERROR} some dataset failed with an error'
+    )
+    solve.add_argument('data_dirs', nargs='+', help='data directories; outputs are named after them')
+    solve.add_argument('-o', '--output', default='timetables', help='directory for per-dataset outputs')
+    solve.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    solve.add_argument('--formats', default=','.join(BATCH_FORMATS), help='comma-separated: json,csv')
+    solve.add_argument('--time-limit', type=float, default=30, help='search time limit per dataset (seconds)')
+    solve.add_argument('--mode', choices=SOLVER_MODES, default='greedy', help='search strategy')
+    solve.add_argument('--role-targets', help="target timeslots per instructor role for --mode balanced, "
+                                              "e.g. 'Doctor=4,Assistant=8'")
+    solve.add_argument('--restarts', choices=RESTART_SCHEDULES, default='none',
+                       help='restart the search on a backtrack-cutoff schedule')
+    solve.add_argument('--heuristic', choices=VARIABLE_HEURISTICS, default='course_aware',
+                       help='variable ordering of the search')
+    solve.add_argument('--value-order', choices=VALUE_ORDERS, default='cost', help='value ordering of the search')
+    solve.add_argument('--seed', type=int, help='seed for random tie-breaking (default: deterministic)')
+    solve.add_argument('-q', '--quiet', action='store_true', help='only print the final summary')
+    solve.set_defaults(func=cmd_solve)
+
+    serve = subparsers.add_parser('serve', help=cmd_serve.__doc__)
+    serve.add_argument('--host', default='0.0.0.0')
+    serve.add_argument('--port', type=int, default=5000)
+    serve.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='worker processes to fork')
+    serve.add_argument('--preload', help='comma-separated datasets to compile before forking (default: all)')
+    serve.add_argument('--max-concurrent-solves', type=int, default=2, help='solves per worker before 503')
+    serve.add_argument('--watch', type=float, metavar='SECONDS',
+                       default=float(os.environ.get('TIMETABLE_WATCH_INTERVAL') or 0) or None,
+                       help='poll the data files this often; the parent recompiles an edited dataset once and '
+                            're-forks the workers from it (default: $TIMETABLE_WATCH_INTERVAL, off when unset)')
+    serve.set_defaults(func=cmd_serve)
+
+    worker = subparsers.add_parser('worker', help=cmd_worker.__doc__)
+    worker.add_argument('--host', default='127.0.0.1', help='address to listen on (0.0.0.0 for other machines)')
+    worker.add_argument('--port', type=int, default=5100)
+    worker.add_argument('--slots', type=int, default=os.cpu_count() or 1, help='jobs solved at once')
+    worker.add_argument('--token', default=os.environ.get('TIMETABLE_CLUSTER_TOKEN'),
+                        help='shared secret coordinators must send (default: $TIMETABLE_CLUSTER_TOKEN)')
+    worker.set_defaults(func=cmd_worker)
+
+    portfolio = subparsers.add_parser('portfolio', help=cmd_portfolio.__doc__)
+    portfolio.add_argument('data', help='data directory')
+    portfolio.add_argument('-o', '--output', default='portfolio.json', help='best timetable and run summary')
+    portfolio.add_argument('--workers', default=os.environ.get('TIMETABLE_WORKERS', ''),
+                           help='comma-separated host:port of workers (default: $TIMETABLE_WORKERS; '
+                                'none solves here)')
+    portfolio.add_argument('--token', default=os.environ.get('TIMETABLE_CLUSTER_TOKEN'),
+                           help='shared secret of the workers (default: $TIMETABLE_CLUSTER_TOKEN)')
+    portfolio.add_argument('--modes', default='greedy,two_phase', help=f"comma-separated: {','.join(SOLVER_MODES)}")
+    portfolio.add_argument('--heuristics', default='course_aware',
+                           help=f"comma-separated: {','.join(VARIABLE_HEURISTICS)}")
+    portfolio.add_argument('--value-orders', default='cost', help=f"comma-separated: {','.join(VALUE_ORDERS)}")
+    portfolio.add_argument('--restarts', default='none', help=f"comma-separated: {','.join(RESTART_SCHEDULES)}")
+    portfolio.add_argument('--seeds', default='', help='comma-separated seeds (default: deterministic only)')
+    portfolio.add_argument('--time-limit', type=float, default=30, help='search time limit per run (seconds)')
+    portfolio.add_argument('--first', action='store_true', help='stop at the first solved run')
+    portfolio.add_argument('-q', '--quiet', action='store_true', help='only print the best run')
+    portfolio.set_defaults(func=cmd_portfolio)
+
+    bench = subparsers.add_parser('bench', help=cmd_bench.__doc__)
+    bench.add_argument('--sizes', default=','.join(DEFAULT_SIZES), help='comma-separated: xs,s,m,l,xl')
+    bench.add_argument('--data', help='comma-separated data directories to benchmark as well')
+    bench.add_argument('--time-limit', type=float, default=10, help='search time limit per instance (seconds)')
+    bench.add_argument('--repeat', type=int, default=1, help='timed runs per instance; the best is kept')
+    bench.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    bench.add_argument('--seed', type=int, default=0, help='instance generator seed (also seeds restarted searches)')
+    bench.add_argument('--mode', choices=SOLVER_MODES, default='greedy', help='search strategy')
+    bench.add_argument('--restarts', choices=RESTART_SCHEDULES, default='none',
+                       help='restart the search on a backtrack-cutoff schedule')
+    bench.add_argument('--heuristic', choices=VARIABLE_HEURISTICS, default='course_aware',
+                       help='variable ordering of the search')
+    bench.add_argument('--value-order', choices=VALUE_ORDERS, default='cost', help='value ordering of the search')
+    bench.add_argument('-o', '--output', default='bench_results.json', help='results file to write')
+    bench.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          'benchmarks', 'baseline.json'),
+                       help='baseline results to compare against')
+    bench.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before flagging, as a fraction')
+    bench.add_argument('--update-baseline', action='store_true', help='store these results as the new baseline')
+    bench.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except InfeasibleProblemError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,18 @@ Constraint definitions for timetable CSP
 Implements hard constraints for academic structure
 """
 
+from .enrollment import StudentConflicts
+
+
+def _tutorials_per_slot(time_grid, slot):
+    """Tutorials an instructor or room can take in a slot, one per 45-minute sub-slot"""
+    return time_grid.sub_slots[slot] if time_grid is not None else 2
+
+
+def _slot_label(time_grid, slot):
+    return time_grid.labels[slot] if time_grid is not None else slot
+
+
 class Constraint:
     """Base constraint class"""
     def is_satisfied(self, assignment):
@@ -12,62 +24,73 @@ class Constraint:
 
 class NoInstructorConflictConstraint(Constraint):
     """No instructor can teach multiple classes at the same time"""
-    def __init__(self, variables, debug=False):
+    def __init__(self, variables, debug=False, time_grid=None):
         self.variables = variables
         self.debug = debug
+        self.time_grid = time_grid
 
     def is_satisfied(self, assignment):
         instructor_schedule = {}
         for var_id, domain in assignment.items():
             instructor = domain.instructor
-            timeslot = domain.timeslot
+            slot = domain.slot
             variable = self.variables[var_id]
-            key = (instructor, timeslot)
+            key = (instructor, slot)
             instructor_schedule.setdefault(key, []).append(variable)
 
-        for (instructor, timeslot), variables in instructor_schedule.items():
+        for (instructor, slot), variables in instructor_schedule.items():
             if len(variables) > 1:
                 full_duration_count = sum(1 for var in variables if getattr(var, 'duration', 1.0) == 1.0)
                 tutorial_count = sum(1 for var in variables if getattr(var, 'duration', 1.0) == 0.5)
-                if full_duration_count > 1 or tutorial_count > 2:
+                if full_duration_count > 1 or tutorial_count > _tutorials_per_slot(self.time_grid, slot):
                     if self.debug:
-                        print(f"[NoInstructorConflict] Instructor '{instructor}' conflict at '{timeslot}': "
-                              f"{len(variables)} assignments, full={full_duration_count}, tut={tutorial_count}")
+                        print(f"[NoInstructorConflict] Instructor '{instructor}' conflict at "
+                              f"'{_slot_label(self.time_grid, slot)}': {len(variables)} assignments, "
+                              f"full={full_duration_count}, tut={tutorial_count}")
                     return False
                 if full_duration_count > 0 and tutorial_count > 0:
                     if self.debug:
-                        print(f"[NoInstructorConflict] Instructor '{instructor}' mix full+tutorial at '{timeslot}'")
+                        print(f"[NoInstructorConflict] Instructor '{instructor}' mix full+tutorial at "
+                              f"'{_slot_label(self.time_grid, slot)}'")
                     return False
+
+        if self.time_grid is not None and self.time_grid.partial_overlaps:
+            # Sessions in different timeslots that share minutes clash outright
+            overlapping = self.time_grid.overlapping
+            for instructor, slot in instructor_schedule:
+                for other in overlapping[slot]:
+                    if (instructor, other) in instructor_schedule:
+                        if self.debug:
+                            print(f"[NoInstructorConflict] Instructor '{instructor}' teaches in overlapping "
+                                  f"timeslots '{self.time_grid.labels[slot]}' and '{self.time_grid.labels[other]}'")
+                        return False
         return True
 
 
 class NoRoomConflictConstraint(Constraint):
     """Room capacity-aware constraint allowing strategic sharing"""
-    def __init__(self, variables, rooms=None, debug=False):
+    def __init__(self, variables, records, debug=False, time_grid=None):
         self.variables = variables
-        self.rooms = {room['room_id']: room for room in rooms} if rooms else {}
+        self.records = records
         self.debug = debug
+        self.time_grid = time_grid
 
     def is_satisfied(self, assignment):
         room_schedule = {}
         for var_id, domain in assignment.items():
             room = domain.room
-            timeslot = domain.timeslot
+            slot = domain.slot
             variable = self.variables[var_id]
-            key = (room, timeslot)
+            key = (room, slot)
             room_schedule.setdefault(key, []).append(variable)
 
-        for (room, timeslot), variables in room_schedule.items():
+        for (room, slot), variables in room_schedule.items():
+            timeslot = _slot_label(self.time_grid, slot)
             if len(variables) > 1:
-                room_info = self.rooms.get(room, {'capacity': 15})
-                try:
-                    room_capacity = int(room_info.get('capacity', 15))
-                except Exception:
-                    room_capacity = 15
+                room_capacity = self.records.room_capacity(room)
                 total_students = 0
                 for var in variables:
-                    stype = getattr(var, 'session_type', '').lower() or ''
-                    if stype == 'lecture':
+                    if var.session_type == 'lecture':
                         total_students += 45
                     else:
                         total_students += 15
@@ -84,22 +107,34 @@ class NoRoomConflictConstraint(Constraint):
                     if self.debug:
                         print(f"[NoRoomConflict] Room '{room}' has multiple full classes at '{timeslot}'")
                     return False
-                if tutorial_count > 2:
+                tutorials_allowed = _tutorials_per_slot(self.time_grid, slot)
+                if tutorial_count > tutorials_allowed:
                     if self.debug:
-                        print(f"[NoRoomConflict] Room '{room}' has {tutorial_count} tutorials at '{timeslot}' (max 2)")
+                        print(f"[NoRoomConflict] Room '{room}' has {tutorial_count} tutorials at '{timeslot}' "
+                              f"(max {tutorials_allowed})")
                     return False
                 if full_duration_count > 0 and tutorial_count > 0:
                     if self.debug:
                         print(f"[NoRoomConflict] Room '{room}' mixes full class and tutorial at '{timeslot}'")
                     return False
+
+        if self.time_grid is not None and self.time_grid.partial_overlaps:
+            overlapping = self.time_grid.overlapping
+            for room, slot in room_schedule:
+                for other in overlapping[slot]:
+                    if (room, other) in room_schedule:
+                        if self.debug:
+                            print(f"[NoRoomConflict] Room '{room}' is used in overlapping timeslots "
+                                  f"'{self.time_grid.labels[slot]}' and '{self.time_grid.labels[other]}'")
+                        return False
         return True
 
 
 class RoomTypeConstraint(Constraint):
     """Room type must match course type"""
-    def __init__(self, variables, rooms, debug=False):
+    def __init__(self, variables, records, debug=False):
         self.variables = variables
-        self.rooms = {room['room_id']: room for room in rooms}
+        self.rooms = records.room_lookup
         self.debug = debug
 
     def is_satisfied(self, assignment):
@@ -110,8 +145,8 @@ class RoomTypeConstraint(Constraint):
                 if self.debug:
                     print(f"[RoomTypeConstraint] Room '{domain.room}' not found for var {var_id}")
                 return False
-            room_type = room.get('type', '').strip().lower()
-            session_type = (getattr(variable, 'session_type', '') or '').strip().lower()
+            room_type = room.type
+            session_type = variable.session_type
             if session_type == 'lab' and room_type != 'lab':
                 if self.debug:
                     print(f"[RoomTypeConstraint] var {var_id}: session 'lab' but room '{domain.room}' type='{room_type}'")
@@ -125,83 +160,110 @@ class RoomTypeConstraint(Constraint):
 
 class InstructorQualificationConstraint(Constraint):
     """Instructor must be qualified to teach the course"""
-    def __init__(self, variables, instructors, debug=False):
+    def __init__(self, variables, records, debug=False):
         self.variables = variables
         self.debug = debug
-        self.instructor_qualifications = {}
-        for instructor in instructors:
-            name = instructor.get('name')
-            quals = instructor.get('qualifications', '')
-            qualifications = [q.strip() for q in quals.split(',')] if quals else []
-            if name:
-                self.instructor_qualifications[name] = qualifications
+        self.instructor_qualifications = records.qualifications  # name -> frozenset of course ids
 
     def is_satisfied(self, assignment):
         for var_id, domain in assignment.items():
             variable = self.variables[var_id]
             instructor = domain.instructor
             course_id = getattr(variable, 'course_id', None)
-            qualifications = self.instructor_qualifications.get(instructor, [])
+            qualifications = self.instructor_qualifications.get(instructor, ())
             if course_id not in qualifications:
                 if self.debug:
-                    print(f"[InstructorQualification] var {var_id}: instructor '{instructor}' not qualified for '{course_id}' (quals: {qualifications})")
+                    print(f"[InstructorQualification] var {var_id}: instructor '{instructor}' not qualified for '{course_id}' (quals: {sorted(qualifications)})")
                 return False
         return True
 
 
 class NoStudentConflictConstraint(Constraint):
     """Flexible constraint allowing strategic section merging based on room capacity"""
-    def __init__(self, variables, sections, rooms=None, debug=False):
+    def __init__(self, variables, records, debug=False, time_grid=None):
         self.variables = variables
-        self.rooms = {room['room_id']: room for room in rooms} if rooms else {}
+        self.records = records
         self.debug = debug
-        self.section_to_group = {}
-        for section in sections:
-            year = int(section['year'])
-            group = int(section['group'])
-            section_id = int(section['section'])
-            self.section_to_group[(year, section_id)] = group
+        self.time_grid = time_grid
+        self.group_sections = records.group_sections  # (year, group) -> [(year, section)]
+        # Electives clash through the students enrolled rather than through their sections
+        self.conflicts = StudentConflicts(variables, records) if records.electives else None
+        self.elective_ids = {var_id for var_id, variable in variables.items()
+                             if getattr(variable, 'base_course', None) in records.electives}
 
     def is_satisfied(self, assignment):
         timeslot_room_schedule = {}
         for var_id, domain in assignment.items():
-            timeslot = domain.timeslot
+            slot = domain.slot
             room = domain.room
             variable = self.variables[var_id]
-            key = (timeslot, room)
+            key = (slot, room)
             timeslot_room_schedule.setdefault(key, []).append((variable, domain))
 
-        for (timeslot, room), var_domain_pairs in timeslot_room_schedule.items():
+        for (slot, room), var_domain_pairs in timeslot_room_schedule.items():
             if not self._check_room_capacity_conflicts(room, var_domain_pairs):
                 if self.debug:
-                    print(f"[NoStudentConflict] Room check failed for room '{room}' at '{timeslot}'")
+                    print(f"[NoStudentConflict] Room check failed for room '{room}' at "
+                          f"'{_slot_label(self.time_grid, slot)}'")
                 return False
 
         timeslot_schedule = {}
         for var_id, domain in assignment.items():
-            timeslot = domain.timeslot
+            slot = domain.slot
             variable = self.variables[var_id]
-            timeslot_schedule.setdefault(timeslot, []).append((variable, domain))
-
-        for timeslot, var_domain_pairs in timeslot_schedule.items():
-            if not self._check_student_conflicts(var_domain_pairs):
+            timeslot_schedule.setdefault(slot, []).append((variable, domain))
+
+        # Each slot's busy sections are only kept when some slots partly overlap others
+        partial_overlaps = self.time_grid is not None and self.time_grid.partial_overlaps
+        occupied = {}  # slot -> (year, section) keys busy then
+        for slot, var_domain_pairs in timeslot_schedule.items():
+            sections = self._check_student_conflicts(var_domain_pairs)
+            if sections is None:
                 if self.debug:
-                    print(f"[NoStudentConflict] Student conflict detected at '{timeslot}'")
+                    print(f"[NoStudentConflict] Student conflict detected at '{_slot_label(self.time_grid, slot)}'")
                 return False
+            if partial_overlaps:
+                occupied[slot] = sections
+
+        if self.conflicts is not None and not self._check_enrolled_students(timeslot_schedule):
+            return False
+
+        if partial_overlaps:
+            for slot, sections in occupied.items():
+                for other in self.time_grid.overlapping[slot]:
+                    if other in occupied and not sections.isdisjoint(occupied[other]):
+                        if self.debug:
+                            print(f"[NoStudentConflict] Sections attend overlapping timeslots "
+                                  f"'{self.time_grid.labels[slot]}' and '{self.time_grid.labels[other]}'")
+                        return False
+        return True
+
+    def _check_enrolled_students(self, timeslot_schedule):
+        """No enrolled student attends two sessions in one timeslot or in overlapping ones"""
+        masks = {slot: self.conflicts.mask(variable.id for variable, _ in pairs)
+                 for slot, pairs in timeslot_schedule.items()}
+        overlapping = self.time_grid.overlapping if self.time_grid is not None else None
+        for slot, pairs in timeslot_schedule.items():
+            mask = masks[slot]
+            if overlapping:
+                for other in overlapping[slot]:
+                    mask |= masks.get(other, 0)
+            for variable, _ in pairs:
+                if self.conflicts.clashes(variable.id, mask):
+                    if self.debug:
+                        print(f"[NoStudentConflict] Students enrolled in {variable.id} have another session "
+                              f"at '{_slot_label(self.time_grid, slot)}'")
+                    return False
         return True
 
     def _check_room_capacity_conflicts(self, room, var_domain_pairs):
-        room_info = self.rooms.get(room, {'capacity': 15})
-        try:
-            room_capacity = int(room_info.get('capacity', 15))
-        except Exception:
-            room_capacity = 15
+        room_capacity = self.records.room_capacity(room)
         total_students = 0
         section_classes = []
         group_classes = []
         for variable, domain in var_domain_pairs:
             year = getattr(variable, 'year', None) or self._extract_year_from_course_id(getattr(variable, 'course_id', ''))
-            stype = getattr(variable, 'session_type', '').lower()
+            stype = variable.session_type
             if stype == 'lecture' and getattr(variable, 'group_id', None):
                 group_classes.append((variable, domain, year))
                 total_students += 45
@@ -224,30 +286,32 @@ class NoStudentConflictConstraint(Constraint):
         return True
 
     def _check_student_conflicts(self, var_domain_pairs):
+        """Sections the sessions of one timeslot keep busy, or None if one is double-booked"""
         occupied_groups = set()
         occupied_sections = set()
         for variable, domain in var_domain_pairs:
+            if variable.id in self.elective_ids:
+                continue
             year = getattr(variable, 'year', None) or self._extract_year_from_course_id(getattr(variable, 'course_id', ''))
-            stype = getattr(variable, 'session_type', '').lower()
+            stype = variable.session_type
             if stype == 'lecture' and getattr(variable, 'group_id', None):
                 group_key = (year, variable.group_id)
-                if group_key in occupied_groups:
+                members = self.group_sections.get(group_key, ())
+                # A section's own session may come before its group's lecture
+                if group_key in occupied_groups or not occupied_sections.isdisjoint(members):
                     if self.debug:
                         print(f"[NoStudentConflict::_check_student_conflicts] group {group_key} double-booked")
-                    return False
+                    return None
                 occupied_groups.add(group_key)
-                for (sec_year, section_id), sec_group in self.section_to_group.items():
-                    if sec_year == year and sec_group == variable.group_id:
-                        occupied_sections.add((year, section_id))
+                occupied_sections.update(members)
             elif getattr(variable, 'section_id', None):
-                section_id = int(variable.section_id)
-                section_key = (year, section_id)
+                section_key = (year, variable.section_id)
                 if section_key in occupied_sections:
                     if self.debug:
                         print(f"[NoStudentConflict::_check_student_conflicts] section {section_key} double-booked")
-                    return False
+                    return None
                 occupied_sections.add(section_key)
-        return True
+        return occupied_sections
 
     def _extract_year_from_course_id(self, course_id):
         """Extract year from course ID (handles new format with L/B/T suffixes)"""
@@ -266,15 +330,19 @@ class NoStudentConflictConstraint(Constraint):
 
 class ConstraintManager:
     """Manages all constraints for the CSP, with diagnostic helpers"""
-    def __init__(self, variables, courses, instructors, rooms, sections, debug=False):
+    def __init__(self, variables, records, debug=False, time_grid=None):
         self.debug = debug
+        self.records = records  # Records of the dataset's tables
+        self.time_grid = time_grid  # TimeGrid the domains' slots number; None keys on labels
         self.hard_constraints = [
-            NoInstructorConflictConstraint(variables, debug=debug),
-            NoRoomConflictConstraint(variables, rooms, debug=debug),
-            RoomTypeConstraint(variables, rooms, debug=debug),
-            InstructorQualificationConstraint(variables, instructors, debug=debug),
-            NoStudentConflictConstraint(variables, sections, rooms, debug=debug)
+            NoInstructorConflictConstraint(variables, debug=debug, time_grid=time_grid),
+            NoRoomConflictConstraint(variables, records, debug=debug, time_grid=time_grid),
+            RoomTypeConstraint(variables, records, debug=debug),
+            InstructorQualificationConstraint(variables, records, debug=debug),
+            NoStudentConflictConstraint(variables, records, debug=debug, time_grid=time_grid)
         ]
+        # StudentConflicts of the enrolled electives, or None when every section takes every course
+        self.student_conflicts = self.hard_constraints[-1].conflicts
 
     def check_hard_constraints(self, assignment):
         """Return True if all constraints satisfied; if debug, prints which failed."""
@@ -3,84 +3,364 @@ CSP Solver for Timetable Generation
 Implements greedy algorithm with academic structure constraints
 """
 
+import random
+import sys
 import time
 from .model import CSPModel, Variable, Domain
 from .constraints import ConstraintManager
+from .feasibility import FeasibilityAnalyzer, InfeasibleProblemError, occupied_sections, schema_error_report
+from .records import Records, SchemaError
+from .time_model import DAYS, TimeGrid, assign_sub_slots
+
+
+RESTART_SCHEDULES = ('none', 'luby', 'geometric')
+# 'course_aware' picks the smallest domain; 'dom_wdeg' divides it by the failures recorded on
+# the instructors, rooms and student sections the session competes for
+VARIABLE_HEURISTICS = ('course_aware', 'dom_wdeg')
+# 'cost' tries the cheapest values first (room match, instructor and timeslot load); 'lcv' adds
+# each value's impact on the options of unassigned sessions, times LCV_WEIGHT, to its cost
+VALUE_ORDERS = ('cost', 'lcv')
+LCV_WEIGHT = 3.0
+RESTART_UNIT = 100  # backtracks allowed in a run before the schedule's multiplier
+GEOMETRIC_FACTOR = 1.5
+
+
+def luby(index):
+    """index-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    index += 1
+    while True:
+        k = index.bit_length()
+        if index == (1 << k) - 1:
+            return 1 << (k - 1)
+        index -= (1 << (k - 1)) - 1
 
 
 class CSPSolver:
-    """Generic CSP solver using greedy algorithm"""
+    """Generic CSP solver using greedy algorithm
     
-    def __init__(self, model, constraint_manager):
+    With a `restarts` schedule the search gives up a run after a growing number of
+    backtracks and starts over. The first run keeps the deterministic order; later runs
+    break variable and value ties at random (seeded by `seed`) and try first the variables
+    that failed most often in earlier runs. A `seed` alone randomizes a single run.
+    
+    With the 'dom_wdeg' heuristic a dead end, where every value of a variable is rejected,
+    adds a failure to each resource those values clashed on: an instructor, a room, or a
+    student section (`occupies`, variable id -> (year, section) keys) already busy in that
+    timeslot. A variable's weighted degree
+    sums the weights of its sections plus the mean weights of its instructors and of its
+    rooms, and the variable with the smallest domain / (1 + weighted degree) goes next.
+    The weights are kept across restarts.
+    
+    With the 'lcv' value order the search keeps contention counts of the unassigned
+    sessions' live values per (instructor, room, section) and timeslot, and tries first
+    the values whose resources the other sessions need least (see _order_domain_values).
+    """
+    
+    def __init__(self, model, constraint_manager, time_limit=30, observers=None, restarts='none', seed=None,
+                 heuristic='course_aware', occupies=None, value_order='cost', verbose=True):
+        if restarts not in RESTART_SCHEDULES:
+            raise ValueError(f"Unknown restart schedule '{restarts}'; choose from {list(RESTART_SCHEDULES)}")
+        if heuristic not in VARIABLE_HEURISTICS:
+            raise ValueError(f"Unknown variable heuristic '{heuristic}'; choose from {list(VARIABLE_HEURISTICS)}")
+        if value_order not in VALUE_ORDERS:
+            raise ValueError(f"Unknown value order '{value_order}'; choose from {list(VALUE_ORDERS)}")
         self.model = model
         self.constraint_manager = constraint_manager
-        self.iterations = 0
+        self.time_limit = time_limit  # seconds
+        self.observers = list(observers or [])  # SolverObserver instances
+        self.restart_schedule = None if restarts == 'none' else restarts
+        self.seed = seed
+        self.iterations = 0  # search nodes
+        self.backtracks = 0
+        self.constraint_checks = 0
+        self.restarts = 0
+        self.timed_out = False
         self.start_time = None
+        self.end_time = None
+        self.random = None  # tie-breaking source
+        self.randomized = False  # whether the current run breaks ties with self.random
+        self.variable_weights = {}  # variable_id -> failures below it, kept across restarts
+        self.heuristic = heuristic
+        self.occupies = occupies or {}
+        self.failure_weights = {}  # resource -> rejected values that clashed on it ('dom_wdeg')
+        self.weighted_degrees = {}  # variable_id -> weighted degree ('dom_wdeg')
+        self._resource_users = {}  # resource -> [(variable_id, share of its weight)]
+        self._busy = None  # (kind, resource, timeslot) -> assigned sessions using it ('dom_wdeg')
+        self._conflicts = set()  # resources that rejected values of the variable being tried
+        self.value_order = value_order
+        self._contention = None  # (kind, resource, timeslot) -> weighted live values using it ('lcv')
+        self._slot_keys = {}  # variable_id -> timeslot -> {resource key: values using it}
+        self._section_users = {}  # (year, section) -> variable ids occupying it
+        self._dead_slots = {}  # (variable_id, timeslot) -> assigned sessions blocking its sections then
+        self._tie_ranks = {}
+        self._cutoff = None  # backtrack count that ends the current run
+        self._restart_pending = False
+        self.verbose = verbose  # False keeps progress messages off stdout
+    
+    def _log(self, message):
+        if self.verbose:
+            print(message)
     
     def solve(self):
         """Solve the CSP using greedy algorithm with backtracking"""
         self.iterations = 0
+        self.backtracks = 0
+        self.constraint_checks = 0
+        self.restarts = 0
+        self.timed_out = False
+        self.variable_weights = {}
+        if self.heuristic == 'dom_wdeg':
+            self._reset_failure_weights()
+        if self.value_order == 'lcv':
+            self._reset_contention()
+        self.randomized = False
+        if self.restart_schedule or self.seed is not None:
+            self.random = random.Random(self.seed)
         self.start_time = time.time()
+        self.end_time = None
+        solution = None
+        
+        # The search recurses once per assigned variable; big instances exceed the default limit
+        needed = len(self.model.variables) + 500
+        if sys.getrecursionlimit() < needed:
+            sys.setrecursionlimit(needed)
         
-        print("🔍 Using Greedy Algorithm approach...")
-        print(f"📊 Problem size: {len(self.model.variables)} variables")
+        for observer in self.observers:
+            observer.on_start(self)
+        try:
+            solution = self._solve()
+            return solution
+        finally:
+            self.end_time = time.time()
+            for observer in self.observers:
+                observer.on_finish(self, solution)
+    
+    def stats(self):
+        """Search counters of the last solve"""
+        elapsed = (self.end_time or time.time()) - self.start_time if self.start_time else 0.0
+        stats = {
+            'elapsed_s': round(elapsed, 4),
+            'nodes': self.iterations,
+            'backtracks': self.backtracks,
+            'constraint_checks': self.constraint_checks,
+            'checks_per_second': round(self.constraint_checks / elapsed, 1) if elapsed > 0 else 0.0,
+            'restarts': self.restarts,
+            'timed_out': self.timed_out
+        }
+        if self.heuristic == 'dom_wdeg':
+            stats['hot_resources'] = self.hot_resources()
+        return stats
+    
+    def _solve(self):
+        self._log("🔍 Using Greedy Algorithm approach...")
+        self._log(f"📊 Problem size: {len(self.model.variables)} variables")
         
         # Print domain statistics
         total_domains = sum(len(domains) for domains in self.model.domains.values())
         avg_domains = total_domains / len(self.model.variables) if self.model.variables else 0
-        print(f"📊 Total domain values: {total_domains}, Average per variable: {avg_domains:.1f}")
+        self._log(f"📊 Total domain values: {total_domains}, Average per variable: {avg_domains:.1f}")
         
-        print("🔍 Starting greedy backtracking search...")
+        self._log("🔍 Starting greedy backtracking search...")
         
         # Try greedy approach
-        if self._greedy_algorithm():
+        if self._search():
             return self.model.assignment
         
-        print("⚠️ Greedy algorithm failed to find a solution.")
+        if self.timed_out:
+            self._log(f"⏱️ Greedy algorithm stopped after the {self.time_limit}s time limit.")
+        else:
+            self._log("⚠️ Greedy algorithm failed to find a solution.")
         
         return None
     
+    def _search(self):
+        """Greedy search, run again from scratch whenever a run reaches its backtrack cutoff"""
+        while True:
+            self._restart_pending = False
+            if self.restart_schedule:
+                self._cutoff = self.backtracks + self._run_cutoff(self.restarts)
+            self.randomized = self.random is not None and (self.restarts > 0 or not self.restart_schedule)
+            if self.randomized:
+                # Fresh tie order per run; learned weights still rank first
+                self._tie_ranks = {var_id: self.random.random() for var_id in self.model.variables}
+            if self._greedy_algorithm():
+                return True
+            if self.timed_out or not self._restart_pending:
+                return False
+            self.restarts += 1
+            self._log(f"🔁 Restart {self.restarts} after {self.backtracks} backtracks")
+    
+    def _run_cutoff(self, run):
+        if self.restart_schedule == 'luby':
+            return RESTART_UNIT * luby(run)
+        return int(RESTART_UNIT * GEOMETRIC_FACTOR ** run)
+    
     def _greedy_algorithm(self):
         """Greedy backtracking that finds first feasible solution quickly"""
         self.iterations += 1
         
-        # Check timeout (30 seconds)
-        if time.time() - self.start_time > 30:
+        if self._out_of_time():
             return False
         
-        # Print progress every 1000 iterations
-        if self.iterations % 1000 == 0:
-            print(f"🔍 Iteration {self.iterations}, assigned: {len(self.model.assignment)}/{len(self.model.variables)}")
-            # Print course completion status
-            self._print_course_completion_status()
-        
         if self.model.is_complete():
             # Found a complete solution
-            print(f"✅ Greedy algorithm found a solution!")
+            self._log(f"✅ Greedy algorithm found a solution!")
+            for observer in self.observers:
+                observer.on_solution(self.model.assignment)
             return True
         
-        # Select unassigned variable using course-aware strategy
-        variable_id = self._select_unassigned_variable_course_aware()
+        # Select unassigned variable using the configured heuristic
+        if self.heuristic == 'dom_wdeg':
+            variable_id = self._select_unassigned_variable_dom_wdeg()
+        else:
+            variable_id = self._select_unassigned_variable_course_aware()
         if not variable_id:
             return False
         
-        # Order domain values by cost (lowest cost first - Greedy choice)
-        domain_values = self._order_domain_values_by_cost(variable_id)
+        # Order domain values by cost (lowest cost first - Greedy choice) or least constraining first
+        if self.value_order == 'lcv':
+            domain_values = self._order_domain_values(variable_id)
+        else:
+            domain_values = self._order_domain_values_by_cost(variable_id)
+        
+        # Observers are only notified when registered, so the plain search pays nothing
+        observers = self.observers
+        depth = len(self.model.assignment)
+        weighted = self.heuristic == 'dom_wdeg'
+        if weighted:
+            self._conflicts = set()
+        wiped_out = True
         
         for domain in domain_values:
+            # Checks can be slow on big assignments, so the limit is enforced per value too
+            if self._out_of_time():
+                return False
+            
             if self._is_consistent(variable_id, domain):
+                wiped_out = False
                 # Make assignment
-                self.model.assign(variable_id, domain)
+                self._assign(variable_id, domain)
+                if observers:
+                    for observer in observers:
+                        observer.on_assign(variable_id, domain, depth)
                 
                 # Recursive call - stop if solution found
                 if self._greedy_algorithm():
                     return True
                 
                 # Backtrack
-                self.model.unassign(variable_id)
+                self._unassign(variable_id)
+                
+                # A timeout or restart unwinds the whole search instead of trying siblings
+                if self.timed_out or self._restart_pending:
+                    return False
+                self.backtracks += 1
+                if observers:
+                    for observer in observers:
+                        observer.on_backtrack(variable_id, domain, depth)
+                if self._cutoff is not None and self.backtracks >= self._cutoff:
+                    self._restart_pending = True
+                    return False
+            elif observers:
+                for observer in observers:
+                    observer.on_constraint_reject(variable_id, domain, depth)
         
+        # Every value failed: this variable is hard, so rank it earlier after a restart
+        self.variable_weights[variable_id] = self.variable_weights.get(variable_id, 0) + 1
+        if weighted and wiped_out:
+            # No value passed the checks, so the resources that rejected them caused the dead end
+            self._record_failure(self._conflicts)
         return False
     
+    def _assign(self, variable_id, domain):
+        """Record an assignment made by the search (subclasses keep their indexes here)"""
+        self.model.assign(variable_id, domain)
+        if self._busy is not None:
+            self._track_busy(variable_id, domain, 1)
+        if self._contention is not None:
+            self._add_contention(variable_id, -1)
+            self._block_slot(variable_id, domain.slot, 1)
+    
+    def _unassign(self, variable_id):
+        domain = self.model.assignment.get(variable_id)
+        self.model.unassign(variable_id)
+        if domain is not None:
+            if self._busy is not None:
+                self._track_busy(variable_id, domain, -1)
+            if self._contention is not None:
+                self._block_slot(variable_id, domain.slot, -1)
+                self._add_contention(variable_id, 1)
+    
+    def _value_resources(self, variable_id, domain):
+        """(kind, resource, slot) keys a value occupies: instructor, room and student sections"""
+        slot = domain.slot
+        keys = [('instructor', domain.instructor, slot), ('room', domain.room, slot)]
+        keys += [('section', key, slot) for key in self.occupies.get(variable_id, ())]
+        return keys
+    
+    # ------------------------------------------------------------------
+    # Failure weights ('dom_wdeg')
+    # ------------------------------------------------------------------
+    
+    def _reset_failure_weights(self):
+        self.failure_weights = {}
+        self.weighted_degrees = {var_id: 0.0 for var_id in self.model.variables}
+        self._resource_users = {}
+        for var_id in self.model.variables:
+            domains = self.model.domains[var_id]
+            instructors = {domain.instructor for domain in domains}
+            rooms = self._room_resources(var_id)
+            shares = [(('section', key), 1.0) for key in self.occupies.get(var_id, ())]
+            shares += [(('instructor', name), 1.0 / len(instructors)) for name in instructors]
+            shares += [(room, 1.0 / len(rooms)) for room in rooms]
+            for resource, share in shares:
+                self._resource_users.setdefault(resource, []).append((var_id, share))
+        self._busy = {}
+    
+    def _room_resources(self, variable_id):
+        """Room resources a variable chooses among (one per compatible room)"""
+        return {('room', domain.room) for domain in self.model.domains[variable_id]}
+    
+    def _track_busy(self, variable_id, domain, delta):
+        for key in self._value_resources(variable_id, domain):
+            count = self._busy.get(key, 0) + delta
+            if count:
+                self._busy[key] = count
+            else:
+                del self._busy[key]
+    
+    def _clashing_resources(self, variable_id, domain):
+        """Resources of a rejected value that assigned sessions already use in its timeslot"""
+        return [(kind, resource) for kind, resource, slot in self._value_resources(variable_id, domain)
+                if (kind, resource, slot) in self._busy]
+    
+    def _note_conflicts(self, resources):
+        self._conflicts.update(resources)
+    
+    def _record_failure(self, resources):
+        """Weight the resources behind a dead end, and every variable competing for them"""
+        for resource in resources:
+            self.failure_weights[resource] = self.failure_weights.get(resource, 0) + 1
+            for var_id, share in self._resource_users.get(resource, ()):
+                self.weighted_degrees[var_id] += share
+    
+    def hot_resources(self, limit=5):
+        """Resources with the most recorded failures, most first"""
+        ranked = sorted(self.failure_weights.items(), key=lambda item: -item[1])[:limit]
+        return [{'kind': resource[0], 'name': self._resource_name(resource), 'failures': failures}
+                for resource, failures in ranked]
+    
+    def _resource_name(self, resource):
+        kind, key = resource
+        if kind == 'section':
+            return f"Year {key[0]} Section {key[1]}"
+        return key
+    
+    def _out_of_time(self):
+        if not self.timed_out and time.time() - self.start_time > self.time_limit:
+            self.timed_out = True
+        return self.timed_out
+    
 
     
 
@@ -119,31 +399,31 @@ class CSPSolver:
         # All days have equal cost for even distribution
         return 0.0
     
-    def _get_timeslot_distribution_cost(self, timeslot):
+    def _get_timeslot_distribution_cost(self, slot):
         """Cost based on timeslot distribution (prefer spread across time slots)"""
         # Count classes in this exact timeslot
         timeslot_load = sum(1 for domain in self.model.assignment.values() 
-                           if domain.timeslot == timeslot)
+                           if domain.slot == slot)
         
         # Reduced penalty to make solutions easier to find
         return timeslot_load * 0.2
     
+    def _value_cost(self, variable_id, domain):
+        """Cost of one domain assignment (lower is better)"""
+        variable = self.model.variables[variable_id]
+        return (self._get_time_preference_cost(domain.timeslot) +
+                self._get_room_cost(variable, domain.room) +
+                self._get_instructor_cost(domain.instructor) +
+                self._get_day_distribution_cost(domain.timeslot) +
+                self._get_timeslot_distribution_cost(domain.slot))
+    
     def _order_domain_values_by_cost(self, variable_id):
         """Order domain values by their cost (lowest first)"""
-        variable = self.model.variables[variable_id]
-        domain_costs = []
-        
-        for domain in self.model.domains[variable_id]:
-            # Calculate cost for this domain assignment
-            cost = (self._get_time_preference_cost(domain.timeslot) +
-                   self._get_room_cost(variable, domain.room) +
-                   self._get_instructor_cost(domain.instructor) +
-                   self._get_day_distribution_cost(domain.timeslot) +
-                   self._get_timeslot_distribution_cost(domain.timeslot))
-            
-            domain_costs.append((cost, domain))
+        domain_costs = [(self._value_cost(variable_id, domain), domain) for domain in self.model.domains[variable_id]]
         
-        # Sort by cost (lowest first)
+        # Sort by cost (lowest first); the sort is stable, so shuffling first breaks ties at random
+        if self.randomized:
+            self.random.shuffle(domain_costs)
         domain_costs.sort(key=lambda x: x[0])
         return [domain for cost, domain in domain_costs]
     
@@ -152,10 +432,19 @@ class CSPSolver:
     
     def _select_unassigned_variable_course_aware(self):
         """Select variable using course-aware strategy to ensure course completeness"""
-        unassigned = self.model.get_unassigned_variables()
-        if not unassigned:
+        priority_variables = self._course_priority_variables()
+        if not priority_variables:
             return None
         
+        # Among priority variables, choose the most constrained (smallest domain)
+        if not self.randomized:
+            return min(priority_variables, key=self._domain_size)
+        return min(priority_variables, key=self._weighted_rank)
+    
+    def _course_priority_variables(self):
+        """Unassigned variables, those of partially assigned courses first"""
+        unassigned = self.model.get_unassigned_variables()
+        
         # Group unassigned variables by base course
         course_groups = {}
         for var_id in unassigned:
@@ -184,10 +473,30 @@ class CSPSolver:
                 unassigned_courses.extend(var_ids)
         
         # Prioritize partially assigned courses first, then unassigned courses
-        priority_variables = partially_assigned_courses + unassigned_courses
+        return partially_assigned_courses + unassigned_courses
+    
+    def _select_unassigned_variable_dom_wdeg(self):
+        """Smallest domain relative to the failures on the resources the variable competes for
         
-        # Among priority variables, choose the most constrained (smallest domain)
-        return min(priority_variables, key=lambda var_id: len(self.model.domains[var_id]))
+        Ties keep the course-aware order, so before the first dead end this picks what
+        the course-aware heuristic would.
+        """
+        priority_variables = self._course_priority_variables()
+        if not priority_variables:
+            return None
+        degrees = self.weighted_degrees
+        if not self.randomized:
+            return min(priority_variables, key=lambda var_id: self._domain_size(var_id) / (1 + degrees[var_id]))
+        return min(priority_variables, key=lambda var_id: (self._domain_size(var_id) / (1 + degrees[var_id]),
+                                                           self._tie_ranks.get(var_id, 0)))
+    
+    def _weighted_rank(self, variable_id):
+        """Domain size shrunk by learned failures, with the run's random tie order"""
+        weight = self.variable_weights.get(variable_id, 0)
+        return (self._domain_size(variable_id) / (1 + weight), self._tie_ranks.get(variable_id, 0))
+    
+    def _domain_size(self, variable_id):
+        return len(self.model.domains[variable_id])
     
     def _select_unassigned_variable(self):
         """Select variable using Most Constraining Variable heuristic"""
@@ -226,16 +535,101 @@ class CSPSolver:
             else:
                 unassigned_courses += 1
         
-        print(f"📊 Course Status: {complete_courses} complete, {partial_courses} partial, {unassigned_courses} unassigned")
+        self._log(f"📊 Course Status: {complete_courses} complete, {partial_courses} partial, {unassigned_courses} unassigned")
     
     def _order_domain_values(self, variable_id):
-        """Order domain values using Least Constraining Value heuristic"""
-        # For now, return domains in original order
-        # Could be improved with more sophisticated heuristics
-        return self.model.domains[variable_id]
+        """Order domain values using Least Constraining Value heuristic
+        
+        A value's impact is the contention on the resources it would occupy in its
+        timeslot: the values of other unassigned sessions using the same instructor, room
+        or student section then, each weighted by 1 / its session's domain size, so options
+        of nearly forced sessions (a lab with few rooms, a course with one instructor)
+        count most. The counts are kept up to date on assign and unassign, so ordering
+        costs time linear in the domain.
+        
+        Impact alone gives up the cost's load balancing, which the instructor-bound
+        instances need, so values are ranked by cost + LCV_WEIGHT * impact.
+        """
+        values = self.model.domains[variable_id]
+        if self.randomized:
+            values = list(values)
+            self.random.shuffle(values)
+        share = 1.0 / self._domain_size(variable_id)
+        slot_keys = self._slot_keys[variable_id]
+        contention = self._contention
+        
+        def impact(domain):
+            slot = domain.slot
+            if (variable_id, slot) in self._dead_slots:
+                return float('inf')  # its students are busy then; the checks reject it anyway
+            own = slot_keys[slot]  # the variable's own values are still counted; leave them out
+            return sum((contention.get(key, 0.0) - own[key] * share) / self._resource_capacity(key)
+                       for key in self._value_resources(variable_id, domain))
+        
+        return sorted(values, key=lambda domain: self._value_cost(variable_id, domain) + LCV_WEIGHT * impact(domain))
+    
+    def _resource_capacity(self, key):
+        """Sessions a resource key holds at once; taking one of several only partly blocks it"""
+        return 1
+    
+    def _reset_contention(self):
+        """Contention of every value, indexed per variable and timeslot"""
+        self._contention = {}
+        self._slot_keys = {}
+        self._section_users = {}
+        self._dead_slots = {}
+        for var_id in self.model.variables:
+            per_slot = {}
+            for domain in self.model.domains[var_id]:
+                counts = per_slot.setdefault(domain.slot, {})
+                for key in self._value_resources(var_id, domain):
+                    counts[key] = counts.get(key, 0) + 1
+            self._slot_keys[var_id] = per_slot
+            for section in self.occupies.get(var_id, ()):
+                self._section_users.setdefault(section, []).append(var_id)
+            self._add_contention(var_id, 1)
+    
+    def _add_contention(self, variable_id, sign):
+        """Add (sign 1) or remove (sign -1) a variable's live values from the contention counts"""
+        for timeslot in self._slot_keys[variable_id]:
+            if (variable_id, timeslot) not in self._dead_slots:
+                self._add_slot_contention(variable_id, timeslot, sign)
+    
+    def _add_slot_contention(self, variable_id, timeslot, sign):
+        share = sign / self._domain_size(variable_id)
+        contention = self._contention
+        for key, count in self._slot_keys[variable_id][timeslot].items():
+            contention[key] = contention.get(key, 0.0) + count * share
+    
+    def _block_slot(self, variable_id, timeslot, delta):
+        """Block (delta 1) or free (delta -1) a timeslot for sessions sharing the variable's students
+        
+        Their values then are dead, so they leave the contention counts while blocked.
+        """
+        assignment = self.model.assignment
+        seen = {variable_id}
+        for section in self.occupies.get(variable_id, ()):
+            for other_id in self._section_users[section]:
+                if other_id in seen:
+                    continue
+                seen.add(other_id)
+                key = (other_id, timeslot)
+                blocked = self._dead_slots.get(key, 0)
+                if delta > 0:
+                    self._dead_slots[key] = blocked + 1
+                elif blocked > 1:
+                    self._dead_slots[key] = blocked - 1
+                else:
+                    del self._dead_slots[key]
+                # Only the first block and the last release change the counts
+                if (blocked == 0 if delta > 0 else blocked == 1) and other_id not in assignment \
+                        and timeslot in self._slot_keys[other_id]:
+                    self._add_slot_contention(other_id, timeslot, -delta)
     
     def _is_consistent(self, variable_id, domain):
         """Check if assignment is consistent with constraints"""
+        self.constraint_checks += 1
+        
         # Temporarily assign the value
         old_assignment = self.model.assignment.copy()
         self.model.assign(variable_id, domain)
@@ -246,6 +640,8 @@ class CSPSolver:
         # Restore assignment
         self.model.assignment = old_assignment
         
+        if not is_consistent and self._busy is not None:
+            self._note_conflicts(self._clashing_resources(variable_id, domain))
         return is_consistent
     
 
@@ -265,190 +661,355 @@ class CSPSolver:
         return 1
 
 
+class CompiledModel:
+    """Read-only CSP model and constraints compiled once from a dataset"""
+    
+    def __init__(self, data, model, constraint_manager, feasibility=None):
+        self.data = data  # {'courses': [...], 'sections': [...], ...}
+        self.model = model
+        self.constraint_manager = constraint_manager
+        self.feasibility = feasibility  # FeasibilityAnalyzer report
+        self.derived = {}  # search structures other solving modes build on first use
+        self.compiled_at = time.time()
+    
+    def new_search_model(self):
+        """Fresh model sharing variables and domains, with its own empty assignment"""
+        return self.model.fork()
+    
+    def records(self):
+        """Typed records of the data, as the constraints use them"""
+        records = self.derived.get('records')
+        if records is None:
+            records = self.derived['records'] = self.constraint_manager.records
+        return records
+    
+    def time_grid(self):
+        """TimeGrid numbering the domains' slots, as the constraints use it"""
+        grid = self.derived.get('time_grid')
+        if grid is None:
+            grid = self.constraint_manager.time_grid
+            if grid is None:
+                grid = TimeGrid(self.data['timeslots'])
+            self.derived['time_grid'] = grid
+        return grid
+    
+    def occupied_sections(self):
+        """Student sections each session keeps busy, derived on first use"""
+        occupies = self.derived.get('occupied_sections')
+        if occupies is None:
+            occupies = self.derived['occupied_sections'] = occupied_sections(self.model.variables, self.records())
+        return occupies
+    
+    def student_conflicts(self):
+        """StudentConflicts of the enrolled electives, or None without enrollments"""
+        return self.constraint_manager.student_conflicts
+    
+    def estimate_memory(self):
+        """Approximate bytes held by the compiled model and its source data"""
+        import sys
+        total = 0
+        for rows in self.data.values():
+            for row in rows:
+                total += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+        
+        domain_count = sum(len(domains) for domains in self.model.domains.values())
+        if domain_count:
+            sample = next(domains[0] for domains in self.model.domains.values() if domains)
+            # Domain object, its attribute dict and the list slot pointing at it
+            per_domain = sys.getsizeof(sample) + sys.getsizeof(sample.__dict__) + 8
+            total += domain_count * per_domain
+        
+        for variable in self.model.variables.values():
+            total += sys.getsizeof(variable) + sys.getsizeof(variable.__dict__) + sys.getsizeof(variable.id)
+        return total
+
+
+# 'greedy' searches full (timeslot, room, instructor) domains; 'two_phase' searches
+# (timeslot, instructor) and matches rooms per timeslot afterwards
+SOLVER_MODES = ('greedy', 'two_phase', 'balanced')
+
+
 class TimetableSolver:
     """High-level timetable solver using CSP"""
     
-    def __init__(self, data_loader):
+    def __init__(self, data_loader, time_limit=30, mode='greedy', role_targets=None, rest_days=None,
+                 restarts='none', seed=None, pins=None, heuristic='course_aware', value_order='cost', verbose=True):
+        if mode not in SOLVER_MODES:
+            raise ValueError(f"Unknown solver mode '{mode}'; choose from {list(SOLVER_MODES)}")
+        if restarts not in RESTART_SCHEDULES:
+            raise ValueError(f"Unknown restart schedule '{restarts}'; choose from {list(RESTART_SCHEDULES)}")
+        if heuristic not in VARIABLE_HEURISTICS:
+            raise ValueError(f"Unknown variable heuristic '{heuristic}'; choose from {list(VARIABLE_HEURISTICS)}")
+        if value_order not in VALUE_ORDERS:
+            raise ValueError(f"Unknown value order '{value_order}'; choose from {list(VALUE_ORDERS)}")
+        if role_targets and mode != 'balanced':
+            raise ValueError("Role target loads need the 'balanced' solver mode")
         self.data_loader = data_loader
+        self.time_limit = time_limit
+        self.mode = mode
+        self.role_targets = role_targets  # instructor role -> target timeslots taught
+        self.rest_days = dict(rest_days or {})  # year -> rest day, overriding the default rotation
+        self.restarts = restarts
+        self.seed = seed  # search tie-breaking; None keeps the deterministic order
+        self.heuristic = heuristic  # variable ordering, one of VARIABLE_HEURISTICS
+        self.value_order = value_order  # value ordering, one of VALUE_ORDERS
+        if pins:
+            # Imported here because pins builds on CompiledModel from this module
+            from .pins import parse_pins
+            pins = parse_pins(pins)
+        self.pins = pins or []  # pinned assignments on top of the dataset's own pins.csv
         self.model = None
         self.constraint_manager = None
+        self.records = None  # Records of the dataset's tables, parsed once per compile
+        self.time_grid = None  # TimeGrid of the dataset's timeslots, parsed once per compile
+        self.last_stats = None  # CSPSolver.stats() of the last search
+        self.last_balance = None  # InstructorBalancer report of the last 'balanced' solve
+        self.last_pins = None  # PinPropagator stats of the last solve with pins
+        self.verbose = verbose  # False keeps progress messages off stdout, e.g. in server threads
+    
+    def _log(self, message):
+        if self.verbose:
+            print(message)
     
-    def generate_timetable(self):
-        """Generate timetable using CSP approach"""
-        # Load data
-        courses = self.data_loader.load_courses()
-        sections = self.data_loader.load_sections()
-        instructors = self.data_loader.load_instructors()
-        rooms = self.data_loader.load_rooms()
-        timeslots = self.data_loader.load_timeslots()
+    def load_data(self):
+        """Load all input tables from the data loader"""
+        return {
+            'courses': self.data_loader.load_courses(),
+            'sections': self.data_loader.load_sections(),
+            'instructors': self.data_loader.load_instructors(),
+            'rooms': self.data_loader.load_rooms(),
+            'timeslots': self.data_loader.load_timeslots(),
+            'pins': self.data_loader.load_pins(),
+            'enrollments': self.data_loader.load_enrollments()
+        }
+    
+    def parse_data(self, data):
+        """Typed records and time grid of the data; raises SchemaError for a bad row"""
+        return Records.parse(data), TimeGrid(data.get('timeslots') or [])
+    
+    def analyze_feasibility(self, data=None, parsed=None):
+        """Fast necessary-condition checks on the data; returns a report dict
+        
+        Rows that do not fit their table's schema are reported as errors. `parsed` is
+        parse_data's result, when the caller already has it.
+        """
+        if parsed is None:
+            if data is None:
+                data = self.load_data()
+            try:
+                parsed = self.parse_data(data)
+            except SchemaError as e:
+                return schema_error_report(e)
+        records, time_grid = parsed
+        variables = self._create_variables(records)
+        analyzer = FeasibilityAnalyzer(variables, records, time_grid, self._get_available_days_for_year)
+        return analyzer.analyze()
+    
+    def compile(self, data=None):
+        """Build the CSP model and constraints once so they can be reused across solves"""
+        if data is None:
+            data = self.load_data()
+        
+        records, time_grid = parsed = self.parse_data(data)
+        feasibility = self.analyze_feasibility(parsed=parsed)
         
         # Create CSP model
-        self.model = self._create_model(courses, sections, timeslots, rooms, instructors)
+        self.model = self._create_model(records, time_grid)
         
         # Create constraints
-        self.constraint_manager = self._create_constraints(courses, instructors, rooms, sections)
+        self.constraint_manager = self._create_constraints()
+        
+        before, after = self.reduce_domains()
+        self._log(f"✂️ Domain reduction kept {after} of {before} values")
+        
+        compiled = CompiledModel(data, self.model, self.constraint_manager, feasibility)
+        if data.get('pins'):
+            from .pins import PinPropagator, parse_pins
+            propagator = PinPropagator(compiled)
+            compiled = propagator.apply(parse_pins(data['pins']))
+            stats = propagator.report['stats']
+            self._log(f"📌 Pinned {stats['sessions_pinned']} sessions from pins.csv, "
+                      f"keeping {stats['values_after']} of {stats['values_before']} values")
+        return compiled
+    
+    def reduce_domains(self, var_ids=None):
+        """Drop domain values that violate a hard constraint on their own (node consistency)
+        
+        Such a value fails every consistency check during search. Whether a value passes
+        alone does not depend on its timeslot, so each (session kind, room, instructor)
+        is checked once. Only `var_ids` are reduced when given. Returns (values before, values after).
+        """
+        before = after = 0
+        verdicts = {}
+        for var_id in (self.model.domains if var_ids is None else var_ids):
+            domains = self.model.domains[var_id]
+            variable = self.model.variables[var_id]
+            kind = (variable.course_id, variable.session_type, variable.group_id is None, variable.section_id is None)
+            kept = []
+            for domain in domains:
+                key = (kind, domain.room, domain.instructor)
+                if key not in verdicts:
+                    verdicts[key] = self.constraint_manager.check_hard_constraints({var_id: domain})
+                if verdicts[key]:
+                    kept.append(domain)
+            before += len(domains)
+            after += len(kept)
+            domains[:] = kept
+        return before, after
+    
+    def generate_timetable(self, compiled=None, observers=None):
+        """Generate timetable using CSP approach
+        
+        `observers` are SolverObserver instances notified of search events.
+        Raises InfeasibleProblemError without searching when the data is provably infeasible.
+        """
+        if compiled is None:
+            data = self.load_data()
+            report = self.analyze_feasibility(data)
+            if not report['feasible']:
+                raise InfeasibleProblemError(report)
+            compiled = self.compile(data)
+        elif compiled.feasibility and not compiled.feasibility['feasible']:
+            raise InfeasibleProblemError(compiled.feasibility)
+        
+        if self.pins:
+            # Raises PinConflictError before any search when the pins cannot all hold
+            from .pins import PinPropagator
+            propagator = PinPropagator(compiled)
+            compiled = propagator.apply(self.pins)
+            self.last_pins = propagator.report['stats']
+            self._log(f"📌 Pinned {self.last_pins['sessions_pinned']} sessions, propagated to "
+                      f"{self.last_pins['sessions_propagated']} more")
+        
+        # Search on a private copy so a pooled compiled model is never mutated
+        self.model = compiled.new_search_model()
+        self.constraint_manager = compiled.constraint_manager
+        self.records = compiled.records()
+        self.time_grid = compiled.time_grid()
         
         # Solve CSP
-        solver = CSPSolver(self.model, self.constraint_manager)
-        print(f"🔍 Starting CSP solver with {self.model.get_variable_count()} variables...")
+        if self.mode == 'two_phase':
+            # Imported here because two_phase builds on CSPSolver from this module
+            from .two_phase import TwoPhaseSolver
+            solver = TwoPhaseSolver(compiled, time_limit=self.time_limit, observers=observers,
+                                    restarts=self.restarts, seed=self.seed, heuristic=self.heuristic,
+                                    value_order=self.value_order, verbose=self.verbose)
+        elif self.mode == 'balanced':
+            from .two_phase import BalancedSolver
+            solver = BalancedSolver(compiled, time_limit=self.time_limit, observers=observers,
+                                    role_targets=self.role_targets, restarts=self.restarts, seed=self.seed,
+                                    heuristic=self.heuristic, value_order=self.value_order, verbose=self.verbose)
+        else:
+            # Only dom/wdeg and lcv track student sections; the default search leaves them to the constraints
+            tracks_sections = self.heuristic == 'dom_wdeg' or self.value_order == 'lcv'
+            solver = CSPSolver(self.model, self.constraint_manager, time_limit=self.time_limit, observers=observers,
+                               restarts=self.restarts, seed=self.seed, heuristic=self.heuristic,
+                               occupies=compiled.occupied_sections() if tracks_sections else None,
+                               value_order=self.value_order, verbose=self.verbose)
+        self._log(f"🔍 Starting CSP solver with {self.model.get_variable_count()} variables...")
         
         solution = solver.solve()
+        self.last_stats = solver.stats()
+        self.last_balance = solver.balancer.report if self.mode == 'balanced' else None
         
-        total_time = time.time() - solver.start_time
-        print(f"🔍 Solver finished in {total_time:.2f}s after {solver.iterations} iterations")
+        self._log(f"🔍 Solver finished in {self.last_stats['elapsed_s']:.2f}s after {solver.iterations} iterations, "
+                  f"{solver.backtracks} backtracks, {solver.restarts} restarts and {solver.constraint_checks} "
+                  f"constraint checks")
         if hasattr(solver, 'best_cost') and solver.best_cost != float('inf'):
-            print(f"💰 Final solution cost: {solver.best_cost:.2f}") 
+            self._log(f"💰 Final solution cost: {solver.best_cost:.2f}") 
         
         if solution:
-            formatted_solution = self._format_solution(solution, courses, instructors, rooms, timeslots)
+            formatted_solution = self._format_solution(solution)
             # Validate course completeness
-            self._validate_course_completeness(formatted_solution, courses)
+            self._validate_course_completeness(formatted_solution)
             return formatted_solution
         else:
             return None
     
-    def _create_model(self, courses, sections, timeslots, rooms, instructors):
+    def _create_model(self, records, time_grid):
         """Create CSP model with variables and domains"""
         model = CSPModel()
+        self.records = records
+        self.time_grid = time_grid
         
-        # Group sections by year and group
-        year_structure = self._analyze_academic_structure(sections)
+        # Courses grouped by base course (e.g., CSC 111L, CSC 111B, CSC 111T -> CSC 111)
+        self._log(f"📚 Found {len(records.course_groups)} course groups:")
+        for base_course, components in records.course_groups.items():
+            component_types = [c.type for c in components]
+            self._log(f"  {base_course}: {component_types}")
         
-        # Group courses by base course (e.g., CSC 111L, CSC 111B, CSC 111T -> CSC 111)
-        course_groups = self._group_courses_by_base(courses)
+        for variable in self._create_variables(records):
+            model.add_variable(variable)
+            
+            # Create domains for this variable
+            domains = self._create_domains_for_variable(variable)
+            for domain in domains:
+                model.add_domain_value(variable.id, domain)
         
-        print(f"📚 Found {len(course_groups)} course groups:")
-        for base_course, components in course_groups.items():
-            component_types = [c['type'] for c in components]
-            print(f"  {base_course}: {component_types}")
+        return model
+    
+    def _create_variables(self, records):
+        """Create one variable per session to schedule, without domains"""
+        variables = []
         
         # Create variables for each course component
-        for base_course, course_components in course_groups.items():
+        for base_course, course_components in records.course_groups.items():
             # Get year from any component (they should all be the same)
-            course_year = int(course_components[0]['Year'])
-            year_sections = [s for s in sections if int(s['year']) == course_year]
-            groups = year_structure[course_year]
+            course_year = course_components[0].year
+            year_sections = [s for s in records.sections if s.year == course_year]
+            groups = records.year_structure.get(course_year, {})
             
             for course in course_components:
-                course_id = course['course_id']
-                course_type = course['type'].strip().lower()
+                course_id = course.course_id
+                course_type = course.type
                 
-                if course_type == 'lecture':
-                    # Lectures: one variable per group (3 sections together)
+                if course_type in ['lecture', 'project']:
+                    # Lectures and projects: one variable per group (3 sections together)
                     for group_id, group_sections in groups.items():
+                        # An elective only meets for groups with students enrolled
+                        if not records.attends(base_course, records.group_sections[(course_year, group_id)]):
+                            continue
                         variable = Variable(course_id, None, course_type, group_id, 1.0, year=course_year)
                         variable.base_course = base_course  # Add base course reference
-                        model.add_variable(variable)
-                        
-                        # Create domains for this variable
-                        domains = self._create_domains_for_variable(
-                            variable, timeslots, rooms, instructors, course_year, course_id
-                        )
-                        for domain in domains:
-                            model.add_domain_value(variable.id, domain)
+                        variables.append(variable)
                 
                 elif course_type in ['lab', 'tutorial']:
                     # Labs and tutorials: one variable per section
                     duration = 0.5 if course_type == 'tutorial' else 1.0
                     
                     for section in year_sections:
-                        section_id = section['section']
+                        section_id = section.section
+                        if not records.attends(base_course, ((course_year, section_id),)):
+                            continue
                         variable = Variable(course_id, section_id, course_type, None, duration, year=course_year)
                         variable.base_course = base_course  # Add base course reference
-                        model.add_variable(variable)
-                        
-                        # Create domains for this variable
-                        domains = self._create_domains_for_variable(
-                            variable, timeslots, rooms, instructors, course_year, course_id
-                        )
-                        for domain in domains:
-                            model.add_domain_value(variable.id, domain)
-                
-                elif course_type == 'project':
-                    # Projects: one variable per group (like lectures but different type)
-                    for group_id, group_sections in groups.items():
-                        variable = Variable(course_id, None, course_type, group_id, 1.0, year=course_year)
-                        variable.base_course = base_course  # Add base course reference
-                        model.add_variable(variable)
-                        
-                        # Create domains for this variable
-                        domains = self._create_domains_for_variable(
-                            variable, timeslots, rooms, instructors, course_year, course_id
-                        )
-                        for domain in domains:
-                            model.add_domain_value(variable.id, domain)
+                        variables.append(variable)
         
-        return model
+        return variables
     
-    def _group_courses_by_base(self, courses):
-        """Group courses by their base course (e.g., CSC 111L, CSC 111B -> CSC 111)"""
-        import re
-        course_groups = {}
-        
-        for course in courses:
-            course_id = course['course_id']
-            # Extract base course (remove L/B/T suffix)
-            base_match = re.match(r'^([A-Z]{3}\s+\d{3})[LBT]?$', course_id)
-            if base_match:
-                base_course = base_match.group(1)
-            else:
-                # Fallback for courses without suffix
-                base_course = course_id
-            
-            if base_course not in course_groups:
-                course_groups[base_course] = []
-            course_groups[base_course].append(course)
-        
-        return course_groups
-    
-    def _analyze_academic_structure(self, sections):
-        """Analyze sections to understand year/group structure"""
-        year_structure = {}
-        
-        for section in sections:
-            year = int(section['year'])
-            group = int(section['group'])
-            section_id = section['section']
-            
-            if year not in year_structure:
-                year_structure[year] = {}
-            
-            if group not in year_structure[year]:
-                year_structure[year][group] = []
-            
-            year_structure[year][group].append(section_id)
-        
-        return year_structure
-    
-    def _create_domains_for_variable(self, variable, timeslots, rooms, instructors, course_year, course_id):
+    def _create_domains_for_variable(self, variable):
         """Create domain values for a variable"""
         domains = []
+        grid = self.time_grid
         
-        # Filter timeslots for this year (4 days out of 5)
-        available_days = self._get_available_days_for_year(course_year)
-        year_timeslots = [ts for ts in timeslots if ts['Day'] in available_days]
-        
-        # Filter rooms by type
-        session_type = variable.session_type
-        if session_type == 'lab':
-            available_rooms = [r for r in rooms if r['type'].lower() == 'lab']
-        else:  # lecture or tutorial
-            available_rooms = [r for r in rooms if r['type'].lower() in ['lecture', 'classroom', 'tutorial']]
-        
-        # Filter instructors by qualification
-        qualified_instructors = [
-            i for i in instructors 
-            if course_id in [q.strip() for q in i['qualifications'].split(',')]
-        ]
-        
-        # Create all combinations
-        for timeslot in year_timeslots:
-            for room in available_rooms:
+        # Timeslots on this year's days (4 days out of 5)
+        available_days = set(self._get_available_days_for_year(variable.year))
+        year_slots = [slot for slot, interval in enumerate(grid.intervals) if DAYS[interval.day] in available_days]
+        
+        # Rooms by type and instructors by qualification, both looked up once per dataset
+        available_rooms = self.records.rooms_for(variable.session_type)
+        qualified_instructors = self.records.qualified.get(variable.course_id, [])
+        
+        # Create all combinations (one label string per timeslot, shared by its domains)
+        for slot in year_slots:
+            timeslot_label = grid.labels[slot]
+            for room_id in available_rooms:
                 for instructor in qualified_instructors:
                     domain = Domain(
-                        f"{timeslot['Day']} {timeslot['StartTime']}",
-                        room['room_id'],
-                        instructor['name']
+                        timeslot_label,
+                        room_id,
+                        instructor,
+                        slot
                     )
                     domains.append(domain)
         
@@ -460,24 +1021,23 @@ class TimetableSolver:
         
         # Each year gets a different rest day
         rest_day_index = (year - 1) % 5
-        rest_day = all_days[rest_day_index]
+        rest_day = self.rest_days.get(year, all_days[rest_day_index])
         
         return [day for day in all_days if day != rest_day]
     
-    def _create_constraints(self, courses, instructors, rooms, sections):
+    def _create_constraints(self):
         """Create constraint manager"""
-        return ConstraintManager(self.model.variables, courses, instructors, rooms, sections)
+        return ConstraintManager(self.model.variables, self.records, time_grid=self.time_grid)
     
-    def _format_solution(self, solution, courses, instructors, rooms, timeslots):
+    def _format_solution(self, solution):
         """Format solution into readable timetable"""
         timetable = []
-        
-        # Create lookup dictionaries
-        course_lookup = {c['course_id']: c for c in courses}
+        clock_times = self.time_grid.clock_times
+        tutorial_times = self._tutorial_clock_times(solution)
         
         for var_id, domain in solution.items():
             variable = self.model.variables[var_id]
-            course = course_lookup[variable.course_id]
+            course = self.records.course_lookup[variable.course_id]
             
             # Determine sections involved
             if variable.group_id:
@@ -486,40 +1046,56 @@ class TimetableSolver:
             else:
                 # Lab/Tutorial: single section
                 sections_involved = f"Section {variable.section_id}"
+            start, end = tutorial_times.get(var_id) or clock_times[domain.slot]
             
             timetable_entry = {
                 'course_id': variable.course_id,
-                'course_name': course['course'],
+                'course_name': course.name,
                 'session_type': variable.session_type,
                 'sections': sections_involved,
                 'day_time': domain.timeslot,
+                'start': start,
+                'end': end,
                 'room': domain.room,
                 'instructor': domain.instructor,
                 'duration': variable.duration,
-                'year': int(course['Year'])
+                'year': course.year
             }
             
             timetable.append(timetable_entry)
         
         return timetable
     
-    def _validate_course_completeness(self, timetable, courses):
+    def _tutorial_clock_times(self, solution):
+        """(start, end) clock times of each tutorial's 45-minute sub-slot; other sessions take their whole slot
+        
+        A slot's tutorials are spread over its sub-slots so no instructor or room has two
+        at once; the hard constraints allow no more tutorials than that.
+        """
+        grid = self.time_grid
+        times = {}
+        tutorials = {}  # slot -> [variable ids]
+        for var_id, domain in solution.items():
+            if self.model.variables[var_id].duration < 1.0:
+                tutorials.setdefault(domain.slot, []).append(var_id)
+        for slot, var_ids in tutorials.items():
+            var_ids.sort()
+            sessions = [(solution[var_id].instructor, solution[var_id].room) for var_id in var_ids]
+            for var_id, index in zip(var_ids, assign_sub_slots(sessions, grid.sub_slots[slot])):
+                times[var_id] = grid.sub_slot_clock_times[slot][index]
+        return times
+    
+    def _validate_course_completeness(self, timetable):
         """Validate that all course components are present in the timetable"""
-        print("\n🔍 Validating course completeness...")
+        self._log("\n🔍 Validating course completeness...")
         
-        # Group courses by base course
-        course_groups = self._group_courses_by_base(courses)
+        # Courses grouped by base course
+        course_groups = self.records.course_groups
         
         # Group timetable entries by base course
         timetable_by_base = {}
         for entry in timetable:
-            course_id = entry['course_id']
-            import re
-            base_match = re.match(r'^([A-Z]{3}\s+\d{3})[LBT]?$', course_id)
-            if base_match:
-                base_course = base_match.group(1)
-            else:
-                base_course = course_id
+            base_course = self.records.course_lookup[entry['course_id']].base_course
             
             if base_course not in timetable_by_base:
                 timetable_by_base[base_course] = []
@@ -530,7 +1106,7 @@ class TimetableSolver:
         incomplete_courses = 0
         
         for base_course, course_components in course_groups.items():
-            expected_components = set(c['course_id'] for c in course_components)
+            expected_components = set(c.course_id for c in course_components)
             actual_components = set()
             
             if base_course in timetable_by_base:
@@ -540,20 +1116,20 @@ class TimetableSolver:
             
             if missing_components:
                 incomplete_courses += 1
-                print(f"❌ {base_course}: Missing {missing_components}")
+                self._log(f"❌ {base_course}: Missing {missing_components}")
             else:
                 complete_courses += 1
-                print(f"✅ {base_course}: Complete")
+                self._log(f"✅ {base_course}: Complete")
         
-        print(f"\n📊 Course Completeness Summary:")
-        print(f"   Complete courses: {complete_courses}")
-        print(f"   Incomplete courses: {incomplete_courses}")
-        print(f"   Total courses: {len(course_groups)}")
+        self._log(f"\n📊 Course Completeness Summary:")
+        self._log(f"   Complete courses: {complete_courses}")
+        self._log(f"   Incomplete courses: {incomplete_courses}")
+        self._log(f"   Total courses: {len(course_groups)}")
         
         if incomplete_courses > 0:
-            print(f"⚠️  {incomplete_courses} courses are missing some components!")
+            self._log(f"⚠️  {incomplete_courses} courses are missing some components!")
         else:
-            print("🎉 All courses have all their components scheduled!")
+            self._log("🎉 All courses have all their components scheduled!")
 
 
 
@@ -0,0 +1,87 @@
+"""
+Student Enrollment Conflicts for Timetable CSP
+Compiles elective enrollments into a bitset matrix of the sessions sharing a student, so a
+session is checked against a timeslot with one AND however many students enroll
+"""
+
+
+def session_sections(variable, records):
+    """(year, section) keys whose students a session is for
+
+    As NoStudentConflictConstraint counts them: a group lecture is for every section of
+    its group, a lab or tutorial for its own section.
+    """
+    if variable.session_type == 'lecture' and variable.group_id:
+        return frozenset(records.group_sections.get((variable.year, variable.group_id), ()))
+    if variable.section_id:
+        return frozenset(((variable.year, variable.section_id),))
+    return frozenset()
+
+
+def is_elective(variable, records):
+    return getattr(variable, 'base_course', None) in records.electives
+
+
+def attended_sessions(variables, records):
+    """{cohort: [variable ids]} of the sessions each cohort of enrolled students attends
+
+    Cohorts are the keys of `records.cohorts`. A cohort attends its section's sessions of
+    core courses and, of its electives, the sessions for its section.
+    """
+    by_section = {}  # (year, section) -> [(variable id, base course or None for core)]
+    for variable in variables:
+        base_course = variable.base_course if is_elective(variable, records) else None
+        for key in session_sections(variable, records):
+            by_section.setdefault(key, []).append((variable.id, base_course))
+
+    attended = {}
+    for cohort in records.cohorts:
+        year, section, electives = cohort
+        attended[cohort] = [var_id for var_id, base_course in by_section.get((year, section), ())
+                            if base_course is None or base_course in electives]
+    return attended
+
+
+class StudentConflicts:
+    """Which sessions share an enrolled student, as one bitset row per session
+
+    Each session has a bit; `rows[variable id]` has the bits of the other sessions some
+    enrolled student attends along with it. The rows are built once per cohort rather
+    than per student, and a timeslot's sessions fold into one mask, so whether a session
+    clashes with a timeslot is `rows[id] & mask`. Sessions of core courses also clash
+    through their sections, which NoStudentConflictConstraint checks as before.
+    """
+
+    def __init__(self, variables, records):
+        self.ids = list(variables)  # bit index -> variable id
+        self.bits = {var_id: 1 << index for index, var_id in enumerate(self.ids)}
+        self.rows = dict.fromkeys(variables, 0)
+        self.cohorts = attended_sessions(variables.values(), records)
+        for var_ids in self.cohorts.values():
+            mask = self.mask(var_ids)
+            for var_id in var_ids:
+                self.rows[var_id] |= mask
+        for var_id, bit in self.bits.items():
+            self.rows[var_id] &= ~bit
+
+    def mask(self, var_ids):
+        mask = 0
+        for var_id in var_ids:
+            mask |= self.bits[var_id]
+        return mask
+
+    def sessions(self, mask):
+        """Variable ids of the bits set in `mask`"""
+        var_ids = []
+        while mask:
+            low = mask & -mask
+            var_ids.append(self.ids[low.bit_length() - 1])
+            mask ^= low
+        return var_ids
+
+    def clashes(self, var_id, mask):
+        """Whether a session shares a student with any session in `mask`"""
+        return bool(self.rows[var_id] & mask)
+
+    def shares(self, var_id, other_id):
+        return bool(self.rows[var_id] & self.bits[other_id])
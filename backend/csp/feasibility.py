@@ -0,0 +1,319 @@
+"""
+Feasibility pre-analysis for timetable CSP
+Counting and flow bounds that detect infeasible data in milliseconds, before any search
+"""
+
+import time
+from itertools import combinations
+
+from .enrollment import attended_sessions, is_elective, session_sections
+from .flow import MaxFlow
+from .time_model import DAYS
+
+
+# Students a session brings into a room, as counted by the room capacity constraints
+LECTURE_STUDENTS = 45
+SECTION_STUDENTS = 15
+
+# Room types the RoomTypeConstraint accepts for each session type
+LAB_ROOM_TYPES = ('lab',)
+CLASS_ROOM_TYPES = ('lecture', 'classroom')
+
+
+def occupied_sections(variables, records):
+    """{variable id: frozenset of (year, section)} each session keeps busy
+
+    As NoStudentConflictConstraint counts them: a group lecture occupies every section of
+    its group, a lab or tutorial its own section. Sessions of electives occupy none, as
+    only some of their sections' students attend them (see StudentConflicts).
+    """
+    return {var_id: frozenset() if is_elective(variable, records) else session_sections(variable, records)
+            for var_id, variable in variables.items()}
+
+
+def schema_error_report(error):
+    """Feasibility report for data whose SchemaError stopped the analysis"""
+    return {
+        'feasible': False,
+        'errors': [{'check': 'schema', 'message': str(error),
+                    'details': {'table': error.table, 'row': error.row}}],
+        'warnings': [],
+        'stats': {'sessions': 0, 'timeslots_per_year': {}, 'elapsed_ms': 0.0}
+    }
+
+
+class InfeasibleProblemError(Exception):
+    """Raised instead of searching when the feasibility analysis proves there is no solution"""
+
+    def __init__(self, report):
+        self.report = report
+        messages = [error['message'] for error in report.get('errors', [])]
+        super().__init__("Timetable is infeasible: " + "; ".join(messages[:3]) +
+                         (f" (and {len(messages) - 3} more)" if len(messages) > 3 else ""))
+
+
+class FeasibilityAnalyzer:
+    """Necessary conditions on instructors, rooms and student load that every timetable must meet"""
+
+    def __init__(self, variables, records, time_grid, available_days_for_year):
+        self.variables = variables
+        self.records = records
+        self.time_grid = time_grid
+        self.available_days_for_year = available_days_for_year
+        self.errors = []
+        self.warnings = []
+
+    def analyze(self):
+        """Run every check and return a report dict"""
+        start = time.perf_counter()
+        self.errors = []
+        self.warnings = []
+
+        self._prepare()
+        self._check_data_consistency()
+        self._check_qualified_instructors()
+        self._check_compatible_rooms()
+        self._check_section_load()
+        self._check_cohort_load()
+        self._check_room_supply()
+        self._check_instructor_capacity()
+
+        return {
+            'feasible': not self.errors,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'stats': {
+                'sessions': len(self.variables),
+                'timeslots_per_year': {year: len(slots) for year, slots in sorted(self.year_slots.items())},
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+            }
+        }
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def _prepare(self):
+        self.slots_per_day = {}
+        self.half_slots_per_day = {}  # instructor units per day: 2 per slot, more where tutorials fit
+        grid = self.time_grid
+        for interval, sub_slots in zip(grid.intervals, grid.sub_slots):
+            day = DAYS[interval.day]
+            self.slots_per_day[day] = self.slots_per_day.get(day, 0) + 1
+            self.half_slots_per_day[day] = self.half_slots_per_day.get(day, 0) + max(2, sub_slots)
+
+        self.years = sorted({variable.year for variable in self.variables})
+        self.year_days = {}
+        self.year_slots = {}
+        for year in self.years:
+            days = [day for day in self.available_days_for_year(year) if day in self.slots_per_day]
+            self.year_days[year] = days
+            self.year_slots[year] = [label for label, interval in zip(grid.labels, grid.intervals)
+                                     if DAYS[interval.day] in days]
+
+        self.qualified = self.records.qualified  # course_id -> [instructor names]
+        self.room_lookup = self.records.room_lookup
+
+    def _session_students(self, variable):
+        if variable.session_type == 'lecture' and variable.group_id:
+            return LECTURE_STUDENTS
+        if variable.section_id:
+            return SECTION_STUDENTS
+        return 0
+
+    def _compatible_rooms(self, variable):
+        """Rooms that pass the room type and capacity constraints for a session"""
+        allowed_types = LAB_ROOM_TYPES if variable.session_type == 'lab' else CLASS_ROOM_TYPES
+        students = self._session_students(variable)
+        return [room_id for room_id, room in self.room_lookup.items()
+                if room.type in allowed_types and room.capacity >= students]
+
+    def _add(self, collection, check, message, **details):
+        collection.append({'check': check, 'message': message, 'details': details})
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+
+    def _check_data_consistency(self):
+        seen = {}
+        for room in self.records.rooms:
+            seen.setdefault(room.room_id, []).append(room.type)
+        for room_id, types in seen.items():
+            if len(types) > 1:
+                self._add(self.warnings, 'duplicate_room',
+                          f"Room '{room_id}' is listed {len(types)} times (types {types}); only the last row is used",
+                          room=room_id, types=types)
+
+        unusable = sorted(room_id for room_id, room in self.room_lookup.items()
+                          if room.type not in LAB_ROOM_TYPES + CLASS_ROOM_TYPES)
+        if unusable:
+            self._add(self.warnings, 'unusable_rooms',
+                      f"{len(unusable)} rooms have a type no session may use "
+                      f"(allowed: {list(LAB_ROOM_TYPES + CLASS_ROOM_TYPES)})",
+                      rooms=unusable)
+
+        section_years = {section.year for section in self.records.sections}
+        for course in self.records.courses:
+            if course.year not in section_years:
+                self._add(self.warnings, 'year_without_sections',
+                          f"Course '{course.course_id}' is for year {course.year}, which has no sections",
+                          course=course.course_id, year=course.year)
+
+        for year in self.years:
+            if not self.year_slots[year]:
+                self._add(self.errors, 'no_timeslots',
+                          f"Year {year} has no timeslots on its available days {self.available_days_for_year(year)}",
+                          year=year)
+
+    def _check_qualified_instructors(self):
+        missing = {}
+        for variable in self.variables:
+            if not self.qualified.get(variable.course_id):
+                missing.setdefault(variable.course_id, 0)
+                missing[variable.course_id] += 1
+        for course_id, count in sorted(missing.items()):
+            self._add(self.errors, 'no_qualified_instructor',
+                      f"No instructor is qualified for '{course_id}' ({count} sessions)",
+                      course=course_id, sessions=count)
+
+    def _check_compatible_rooms(self):
+        room_counts = {}  # (session_type, students) -> compatible room count
+        reported = set()
+        for variable in self.variables:
+            need = (variable.session_type, self._session_students(variable))
+            if need not in room_counts:
+                room_counts[need] = len(self._compatible_rooms(variable))
+            key = (variable.course_id, variable.session_type)
+            if key in reported or room_counts[need]:
+                continue
+            reported.add(key)
+            self._add(self.errors, 'no_compatible_room',
+                      f"No room fits '{variable.course_id}' ({variable.session_type}, "
+                      f"{self._session_students(variable)} students)",
+                      course=variable.course_id, session_type=variable.session_type)
+
+    def _check_section_load(self):
+        """A section attends at most one session of core courses per timeslot"""
+        load = {(section.year, section.section): 0 for section in self.records.sections}
+
+        for variable in self.variables:
+            if is_elective(variable, self.records):
+                continue
+            for key in session_sections(variable, self.records):
+                load[key] = load.get(key, 0) + 1
+
+        for (year, section_id), sessions in sorted(load.items()):
+            available = len(self.year_slots.get(year, []))
+            if sessions > available:
+                self._add(self.errors, 'section_overload',
+                          f"Year {year} section {section_id} needs {sessions} sessions per week "
+                          f"but has only {available} timeslots",
+                          year=year, section=section_id, sessions=sessions, timeslots=available)
+
+    def _check_cohort_load(self):
+        """An enrolled student attends at most one session per timeslot, electives included"""
+        for (year, section_id, electives), var_ids in attended_sessions(self.variables, self.records).items():
+            available = len(self.year_slots.get(year, []))
+            if len(var_ids) > available:
+                students = self.records.cohorts[(year, section_id, electives)]
+                self._add(self.errors, 'student_overload',
+                          f"{students[0]}{f' and {len(students) - 1} more' if len(students) > 1 else ''} "
+                          f"(year {year} section {section_id}) attend {len(var_ids)} sessions per week "
+                          f"but have only {available} timeslots",
+                          year=year, section=section_id, students=students, electives=sorted(electives),
+                          sessions=len(var_ids), timeslots=available)
+
+    def _check_room_supply(self):
+        """Hall's condition between each set of years and the room-slots on their days"""
+        lab_rooms = [r for r in self.room_lookup.values()
+                     if r.type in LAB_ROOM_TYPES and r.capacity >= SECTION_STUDENTS]
+        class_rooms = [r for r in self.room_lookup.values()
+                       if r.type in CLASS_ROOM_TYPES and r.capacity >= SECTION_STUDENTS]
+        large_rooms = [r for r in class_rooms if r.capacity >= LECTURE_STUDENTS]
+
+        demand = {year: {'lab': 0, 'lecture': 0, 'class': 0.0} for year in self.years}
+        for variable in self.variables:
+            if variable.session_type == 'lab':
+                demand[variable.year]['lab'] += 1
+            elif variable.session_type == 'lecture':
+                demand[variable.year]['lecture'] += 1
+                demand[variable.year]['class'] += 1
+            elif variable.session_type == 'tutorial':
+                # Two tutorials may share a room, so each needs at least half a room-slot
+                demand[variable.year]['class'] += 0.5
+            else:
+                demand[variable.year]['class'] += 1
+
+        pools = [
+            ('lab', 'lab sessions', 'lab rooms', len(lab_rooms)),
+            ('lecture', 'group lectures', f'rooms for {LECTURE_STUDENTS}+ students', len(large_rooms)),
+            ('class', 'lecture/tutorial/project room-slots', 'lecture/classroom rooms', len(class_rooms)),
+        ]
+        for kind, demand_label, supply_label, room_count in pools:
+            failing = []
+            for size in range(1, len(self.years) + 1):
+                for year_set in combinations(self.years, size):
+                    if any(set(smaller) <= set(year_set) for smaller in failing):
+                        # Supersets of a failing set fail too; only the smallest is reported
+                        continue
+                    needed = sum(demand[year][kind] for year in year_set)
+                    if not needed:
+                        continue
+                    days = {day for year in year_set for day in self.year_days[year]}
+                    slots = sum(self.slots_per_day[day] for day in days)
+                    supply = room_count * slots
+                    if needed > supply:
+                        years_text = ', '.join(str(year) for year in year_set)
+                        self._add(self.errors, 'room_supply',
+                                  f"Year(s) {years_text} need {needed:g} {demand_label} but only "
+                                  f"{room_count} {supply_label} x {slots} timeslots = {supply} are available",
+                                  years=list(year_set), kind=kind, needed=needed, supply=supply)
+                        failing.append(year_set)
+
+    def _check_instructor_capacity(self):
+        """Max flow of sessions to (instructor, day) pairs; a deficit proves infeasibility
+
+        Units are half slots: a full session needs 2, a tutorial 1, and an instructor
+        can give 2 per timeslot (one full session or two tutorials), or one per tutorial
+        sub-slot in slots long enough to hold more than two.
+        """
+        demand = {}  # course_id -> (year, units)
+        for variable in self.variables:
+            if not self.qualified.get(variable.course_id):
+                continue  # already reported
+            units = 1 if variable.duration < 1.0 else 2
+            year, total = demand.get(variable.course_id, (variable.year, 0))
+            demand[variable.course_id] = (year, total + units)
+        if not demand:
+            return
+
+        network = MaxFlow()
+        required = sum(units for _, units in demand.values())
+        for course_id, (year, units) in demand.items():
+            network.add_edge('source', ('course', course_id), units)
+            for instructor in self.qualified[course_id]:
+                for day in self.year_days.get(year, []):
+                    # Uncapped middle edges keep the min cut on courses and instructor-days only
+                    network.add_edge(('course', course_id), ('teach', instructor, day), required)
+        for name in network.names:
+            if isinstance(name, tuple) and name[0] == 'teach':
+                _, instructor, day = name
+                network.add_edge(name, 'sink', self.half_slots_per_day[day])
+
+        flow = network.max_flow('source', 'sink')
+        if flow >= required:
+            return
+
+        # The source side of the min cut is the set of courses competing for too few instructors
+        cut = network.reachable_from('source')
+        courses = sorted(name[1] for name in cut if isinstance(name, tuple) and name[0] == 'course')
+        instructors = sorted({name[1] for name in cut if isinstance(name, tuple) and name[0] == 'teach'})
+        needed = sum(demand[course_id][1] for course_id in courses)
+        capacity = sum(self.half_slots_per_day[name[2]] for name in cut
+                       if isinstance(name, tuple) and name[0] == 'teach')
+        self._add(self.errors, 'instructor_capacity',
+                  f"Courses {courses} need {needed / 2:g} instructor-slots but their qualified "
+                  f"instructors {instructors} have only {capacity / 2:g} on the days these years attend",
+                  courses=courses, instructors=instructors, needed=needed / 2, available=capacity / 2,
+                  shortfall=(required - flow) / 2)
@@ -0,0 +1,272 @@
+"""
+Network flow algorithms for timetable CSP
+Max flow (Dinic) used for capacity bounds on the scheduling problem, maximum
+bipartite matching (Hopcroft-Karp) used to assign rooms, and min-cost flow used
+to balance instructor loads
+"""
+
+import heapq
+from collections import deque
+
+
+class MaxFlow:
+    """Dinic max flow over a graph with hashable node names"""
+
+    def __init__(self):
+        self.index = {}   # node name -> node number
+        self.names = []
+        self.graph = []   # node number -> [edge ids]
+        self.to = []
+        self.capacity = []
+
+    def node(self, name):
+        """Return the node number for a name, creating the node if needed"""
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.graph.append([])
+        return self.index[name]
+
+    def add_edge(self, source, target, capacity):
+        """Add a directed edge with a residual back edge"""
+        u, v = self.node(source), self.node(target)
+        self.graph[u].append(len(self.to))
+        self.to.append(v)
+        self.capacity.append(capacity)
+        self.graph[v].append(len(self.to))
+        self.to.append(u)
+        self.capacity.append(0)
+
+    def max_flow(self, source, sink):
+        """Compute the maximum flow value from source to sink"""
+        s, t = self.node(source), self.node(sink)
+        total = 0
+        while True:
+            level = self._levels(s)
+            if level[t] < 0:
+                return total
+            next_edge = [0] * len(self.names)
+            pushed = self._augment(s, t, float('inf'), level, next_edge)
+            while pushed:
+                total += pushed
+                pushed = self._augment(s, t, float('inf'), level, next_edge)
+
+    def reachable_from(self, source):
+        """Names of nodes reachable from source in the residual graph (source side of a min cut)"""
+        s = self.node(source)
+        seen = {s}
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            for edge in self.graph[u]:
+                v = self.to[edge]
+                if self.capacity[edge] > 0 and v not in seen:
+                    seen.add(v)
+                    queue.append(v)
+        return {self.names[u] for u in seen}
+
+    def flow_on(self, source, target):
+        """Flow currently sent along the edges from source to target"""
+        u, v = self.node(source), self.node(target)
+        return sum(self.capacity[edge ^ 1] for edge in self.graph[u]
+                   if self.to[edge] == v and edge % 2 == 0)
+
+    def _levels(self, s):
+        level = [-1] * len(self.names)
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            for edge in self.graph[u]:
+                v = self.to[edge]
+                if self.capacity[edge] > 0 and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level
+
+    def _augment(self, s, t, limit, level, next_edge):
+        """Push one blocking-flow path with an explicit stack (graphs can be deep)"""
+        path = []
+        u = s
+        while True:
+            if u == t:
+                pushed = min(self.capacity[edge] for edge in path) if path else 0
+                pushed = min(pushed, limit)
+                for edge in path:
+                    self.capacity[edge] -= pushed
+                    self.capacity[edge ^ 1] += pushed
+                return pushed
+            edges = self.graph[u]
+            while next_edge[u] < len(edges):
+                edge = edges[next_edge[u]]
+                v = self.to[edge]
+                if self.capacity[edge] > 0 and level[v] == level[u] + 1:
+                    break
+                next_edge[u] += 1
+            if next_edge[u] == len(edges):
+                # Dead end: retreat and skip the edge that led here
+                if not path:
+                    return 0
+                level[u] = -1
+                edge = path.pop()
+                u = self.to[edge ^ 1]
+                next_edge[u] += 1
+                continue
+            edge = edges[next_edge[u]]
+            path.append(edge)
+            u = self.to[edge]
+
+
+def hopcroft_karp(adjacency):
+    """Maximum matching of a bipartite graph given as {left: [right, ...]}; returns {left: right}"""
+    match_left = {left: None for left in adjacency}
+    match_right = {}
+    while True:
+        # BFS from free left vertices builds the layers of shortest augmenting paths
+        distance = {}
+        queue = deque()
+        for left, right in match_left.items():
+            if right is None:
+                distance[left] = 0
+                queue.append(left)
+        found = False
+        while queue:
+            left = queue.popleft()
+            for right in adjacency[left]:
+                partner = match_right.get(right)
+                if partner is None:
+                    found = True
+                elif partner not in distance:
+                    distance[partner] = distance[left] + 1
+                    queue.append(partner)
+        if not found:
+            return {left: right for left, right in match_left.items() if right is not None}
+
+        # DFS along the layers, with an explicit stack of (left, next neighbour index)
+        for root in [left for left, right in match_left.items() if right is None]:
+            stack = [(root, 0)]
+            path = []  # (left, right) edges of the current alternating path
+            while stack:
+                left, index = stack[-1]
+                neighbours = adjacency[left]
+                if index == len(neighbours):
+                    # Dead end: never revisit this vertex in this phase
+                    distance[left] = None
+                    stack.pop()
+                    if path:
+                        path.pop()
+                    continue
+                stack[-1] = (left, index + 1)
+                right = neighbours[index]
+                partner = match_right.get(right)
+                if partner is None:
+                    path.append((left, right))
+                    for path_left, path_right in path:
+                        match_left[path_left] = path_right
+                        match_right[path_right] = path_left
+                    break
+                if distance.get(partner) is not None and distance[partner] == distance[left] + 1:
+                    path.append((left, right))
+                    stack.append((partner, 0))
+
+
+class MinCostFlow:
+    """Successive shortest paths with Johnson potentials; edge costs may be negative (no negative cycles)"""
+
+    def __init__(self):
+        self.index = {}
+        self.names = []
+        self.graph = []
+        self.to = []
+        self.capacity = []
+        self.cost = []
+
+    def node(self, name):
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.graph.append([])
+        return self.index[name]
+
+    def add_edge(self, source, target, capacity, cost):
+        """Add a directed edge; returns its id for flow_of"""
+        u, v = self.node(source), self.node(target)
+        edge = len(self.to)
+        self.graph[u].append(edge)
+        self.to.append(v)
+        self.capacity.append(capacity)
+        self.cost.append(cost)
+        self.graph[v].append(edge + 1)
+        self.to.append(u)
+        self.capacity.append(0)
+        self.cost.append(-cost)
+        return edge
+
+    def flow_of(self, edge):
+        return self.capacity[edge ^ 1]
+
+    def min_cost_flow(self, source, sink, limit=float('inf')):
+        """Send up to `limit` units at minimum cost; returns (flow, cost)"""
+        s, t = self.node(source), self.node(sink)
+        potential = self._bellman_ford(s)
+        flow = cost = 0
+        while flow < limit:
+            distance, previous = self._dijkstra(s, potential)
+            if distance[t] == float('inf'):
+                break
+            for u, d in enumerate(distance):
+                if d < float('inf'):
+                    potential[u] += d
+            pushed = limit - flow
+            v = t
+            while v != s:
+                edge = previous[v]
+                pushed = min(pushed, self.capacity[edge])
+                v = self.to[edge ^ 1]
+            v = t
+            while v != s:
+                edge = previous[v]
+                self.capacity[edge] -= pushed
+                self.capacity[edge ^ 1] += pushed
+                cost += pushed * self.cost[edge]
+                v = self.to[edge ^ 1]
+            flow += pushed
+        return flow, cost
+
+    def _bellman_ford(self, s):
+        """Shortest distances on the initial residual graph, so reduced costs start non-negative"""
+        distance = [float('inf')] * len(self.names)
+        distance[s] = 0
+        queue = deque([s])
+        queued = {s}
+        while queue:
+            u = queue.popleft()
+            queued.discard(u)
+            for edge in self.graph[u]:
+                if self.capacity[edge] > 0 and distance[u] + self.cost[edge] < distance[self.to[edge]]:
+                    v = self.to[edge]
+                    distance[v] = distance[u] + self.cost[edge]
+                    if v not in queued:
+                        queued.add(v)
+                        queue.append(v)
+        return [d if d < float('inf') else 0 for d in distance]
+
+    def _dijkstra(self, s, potential):
+        distance = [float('inf')] * len(self.names)
+        previous = [None] * len(self.names)
+        distance[s] = 0
+        heap = [(0, s)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > distance[u]:
+                continue
+            for edge in self.graph[u]:
+                if self.capacity[edge] <= 0:
+                    continue
+                v = self.to[edge]
+                candidate = d + self.cost[edge] + potential[u] - potential[v]
+                if candidate < distance[v]:
+                    distance[v] = candidate
+                    previous[v] = edge
+                    heapq.heappush(heap, (candidate, v))
+        return distance, previous
@@ -0,0 +1,135 @@
+"""
+Instructor Load Balancing for Timetable CSP
+Reassigns instructors to sessions whose timeslots are already fixed, with a min-cost flow
+that spreads teaching load evenly or towards a target load per instructor role
+"""
+
+import math
+
+from .flow import MinCostFlow
+from .model import Domain
+
+
+def instructor_roles(instructors):
+    """Instructor name -> role from Instructor.csv ('Instructor' when blank)"""
+    return {instructor['name']: (instructor.get('role') or '').strip() or 'Instructor'
+            for instructor in instructors if instructor.get('name')}
+
+
+def check_role_targets(targets, instructors):
+    """Raise ValueError for target loads of roles no instructor has"""
+    roles = set(instructor_roles(instructors).values())
+    unknown = sorted(set(targets or {}) - roles)
+    if unknown:
+        raise ValueError(f"Unknown instructor roles {unknown}; choose from {sorted(roles)}")
+
+
+class InstructorBalancer:
+    """Min-cost flow over sessions -> (instructor, timeslot) -> instructor
+
+    An instructor's load is the number of timeslots they teach in. Each extra timeslot
+    costs more than the previous one (the k-th costs 2k - 1 - 2 * target), so the
+    cheapest flow minimizes the sum of squared distances from the target load; with no
+    target that is the most even spread. Each (instructor, timeslot) node passes one
+    unit, which keeps instructors to one session per timeslot. Two tutorials sharing an
+    instructor and timeslot in the input stay together as one unit, taught by someone
+    qualified for both, so the input assignment is always a feasible flow.
+    """
+
+    def __init__(self, variables, domains, instructors, targets=None):
+        self.variables = variables
+        check_role_targets(targets, instructors)
+        self.roles = instructor_roles(instructors)
+        self.targets = dict(targets or {})
+        # Qualified instructors per session, as left by domain reduction
+        self.qualified = {var_id: {domain.instructor for domain in var_domains}
+                          for var_id, var_domains in domains.items()}
+        self.report = None
+
+    def rebalance(self, assignment):
+        """Same timeslots and rooms with instructors reassigned; fills self.report"""
+        units = self._units(assignment)
+        flow = MinCostFlow()
+        unit_edges = []
+        reachable = {}  # instructor -> slots they could teach in
+        for index, (var_ids, slot) in enumerate(units):
+            flow.add_edge('source', ('unit', index), 1, 0)
+            qualified = set.intersection(*(self.qualified[var_id] for var_id in var_ids))
+            for instructor in sorted(qualified):
+                edge = flow.add_edge(('unit', index), ('slot', instructor, slot), 1, 0)
+                unit_edges.append((index, instructor, edge))
+                reachable.setdefault(instructor, set()).add(slot)
+        for instructor, slots in sorted(reachable.items()):
+            for slot in slots:
+                flow.add_edge(('slot', instructor, slot), ('instructor', instructor), 1, 0)
+            target = self.targets.get(self.roles.get(instructor), 0)
+            for k in range(1, len(slots) + 1):
+                flow.add_edge(('instructor', instructor), 'sink', 1, 2 * k - 1 - 2 * target)
+
+        sent, _ = flow.min_cost_flow('source', 'sink')
+        if sent < len(units):
+            # Cannot happen for a consistent input, which is itself a feasible flow
+            print(f"⚠️ Instructor balancing routed {sent} of {len(units)} sessions; keeping the search's choice")
+            self.report = self._report(assignment, assignment)
+            return assignment
+
+        balanced = {}
+        for index, instructor, edge in unit_edges:
+            if flow.flow_of(edge):
+                var_ids, slot = units[index]
+                for var_id in var_ids:
+                    balanced[var_id] = Domain(assignment[var_id].timeslot, assignment[var_id].room, instructor, slot)
+        self.report = self._report(assignment, balanced)
+        return balanced
+
+    def _units(self, assignment):
+        """(variable ids, slot) per unit of flow"""
+        shared = {}
+        for var_id, domain in assignment.items():
+            if self.variables[var_id].duration < 1.0:
+                shared.setdefault((domain.instructor, domain.slot), []).append(var_id)
+        paired = {}
+        for var_ids in shared.values():
+            if len(var_ids) > 1:
+                for var_id in var_ids:
+                    paired[var_id] = tuple(var_ids)
+
+        units, seen = [], set()
+        for var_id, domain in sorted(assignment.items()):
+            if var_id in seen:
+                continue
+            group = paired.get(var_id, (var_id,))
+            seen.update(group)
+            units.append((group, domain.slot))
+        return units
+
+    def loads(self, assignment):
+        """Timeslots taught per instructor, including qualified instructors who teach none"""
+        slots = {instructor: set() for qualified in self.qualified.values() for instructor in qualified}
+        for domain in assignment.values():
+            slots.setdefault(domain.instructor, set()).add(domain.slot)
+        return {instructor: len(timeslots) for instructor, timeslots in slots.items()}
+
+    def _report(self, before, after):
+        return {
+            'targets': self.targets,
+            'reassigned': sum(1 for var_id, domain in after.items() if before[var_id].instructor != domain.instructor),
+            'before': self._role_stats(self.loads(before)),
+            'after': self._role_stats(self.loads(after))
+        }
+
+    def _role_stats(self, loads):
+        by_role = {}
+        for instructor, load in loads.items():
+            by_role.setdefault(self.roles.get(instructor, 'Instructor'), []).append(load)
+        stats = {}
+        for role, values in sorted(by_role.items()):
+            mean = sum(values) / len(values)
+            stats[role] = {
+                'instructors': len(values),
+                'min': min(values),
+                'max': max(values),
+                'mean': round(mean, 2),
+                'stdev': round(math.sqrt(sum((value - mean) ** 2 for value in values) / len(values)), 2)
+            }
+        return stats
@@ -30,10 +30,12 @@ class Variable:
 class Domain:
     """Represents possible assignments for a variable"""
     
-    def __init__(self, timeslot, room, instructor):
+    def __init__(self, timeslot, room, instructor, slot=None):
         self.timeslot = timeslot
         self.room = room
         self.instructor = instructor
+        # Number of the timeslot in the TimeGrid, which conflict checks key on (the label without one)
+        self.slot = timeslot if slot is None else slot
     
     def __str__(self):
         return f"({self.timeslot}, {self.room}, {self.instructor})"
@@ -50,6 +52,13 @@ class CSPModel:
         self.domains = {}    # variable_id -> [Domain]
         self.assignment = {} # variable_id -> Domain
     
+    def fork(self):
+        """Create a model sharing variables and domains but with its own assignment"""
+        model = CSPModel()
+        model.variables = self.variables
+        model.domains = self.domains
+        return model
+    
     def add_variable(self, variable):
         """Add a variable to the model"""
         self.variables[variable.id] = variable
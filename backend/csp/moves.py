@@ -0,0 +1,203 @@
+"""
+Move Candidates for Timetable CSP
+Where one session of a finished timetable could go instead, found from occupancy indexes
+fast enough to highlight drop targets while a coordinator drags the session
+"""
+
+import time
+
+from .quality import TimetableQuality
+from .violations import ViolationChecker, check_entries, session_id
+
+
+def move_candidates(compiled, timetable, session, swaps=True, limit=None):
+    """Feasible moves (and swaps) of one session of a formatted timetable, best first
+
+    `session` is a variable id ('CSC 111B|4|lab') or an entry naming its course_id,
+    session_type and sections. Raises ValueError when the timetable does not hold it
+    exactly once.
+    """
+    return MoveFinder(compiled, timetable).candidates(session, swaps=swaps, limit=limit)
+
+
+class MoveFinder(ViolationChecker):
+    """New places for sessions of one timetable, ranked by the change in quality score
+
+    The timetable is indexed as ViolationChecker indexes it, then the session to move is
+    taken out of the indexes and each value of its domain is tested against the
+    instructor, room, section and enrolled-student indexes of the value's timeslot (and
+    of the timeslots overlapping it) under the hard constraints' rules: a handful of
+    dictionary lookups per value. A move's cost is how much it changes the timetable's
+    quality score (lower is better); rooms do not enter the score, so it is computed once
+    per timeslot and instructor from TimetableQuality's counts.
+
+    Swaps exchange the session with one in a timeslot it cannot move to on its own:
+    either both keep their rooms or they exchange those too, and both keep their
+    instructors. The indexes are restored afterwards, so one finder serves many sessions.
+    """
+
+    def __init__(self, compiled, timetable):
+        super().__init__(compiled)
+        self.violations = []
+        check_entries(timetable)
+        # Entries need not carry their year, which the quality score needs; the dataset's
+        # sessions give it. Entries of unknown sessions have no sections to score.
+        timetable = [dict(entry, year=self.variables[session_id(entry)].year) for entry in timetable
+                     if session_id(entry) in self.variables]
+        self.entries = self._index(timetable)  # variable id -> [entries]
+        self.section_counts = {}  # slot -> {(year, section): core sessions attended}
+        self.masks = {}           # slot -> StudentConflicts mask of its sessions
+        for slot, var_ids in self.by_slot.items():
+            for var_id in var_ids:
+                self._track_students(var_id, slot, 1)
+        self.quality = TimetableQuality(timetable, self.records, compiled.data['timeslots'])
+        self._values = {}  # variable id -> {(slot, room, instructor)} of its domain
+
+    def candidates(self, session, swaps=True, limit=None):
+        start = time.perf_counter()
+        var_id = session if isinstance(session, str) else session_id(session)
+        entries = self.entries.get(var_id, [])
+        if len(entries) != 1:
+            raise ValueError(f"The timetable has {len(entries)} entries for session {var_id}; moves need exactly one")
+        entry = entries[0]
+        here = (self.time_grid.slots[entry['day_time']], entry['room'], entry['instructor'])
+        base = self.quality.measures()['score']
+
+        self._place(var_id, *here, -1)
+        try:
+            moves, checked = self._moves(var_id, entry, here, base)
+            open_slots = {move['slot'] for move in moves}
+            found = self._swaps(var_id, entry, here, base, open_slots) if swaps else []
+        finally:
+            self._place(var_id, *here, 1)
+
+        by_timeslot = {}
+        for move in moves:
+            best = by_timeslot.setdefault(move['slot'], {'timeslot': move['timeslot'], 'cost': move['cost'], 'moves': 0})
+            best['moves'] += 1
+            best['cost'] = min(best['cost'], move['cost'])
+        for move in moves + found:
+            del move['slot']
+        return {
+            'session': var_id,
+            'current': {'timeslot': entry['day_time'], 'room': entry['room'], 'instructor': entry['instructor']},
+            'score': base,
+            'moves': moves[:limit],
+            'swaps': found[:limit],
+            'timeslots': [by_timeslot[slot] for slot in sorted(by_timeslot)],
+            'stats': {
+                'moves': len(moves),
+                'swaps': len(found),
+                'values_checked': checked,
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+            }
+        }
+
+    # ------------------------------------------------------------------
+    # Candidates
+    # ------------------------------------------------------------------
+
+    def _moves(self, var_id, entry, here, base):
+        costs = {}  # (slot, instructor) -> change in score
+        moves = []
+        domains = self.compiled.model.domains[var_id]
+        for domain in domains:
+            value = (domain.slot, domain.room, domain.instructor)
+            if value == here or not self._fits(var_id, *value):
+                continue
+            key = (domain.slot, domain.instructor)
+            if key not in costs:
+                moved = dict(entry, day_time=domain.timeslot, instructor=domain.instructor)
+                costs[key] = round(self.quality.score_with([entry], [moved]) - base, 2)
+            moves.append({'timeslot': domain.timeslot, 'room': domain.room, 'instructor': domain.instructor,
+                          'cost': costs[key], 'slot': domain.slot})
+        moves.sort(key=lambda move: (move['cost'], move['slot'], move['room'], move['instructor']))
+        return moves, len(domains)
+
+    def _swaps(self, var_id, entry, here, base, open_slots):
+        slot, room, instructor = here
+        swaps = []
+        for other_id, other_entries in self.entries.items():
+            if other_id == var_id or len(other_entries) != 1:
+                continue
+            other_entry = other_entries[0]
+            other_slot = self.time_grid.slots[other_entry['day_time']]
+            if other_slot == slot or other_slot in open_slots:
+                continue
+            other_room, other_instructor = other_entry['room'], other_entry['instructor']
+            for new_room, other_new_room in {(room, other_room), (other_room, room)}:
+                mine = (other_slot, new_room, instructor)
+                theirs = (slot, other_new_room, other_instructor)
+                if mine not in self._domain_values(var_id):
+                    continue
+                self._place(other_id, other_slot, other_room, other_instructor, -1)
+                try:
+                    if not self._fits(var_id, *mine) or theirs not in self._domain_values(other_id):
+                        continue
+                    self._place(var_id, *mine, 1)
+                    fits = self._fits(other_id, *theirs)
+                    self._place(var_id, *mine, -1)
+                finally:
+                    self._place(other_id, other_slot, other_room, other_instructor, 1)
+                if not fits:
+                    continue
+                moved = [dict(entry, day_time=other_entry['day_time'], room=new_room),
+                         dict(other_entry, day_time=entry['day_time'], room=other_new_room)]
+                cost = round(self.quality.score_with([entry, other_entry], moved) - base, 2)
+                swaps.append({'with': other_id, 'timeslot': other_entry['day_time'], 'room': new_room,
+                              'other': {'timeslot': entry['day_time'], 'room': other_new_room},
+                              'cost': cost, 'slot': other_slot})
+        swaps.sort(key=lambda swap: (swap['cost'], swap['slot'], swap['with'], swap['room']))
+        return swaps
+
+    def _domain_values(self, var_id):
+        values = self._values.get(var_id)
+        if values is None:
+            values = self._values[var_id] = {(domain.slot, domain.room, domain.instructor)
+                                             for domain in self.compiled.model.domains[var_id]}
+        return values
+
+    # ------------------------------------------------------------------
+    # Occupancy
+    # ------------------------------------------------------------------
+
+    def _fits(self, var_id, slot, room, instructor):
+        """Whether the session can take the value alongside everything indexed"""
+        teaching = self.by_instructor.get((instructor, slot))
+        if teaching and self._instructor_clash(instructor, slot, teaching + [var_id]):
+            return False
+        in_room = self.by_room.get((room, slot), [])
+        if in_room and self._room_clash(room, slot, in_room + [var_id]):
+            return False
+        if self._capacity_problem(room, in_room + [var_id]) or not self._students_free(var_id, slot):
+            return False
+        for other in self.time_grid.overlapping[slot]:
+            if self.by_instructor.get((instructor, other)) or self.by_room.get((room, other)) \
+                    or not self._students_free(var_id, other):
+                return False
+        return True
+
+    def _students_free(self, var_id, slot):
+        attending = self.section_counts.get(slot)
+        if attending and any(key in attending for key in self.occupies[var_id]):
+            return False
+        return self.student_conflicts is None or not self.student_conflicts.clashes(var_id, self.masks.get(slot, 0))
+
+    def _place(self, var_id, slot, room, instructor, delta):
+        """Add (delta 1) or remove (delta -1) a session's value from the indexes"""
+        for index, key in ((self.by_instructor, (instructor, slot)), (self.by_room, (room, slot)),
+                           (self.by_slot, slot)):
+            if delta > 0:
+                index.setdefault(key, []).append(var_id)
+            else:
+                index[key].remove(var_id)
+        self._track_students(var_id, slot, delta)
+
+    def _track_students(self, var_id, slot, delta):
+        attending = self.section_counts.setdefault(slot, {})
+        for key in self.occupies[var_id]:
+            attending[key] = attending.get(key, 0) + delta
+            if not attending[key]:
+                del attending[key]
+        if self.student_conflicts is not None:
+            self.masks[slot] = self.masks.get(slot, 0) ^ self.student_conflicts.bits[var_id]
@@ -0,0 +1,242 @@
+"""
+Search observers for timetable CSP
+Callbacks on solver events, with built-in profiling, memory and search-tree observers
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+
+
+# tracemalloc is process-wide: concurrent memory observers share one tracing session
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def _start_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        # Leave tracing running if it was started outside the observers
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+class SolverObserver:
+    """Base class for solver observers; override the callbacks you need
+
+    Depth is the number of variables assigned before the event. The solver only
+    calls observers when at least one is registered.
+    """
+
+    name = 'observer'
+
+    def on_start(self, solver):
+        pass
+
+    def on_assign(self, variable_id, domain, depth):
+        pass
+
+    def on_backtrack(self, variable_id, domain, depth):
+        pass
+
+    def on_constraint_reject(self, variable_id, domain, depth):
+        pass
+
+    def on_solution(self, assignment):
+        pass
+
+    def on_finish(self, solver, solution):
+        pass
+
+    def report(self):
+        """JSON-serialisable summary returned to the caller after the solve"""
+        return {}
+
+
+class ProfilingObserver(SolverObserver):
+    """cProfile over the whole search; reports the most expensive functions"""
+
+    name = 'cprofile'
+
+    def __init__(self, limit=25, sort='cumulative'):
+        self.limit = limit
+        self.sort = sort
+        self.profiler = cProfile.Profile()
+        self.error = None
+        self.active = False
+
+    def on_start(self, solver):
+        try:
+            self.profiler.enable()
+            self.active = True
+        except ValueError as e:
+            # Only one profiler may run per thread (or per process on newer Pythons)
+            self.error = str(e)
+
+    def on_finish(self, solver, solution):
+        if self.active:
+            self.profiler.disable()
+            self.active = False
+
+    def report(self):
+        if self.error:
+            return {'error': self.error}
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        stats.sort_stats(self.sort)
+        functions = []
+        for (filename, line, function) in stats.fcn_list[:self.limit]:
+            calls, primitive_calls, total_time, cumulative_time, _ = stats.stats[(filename, line, function)]
+            functions.append({
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'primitive_calls': primitive_calls,
+                'total_s': round(total_time, 4),
+                'cumulative_s': round(cumulative_time, 4)
+            })
+        return {'total_s': round(stats.total_tt, 4), 'sort': self.sort, 'functions': functions}
+
+
+class MemoryObserver(SolverObserver):
+    """tracemalloc snapshots at the start, every `interval` assignments and at the end"""
+
+    name = 'tracemalloc'
+
+    def __init__(self, interval=1000, limit=15):
+        self.interval = interval
+        self.limit = limit
+        self.snapshots = []  # (label, snapshot)
+        self.samples = []
+        self.assignments = 0
+        self.peak_kb = None
+        self.tracing = False
+
+    def on_start(self, solver):
+        _start_tracing()
+        self.tracing = True
+        # The peak is shared with concurrent solves, so it is an upper bound for this one
+        tracemalloc.reset_peak()
+        self._snapshot('start', 0)
+
+    def on_assign(self, variable_id, domain, depth):
+        self.assignments += 1
+        if self.interval and self.assignments % self.interval == 0:
+            self._snapshot(f'assignment {self.assignments}', depth + 1)
+
+    def on_finish(self, solver, solution):
+        if not self.tracing:
+            return
+        self._snapshot('finish', len(solver.model.assignment))
+        self.peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        _stop_tracing()
+        self.tracing = False
+
+    def _snapshot(self, label, depth):
+        current, peak = tracemalloc.get_traced_memory()
+        self.samples.append({'label': label, 'depth': depth, 'current_kb': round(current / 1024, 1),
+                             'peak_kb': round(peak / 1024, 1)})
+        self.snapshots.append((label, tracemalloc.take_snapshot()))
+
+    def report(self):
+        if len(self.snapshots) < 2:
+            return {'samples': self.samples}
+        first, last = self.snapshots[0][1], self.snapshots[-1][1]
+        growth = []
+        for stat in last.compare_to(first, 'lineno')[:self.limit]:
+            frame = stat.traceback[0]
+            growth.append({'location': f"{frame.filename}:{frame.lineno}",
+                           'size_diff_kb': round(stat.size_diff / 1024, 1),
+                           'count_diff': stat.count_diff})
+        return {'peak_kb': self.peak_kb, 'samples': self.samples, 'growth': growth}
+
+
+class DepthHistogramObserver(SolverObserver):
+    """Assignments, backtracks and rejected values per search depth"""
+
+    name = 'depth'
+
+    def __init__(self):
+        self.assignments = {}
+        self.backtracks = {}
+        self.rejects = {}
+        self.max_depth = 0
+
+    def on_assign(self, variable_id, domain, depth):
+        self.assignments[depth] = self.assignments.get(depth, 0) + 1
+        if depth + 1 > self.max_depth:
+            self.max_depth = depth + 1
+
+    def on_backtrack(self, variable_id, domain, depth):
+        self.backtracks[depth] = self.backtracks.get(depth, 0) + 1
+
+    def on_constraint_reject(self, variable_id, domain, depth):
+        self.rejects[depth] = self.rejects.get(depth, 0) + 1
+
+    def report(self):
+        depths = sorted(set(self.assignments) | set(self.backtracks) | set(self.rejects))
+        return {
+            'max_depth': self.max_depth,
+            'histogram': [{'depth': depth,
+                           'assignments': self.assignments.get(depth, 0),
+                           'backtracks': self.backtracks.get(depth, 0),
+                           'rejects': self.rejects.get(depth, 0)} for depth in depths]
+        }
+
+
+class ProgressObserver(SolverObserver):
+    """Console progress every `every` search nodes, as the solver used to print unconditionally"""
+
+    name = 'progress'
+
+    def __init__(self, every=1000):
+        self.every = every
+        self.solver = None
+        self.last_reported = 0
+        self.started = None
+
+    def on_start(self, solver):
+        self.solver = solver
+        self.started = time.time()
+
+    def on_assign(self, variable_id, domain, depth):
+        nodes = self.solver.iterations
+        if nodes - self.last_reported >= self.every:
+            self.last_reported = nodes
+            print(f"🔍 Iteration {nodes}, assigned: {depth + 1}/{len(self.solver.model.variables)} "
+                  f"({time.time() - self.started:.1f}s)")
+            self.solver._print_course_completion_status()
+
+
+# Observers that can be switched on by name, e.g. per API request
+OBSERVERS = {
+    ProfilingObserver.name: ProfilingObserver,
+    MemoryObserver.name: MemoryObserver,
+    DepthHistogramObserver.name: DepthHistogramObserver,
+    ProgressObserver.name: ProgressObserver,
+}
+
+
+def create_observers(names):
+    """Instantiate built-in observers from a list of names; unknown names raise ValueError"""
+    unknown = [name for name in names if name not in OBSERVERS]
+    if unknown:
+        raise ValueError(f"Unknown profilers {unknown}; choose from {sorted(OBSERVERS)}")
+    return [OBSERVERS[name]() for name in dict.fromkeys(names)]
+
+
+def observer_reports(observers):
+    return {observer.name: observer.report() for observer in observers}
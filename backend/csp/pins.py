@@ -0,0 +1,212 @@
+"""
+Pinned Assignments for Timetable CSP
+Restricts sessions fixed by policy to their pinned timeslot, day, room or instructor and
+propagates the restriction to the sessions they exclude, before any search starts
+"""
+
+import time
+
+from .csp_solver import CompiledModel
+from .feasibility import InfeasibleProblemError, SECTION_STUDENTS
+from .model import CSPModel
+
+
+# Pin fields that restrict a session's domain; any subset may be given
+PIN_FIELDS = ('day', 'start_time', 'room', 'instructor')
+
+
+class PinConflictError(InfeasibleProblemError):
+    """Raised before searching when pins are malformed, unsatisfiable or exclude each other"""
+
+    def __init__(self, report):
+        self.report = report
+        messages = [error['message'] for error in report.get('errors', [])]
+        Exception.__init__(self, "Pinned assignments conflict: " + "; ".join(messages[:3]) +
+                           (f" (and {len(messages) - 3} more)" if len(messages) > 3 else ""))
+
+
+def parse_pins(rows):
+    """Pins from pins.csv rows or API objects, with blank fields dropped
+
+    A 'timeslot' (or 'day_time', as in a generated timetable) such as 'Monday 9:00 AM'
+    stands for day and start_time, so rows of a saved timetable can be pinned as they are.
+    """
+    pins = []
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError("Each pin must be an object with a course_id")
+        row = {key: str(value).strip() for key, value in row.items() if value is not None and str(value).strip()}
+        timeslot = row.pop('timeslot', None) or row.pop('day_time', None)
+        if timeslot:
+            day, _, start_time = timeslot.partition(' ')
+            row.setdefault('day', day)
+            if start_time:
+                row.setdefault('start_time', start_time)
+        pins.append({key: row[key] for key in ('course_id', 'sections') + PIN_FIELDS if key in row})
+    return pins
+
+
+def describe_pin(pin):
+    fields = ', '.join(f"{field}={pin[field]}" for field in PIN_FIELDS if field in pin)
+    return f"{pin.get('course_id', '?')} {pin.get('sections', '(all sessions)')} [{fields}]"
+
+
+class PinPropagator:
+    """Applies pins to a compiled model and propagates them to a fixpoint
+
+    A session whose remaining values all share one timeslot keeps its students busy
+    then; if they also share an instructor or room, that instructor or room is taken as
+    the hard constraints count it (a full session excludes everything, a tutorial only
+    full sessions, or other tutorials in a room too small for two). Values of other
+    sessions that clash are removed, which can fix further sessions in turn.
+    """
+
+    def __init__(self, compiled):
+        self.base = compiled
+        self.records = compiled.records()
+        self.occupies = compiled.occupied_sections()
+        self.student_conflicts = compiled.student_conflicts()
+        self.report = None
+
+    def apply(self, pins):
+        """CompiledModel with pinned and propagated domains; raises PinConflictError"""
+        started = time.perf_counter()
+        base = self.base
+        variables = base.model.variables
+        domains = dict(base.model.domains)  # untouched lists stay shared with the base
+        errors = []
+        origins = {}  # variable id -> pin numbers its restriction comes from
+
+        for number, pin in enumerate(pins, 1):
+            matched = self._match(number, pin, errors)
+            for var_id in matched:
+                kept = [domain for domain in domains[var_id] if self._allows(pin, domain)]
+                if not kept:
+                    errors.append(self._unsatisfiable(number, pin, var_id, domains[var_id]))
+                domains[var_id] = kept
+                origins.setdefault(var_id, set()).add(number)
+        pinned = set(origins)
+        values_pinned = sum(len(domains[var_id]) for var_id in pinned)
+
+        propagated = self._propagate(domains, origins, errors) if not errors else 0
+
+        fixed = {var_id: var_domains[0] for var_id, var_domains in domains.items() if len(var_domains) == 1}
+        if not errors and not base.constraint_manager.check_hard_constraints(fixed):
+            failed = [name for name, ok, _ in base.constraint_manager.diagnose_assignment(fixed) if not ok]
+            errors.append({'check': 'pin_conflict',
+                           'message': f"Fixed sessions together break {', '.join(failed)}",
+                           'details': {'constraints': failed}})
+
+        self.report = {
+            'feasible': not errors,
+            'errors': errors,
+            'warnings': [],
+            'stats': {
+                'pins': len(pins),
+                'sessions_pinned': len(pinned),
+                'sessions_fixed': len(fixed),
+                'values_pinned': values_pinned,
+                'sessions_propagated': propagated,
+                'values_before': sum(len(var_domains) for var_domains in base.model.domains.values()),
+                'values_after': sum(len(var_domains) for var_domains in domains.values()),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+        }
+        if errors:
+            raise PinConflictError(self.report)
+
+        model = CSPModel()
+        model.variables = variables
+        model.domains = domains
+        return CompiledModel(base.data, model, base.constraint_manager, base.feasibility)
+
+    def _match(self, number, pin, errors):
+        course_id, sections = pin.get('course_id'), pin.get('sections')
+        if not course_id:
+            errors.append({'check': 'pin_malformed', 'message': f"Pin {number} has no course_id", 'details': {'pin': pin}})
+            return []
+        if not any(field in pin for field in PIN_FIELDS):
+            errors.append({'check': 'pin_malformed',
+                           'message': f"Pin {number} ({describe_pin(pin)}) pins none of {list(PIN_FIELDS)}",
+                           'details': {'pin': pin}})
+            return []
+        matched = [var_id for var_id, variable in self.base.model.variables.items()
+                   if variable.course_id == course_id and (sections is None or sections == (
+                       f"Group {variable.group_id}" if variable.group_id else f"Section {variable.section_id}"))]
+        if not matched:
+            errors.append({'check': 'pin_unknown_session',
+                           'message': f"Pin {number} ({describe_pin(pin)}) matches no session",
+                           'details': {'pin': pin}})
+        return matched
+
+    @staticmethod
+    def _allows(pin, domain):
+        day, _, start_time = domain.timeslot.partition(' ')
+        return (pin.get('day', day) == day and pin.get('start_time', start_time) == start_time
+                and pin.get('room', domain.room) == domain.room
+                and pin.get('instructor', domain.instructor) == domain.instructor)
+
+    def _unsatisfiable(self, number, pin, var_id, var_domains):
+        # Name the pinned fields that no value of the session allows on their own
+        reasons = [f"{field} {pin[field]}" for field in PIN_FIELDS
+                   if field in pin and not any(self._allows({field: pin[field]}, domain) for domain in var_domains)]
+        why = f"it cannot use {' or '.join(reasons)}" if reasons else "no value has every pinned field"
+        return {'check': 'pin_unsatisfiable',
+                'message': f"Pin {number} cannot hold for {var_id}: {why}",
+                'details': {'pin': pin, 'session': var_id, 'fields': reasons}}
+
+    def _propagate(self, domains, origins, errors):
+        """Prune values clashing with sessions fixed to one timeslot; returns sessions pruned"""
+        variables = self.base.model.variables
+        queue = list(origins)
+        processed = {}  # variable id -> (slot, instructor, room) it last pruned with
+        pruned = set()
+        while queue:
+            var_id = queue.pop()
+            fixed = self._fixed(domains[var_id])
+            if fixed is None or processed.get(var_id) == fixed:
+                continue
+            processed[var_id] = fixed
+            slot, instructor, room = fixed
+            full = variables[var_id].duration >= 1.0
+            students = self.occupies[var_id]
+            for other_id, other_domains in domains.items():
+                if other_id == var_id or not other_domains:
+                    continue
+                other_full = variables[other_id].duration >= 1.0
+                shares_students = bool(students & self.occupies[other_id]) or (
+                    self.student_conflicts is not None and self.student_conflicts.shares(var_id, other_id))
+                kept = [domain for domain in other_domains if not (domain.slot == slot and (
+                    shares_students
+                    or (domain.instructor == instructor and (full or other_full))
+                    or (domain.room == room and (full or other_full
+                                                 or self.records.room_capacity(room) < 2 * SECTION_STUDENTS))))]
+                if len(kept) == len(other_domains):
+                    continue
+                domains[other_id] = kept
+                pruned.add(other_id)
+                origins.setdefault(other_id, set()).update(origins[var_id])
+                if not kept:
+                    pins = sorted(origins[other_id])
+                    errors.append({'check': 'pin_excludes_session',
+                                   'message': f"Pins {pins} leave no timeslot, room and instructor for {other_id}",
+                                   'details': {'pins': pins, 'session': other_id}})
+                else:
+                    queue.append(other_id)
+        return len(pruned)
+
+    @staticmethod
+    def _fixed(var_domains):
+        """(slot, instructor or None, room or None) shared by every value, or None"""
+        if not var_domains:
+            return None
+        first = var_domains[0]
+        slot, instructor, room = first.slot, first.instructor, first.room
+        for domain in var_domains:
+            if domain.slot != slot:
+                return None
+            if instructor is not None and domain.instructor != instructor:
+                instructor = None
+            if room is not None and domain.room != room:
+                room = None
+        return slot, instructor, room
@@ -0,0 +1,102 @@
+"""
+Timetable Quality for Timetable CSP
+Soft measures of a finished timetable, combined into one score for comparing timetables
+"""
+
+import math
+
+
+# Score weights; the score is a penalty, so lower is better
+QUALITY_WEIGHTS = {
+    'section_idle_slots': 1.0,     # empty timeslots between a section's first and last session of a day
+    'instructor_load_stdev': 10.0,  # spread of timeslots taught per instructor
+    'timeslot_load_stdev': 5.0      # spread of sessions per timeslot
+}
+
+
+def _stdev(values):
+    if not values:
+        return 0.0
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+
+
+def timetable_quality(timetable, records, timeslots):
+    """Quality measures of a formatted timetable and their weighted `score`"""
+    return TimetableQuality(timetable, records, timeslots).measures()
+
+
+class TimetableQuality:
+    """Quality measures of a formatted timetable, kept as counts that entries update
+
+    `add` and `remove` change the counts by one entry, so the score of a timetable with
+    a few sessions moved (`score_with`) costs time in the number of sections, instructors
+    and timeslots rather than in the number of entries. `records` are the dataset's
+    Records, whose sections say which group each section belongs to.
+    """
+
+    def __init__(self, timetable, records, timeslots):
+        self.labels = [f"{timeslot['Day']} {timeslot['StartTime']}" for timeslot in timeslots]
+        self.position = {}  # timeslot label -> (day, index within the day)
+        per_day = {}
+        for label, timeslot in zip(self.labels, timeslots):
+            day = timeslot['Day']
+            self.position[label] = (day, per_day.get(day, 0))
+            per_day[day] = per_day.get(day, 0) + 1
+        self.group_sections = {key: [section for _, section in members]  # (year, group) -> section numbers
+                               for key, members in records.group_sections.items()}
+
+        self.busy = {}  # (year, section, day) -> {index within the day: sessions}
+        self.instructor_slots = {}  # instructor -> {timeslot label: sessions}
+        self.slot_load = {label: 0 for label in self.labels}
+        for entry in timetable:
+            self.add(entry)
+
+    def add(self, entry, delta=1):
+        slot = entry['day_time']
+        if slot in self.position:
+            self.slot_load[slot] += delta
+        else:
+            _count(self.slot_load, slot, delta)
+        _count(self.instructor_slots.setdefault(entry['instructor'], {}), slot, delta)
+        if slot not in self.position:
+            return
+        kind, _, number = entry['sections'].partition(' ')
+        year = int(entry['year'])
+        members = self.group_sections.get((year, int(number)), []) if kind == 'Group' else [int(number)]
+        day, index = self.position[slot]
+        for section in members:
+            _count(self.busy.setdefault((year, section, day), {}), index, delta)
+
+    def remove(self, entry):
+        self.add(entry, -1)
+
+    def measures(self):
+        idle = sum(max(indexes) - min(indexes) + 1 - len(indexes) for indexes in self.busy.values() if indexes)
+        measures = {
+            'section_idle_slots': idle,
+            'instructor_load_stdev': round(_stdev([len(slots) for slots in self.instructor_slots.values()
+                                                   if slots]), 3),
+            'timeslot_load_stdev': round(_stdev(list(self.slot_load.values())), 3)
+        }
+        measures['score'] = round(sum(QUALITY_WEIGHTS[name] * value for name, value in measures.items()), 2)
+        return measures
+
+    def score_with(self, removed, added):
+        """Score after replacing the `removed` entries by the `added` ones, counts unchanged"""
+        for entry in removed:
+            self.remove(entry)
+        for entry in added:
+            self.add(entry)
+        score = self.measures()['score']
+        for entry in added:
+            self.remove(entry)
+        for entry in removed:
+            self.add(entry)
+        return score
+
+
+def _count(counts, key, delta):
+    counts[key] = counts.get(key, 0) + delta
+    if not counts[key]:
+        del counts[key]
@@ -0,0 +1,234 @@
+"""
+Typed Records for Timetable CSP
+Parses and normalises each input table once into slotted records, with lookups the model,
+constraints and feasibility analysis share; schema errors name their file and row
+"""
+
+import re
+from collections import namedtuple
+
+
+# Session types a course may have; each becomes one kind of CSP variable
+SESSION_TYPES = ('lecture', 'lab', 'tutorial', 'project')
+
+# Room types the domains offer to lab sessions and to every other session type
+LAB_DOMAIN_ROOM_TYPES = ('lab',)
+CLASS_DOMAIN_ROOM_TYPES = ('lecture', 'classroom', 'tutorial')
+
+# Capacity assumed for rooms whose capacity is left blank
+DEFAULT_ROOM_CAPACITY = 15
+
+
+class SchemaError(ValueError):
+    """A row that does not fit its table's schema"""
+
+    def __init__(self, table, row, message):
+        self.table = table
+        self.row = row  # line in the CSV file; the header is row 1
+        super().__init__(f"{table} row {row}: {message}")
+
+
+class Course(namedtuple('Course', ['course_id', 'name', 'type', 'year', 'base_course'])):
+    """A course component; `type` is one of SESSION_TYPES"""
+    __slots__ = ()
+
+
+class Section(namedtuple('Section', ['section', 'group', 'year', 'students'])):
+    __slots__ = ()
+
+
+class Instructor(namedtuple('Instructor', ['name', 'role', 'qualifications'])):
+    """`qualifications` is a frozenset of course ids"""
+    __slots__ = ()
+
+
+class Room(namedtuple('Room', ['room_id', 'type', 'capacity'])):
+    """`type` is lower case"""
+    __slots__ = ()
+
+
+class Enrollment(namedtuple('Enrollment', ['student', 'year', 'section', 'course_id'])):
+    """A student of a section taking an elective; `course_id` names the course or a component
+
+    `student` may equally name a cohort, students who all take the same electives.
+    """
+    __slots__ = ()
+
+
+def _text(table, number, row, *names, required=True):
+    for name in names:
+        value = row.get(name)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    if required:
+        raise SchemaError(table, number, f"'{names[0]}' is missing")
+    return ''
+
+
+def _whole(table, number, row, *names, default=None, minimum=0):
+    text = _text(table, number, row, *names, required=default is None)
+    if not text:
+        return default
+    try:
+        value = int(text)
+    except ValueError:
+        raise SchemaError(table, number, f"'{names[0]}' must be a whole number, got '{text}'")
+    if value < minimum:
+        raise SchemaError(table, number, f"'{names[0]}' must be at least {minimum}, got {value}")
+    return value
+
+
+def base_course_of(course_id):
+    """'CSC 111L', 'CSC 111B' and 'CSC 111T' share the base course 'CSC 111'"""
+    match = re.match(r'^([A-Z]{3}\s+\d{3})[LBT]?$', course_id)
+    return match.group(1) if match else course_id
+
+
+def parse_courses(rows):
+    courses = []
+    for number, row in enumerate(rows, 2):
+        course_id = _text('courses.csv', number, row, 'course_id')
+        course_type = _text('courses.csv', number, row, 'type').lower()
+        if course_type not in SESSION_TYPES:
+            raise SchemaError('courses.csv', number, f"type must be one of {list(SESSION_TYPES)}, got '{course_type}'")
+        courses.append(Course(course_id, _text('courses.csv', number, row, 'course', required=False), course_type,
+                              _whole('courses.csv', number, row, 'Year', 'year', minimum=1),
+                              base_course_of(course_id)))
+    return tuple(courses)
+
+
+def parse_sections(rows):
+    sections = []
+    for number, row in enumerate(rows, 2):
+        sections.append(Section(_whole('sections.csv', number, row, 'section', minimum=1),
+                                _whole('sections.csv', number, row, 'group', minimum=1),
+                                _whole('sections.csv', number, row, 'year', minimum=1),
+                                _whole('sections.csv', number, row, 'student', default=0)))
+    return tuple(sections)
+
+
+def parse_instructors(rows):
+    instructors = []
+    for number, row in enumerate(rows, 2):
+        qualifications = _text('instructors.csv', number, row, 'qualifications', required=False)
+        instructors.append(Instructor(_text('instructors.csv', number, row, 'name'),
+                                      _text('instructors.csv', number, row, 'role', required=False) or 'Instructor',
+                                      frozenset(q.strip() for q in qualifications.split(',') if q.strip())))
+    return tuple(instructors)
+
+
+def parse_enrollments(rows):
+    enrollments = []
+    for number, row in enumerate(rows, 2):
+        enrollments.append(Enrollment(_text('enrollments.csv', number, row, 'student', 'cohort'),
+                                      _whole('enrollments.csv', number, row, 'year', 'Year', minimum=1),
+                                      _whole('enrollments.csv', number, row, 'section', minimum=1),
+                                      _text('enrollments.csv', number, row, 'course_id')))
+    return tuple(enrollments)
+
+
+def parse_rooms(rows):
+    rooms = []
+    for number, row in enumerate(rows, 2):
+        rooms.append(Room(_text('rooms.csv', number, row, 'room_id'),
+                          _text('rooms.csv', number, row, 'type', required=False).lower(),
+                          _whole('rooms.csv', number, row, 'capacity', default=DEFAULT_ROOM_CAPACITY)))
+    return tuple(rooms)
+
+
+class Records:
+    """A dataset's courses, sections, instructors and rooms as typed records, with lookups
+
+    Built once per compile from the row dicts in `data`; `replace` re-parses only the
+    tables a scenario changes. Courses anyone enrolls in are electives: only the sections
+    and students enrolled attend them, where every section of a year attends the others.
+    """
+
+    PARSERS = {
+        'courses': parse_courses,
+        'sections': parse_sections,
+        'instructors': parse_instructors,
+        'rooms': parse_rooms,
+        'enrollments': parse_enrollments,
+    }
+
+    def __init__(self, courses, sections, instructors, rooms, enrollments=()):
+        self.courses = courses
+        self.sections = sections
+        self.instructors = instructors
+        self.rooms = rooms
+        self.enrollments = enrollments
+
+        self.course_lookup = {course.course_id: course for course in courses}
+        self.course_groups = {}  # base course -> its components, in file order
+        for course in courses:
+            self.course_groups.setdefault(course.base_course, []).append(course)
+
+        self.year_structure = {}  # year -> group -> [section numbers]
+        self.section_to_group = {}  # (year, section) -> group
+        self.group_sections = {}  # (year, group) -> [(year, section)]
+        for section in sections:
+            self.year_structure.setdefault(section.year, {}).setdefault(section.group, []).append(section.section)
+            self.section_to_group[(section.year, section.section)] = section.group
+            self.group_sections.setdefault((section.year, section.group), []).append((section.year, section.section))
+
+        self.qualifications = {}  # instructor name -> course ids; later rows win
+        self.qualified = {}  # course id -> instructor names, in file order
+        for instructor in instructors:
+            self.qualifications[instructor.name] = instructor.qualifications
+            for course_id in instructor.qualifications:
+                self.qualified.setdefault(course_id, []).append(instructor.name)
+
+        # Later rows win, as in every room_id -> room lookup before records existed
+        self.room_lookup = {room.room_id: room for room in rooms}
+        self.domain_rooms = {  # 'lab' or 'class' -> room ids the domains offer, in file order
+            'lab': [room_id for room_id, room in self.room_lookup.items() if room.type in LAB_DOMAIN_ROOM_TYPES],
+            'class': [room_id for room_id, room in self.room_lookup.items() if room.type in CLASS_DOMAIN_ROOM_TYPES],
+        }
+
+        self.electives = {}  # base course -> {(year, section) with students enrolled}
+        homes = {}  # student -> (year, section)
+        taking = {}  # student -> base courses
+        for number, enrollment in enumerate(enrollments, 2):
+            home = (enrollment.year, enrollment.section)
+            base_course = base_course_of(enrollment.course_id)
+            if base_course not in self.course_groups:
+                raise SchemaError('enrollments.csv', number, f"unknown course '{enrollment.course_id}'")
+            if home not in self.section_to_group:
+                raise SchemaError('enrollments.csv', number, f"year {home[0]} has no section {home[1]}")
+            course_year = self.course_groups[base_course][0].year
+            if course_year != enrollment.year:
+                raise SchemaError('enrollments.csv', number, f"{base_course} is a year {course_year} course")
+            if homes.setdefault(enrollment.student, home) != home:
+                raise SchemaError('enrollments.csv', number, f"{enrollment.student} is in year "
+                                  f"{homes[enrollment.student][0]} section {homes[enrollment.student][1]} on an earlier row")
+            self.electives.setdefault(base_course, set()).add(home)
+            taking.setdefault(enrollment.student, set()).add(base_course)
+
+        # Students of a section taking the same electives attend the same sessions
+        self.cohorts = {}  # (year, section, frozenset of base courses) -> [students]
+        for student, home in homes.items():
+            self.cohorts.setdefault(home + (frozenset(taking[student]),), []).append(student)
+
+    @classmethod
+    def parse(cls, data):
+        """Records of data's tables; raises SchemaError for the first bad row"""
+        return cls(**{table: parse(data.get(table) or []) for table, parse in cls.PARSERS.items()})
+
+    def replace(self, **tables):
+        """Records with the given tables' rows re-parsed and the others kept"""
+        current = {table: getattr(self, table) for table in self.PARSERS}
+        current.update({table: self.PARSERS[table](rows) for table, rows in tables.items()})
+        return Records(**current)
+
+    def attends(self, base_course, sections):
+        """Whether any of the (year, section) keys attend a course's sessions"""
+        enrolled = self.electives.get(base_course)
+        return enrolled is None or not enrolled.isdisjoint(sections)
+
+    def room_capacity(self, room_id):
+        room = self.room_lookup.get(room_id)
+        return room.capacity if room is not None else DEFAULT_ROOM_CAPACITY
+
+    def rooms_for(self, session_type):
+        return self.domain_rooms['lab' if session_type == 'lab' else 'class']
@@ -0,0 +1,286 @@
+"""
+What-if Scenarios for Timetable CSP
+Applies deltas (remove a room, add an instructor or qualification, move a rest day) to a
+compiled model and solves the resulting scenarios in parallel worker processes
+"""
+
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .csp_solver import CompiledModel, TimetableSolver
+from .feasibility import InfeasibleProblemError
+from .model import CSPModel
+from .pins import PinPropagator, parse_pins
+from .quality import timetable_quality
+
+
+WEEKDAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday']
+
+# Delta type -> required fields
+DELTA_TYPES = {
+    'remove_room': ('room',),
+    'remove_instructor': ('instructor',),
+    'add_instructor': ('name', 'qualifications'),
+    'add_qualification': ('instructor', 'course'),
+    'move_rest_day': ('year', 'day'),
+}
+
+
+def _qualifications(instructor):
+    return [q.strip() for q in (instructor.get('qualifications') or '').split(',') if q.strip()]
+
+
+def apply_deltas(base, deltas):
+    """Scenario CompiledModel derived from `base` without recompiling it
+
+    Variables and untouched domain lists are shared with `base`; sessions whose domains a
+    delta changes are rebuilt and reduced on their own. Bad deltas raise ValueError.
+    """
+    data = dict(base.data)
+    rooms = list(data['rooms'])
+    instructors = list(data['instructors'])
+    records = base.records()
+    course_ids = set(records.course_lookup)
+    years = set(records.year_structure)
+    rest_days = dict(data.get('rest_days', {}))
+    removed_rooms, removed_instructors = set(), set()
+    rebuilt_courses, rebuilt_years = set(), set()
+
+    for number, delta in enumerate(deltas, 1):
+        kind = delta.get('type')
+        if kind not in DELTA_TYPES:
+            raise ValueError(f"Delta {number}: unknown type '{kind}'; choose from {sorted(DELTA_TYPES)}")
+        missing = [field for field in DELTA_TYPES[kind] if delta.get(field) in (None, '')]
+        if missing:
+            raise ValueError(f"Delta {number} ({kind}) is missing {missing}")
+
+        if kind == 'remove_room':
+            if not any(room['room_id'] == delta['room'] for room in rooms):
+                raise ValueError(f"Delta {number}: unknown room '{delta['room']}'")
+            rooms = [room for room in rooms if room['room_id'] != delta['room']]
+            removed_rooms.add(delta['room'])
+
+        elif kind == 'remove_instructor':
+            if not any(instructor['name'] == delta['instructor'] for instructor in instructors):
+                raise ValueError(f"Delta {number}: unknown instructor '{delta['instructor']}'")
+            instructors = [instructor for instructor in instructors if instructor['name'] != delta['instructor']]
+            removed_instructors.add(delta['instructor'])
+
+        elif kind == 'add_instructor':
+            qualifications = delta['qualifications']
+            if isinstance(qualifications, str):
+                qualifications = [q.strip() for q in qualifications.split(',') if q.strip()]
+            unknown = sorted(set(qualifications) - course_ids)
+            if unknown:
+                raise ValueError(f"Delta {number}: unknown courses {unknown}")
+            if any(instructor['name'] == delta['name'] for instructor in instructors):
+                raise ValueError(f"Delta {number}: instructor '{delta['name']}' already exists")
+            instructors.append({'instructor_id': f"scenario-{number}", 'name': delta['name'],
+                                'role': delta.get('role', 'Assistant'), 'qualifications': ','.join(qualifications)})
+            rebuilt_courses.update(qualifications)
+
+        elif kind == 'add_qualification':
+            if delta['course'] not in course_ids:
+                raise ValueError(f"Delta {number}: unknown course '{delta['course']}'")
+            for index, instructor in enumerate(instructors):
+                if instructor['name'] == delta['instructor']:
+                    qualifications = _qualifications(instructor)
+                    if delta['course'] not in qualifications:
+                        instructors[index] = dict(instructor, qualifications=','.join(qualifications + [delta['course']]))
+                    break
+            else:
+                raise ValueError(f"Delta {number}: unknown instructor '{delta['instructor']}'")
+            rebuilt_courses.add(delta['course'])
+
+        elif kind == 'move_rest_day':
+            try:
+                year = int(delta['year'])
+            except (TypeError, ValueError):
+                raise ValueError(f"Delta {number}: year must be a number")
+            if year not in years:
+                raise ValueError(f"Delta {number}: unknown year {year}")
+            if delta['day'] not in WEEKDAYS:
+                raise ValueError(f"Delta {number}: rest day must be one of {WEEKDAYS}")
+            rest_days[year] = delta['day']
+            rebuilt_years.add(year)
+
+    data.update(rooms=rooms, instructors=instructors, rest_days=rest_days)
+    solver = TimetableSolver(None, rest_days=rest_days)
+    solver.model = model = CSPModel()
+    model.variables = base.model.variables
+    model.domains = dict(base.model.domains)
+    # Only the tables deltas edit are parsed again; rebuilt domains number slots as the kept ones do
+    solver.records = records.replace(rooms=rooms, instructors=instructors)
+    solver.time_grid = base.time_grid()
+    solver.constraint_manager = solver._create_constraints()
+
+    rebuilt = [var_id for var_id, variable in model.variables.items()
+               if variable.course_id in rebuilt_courses or variable.year in rebuilt_years]
+    if removed_rooms or removed_instructors:
+        for var_id, domains in model.domains.items():
+            if any(domain.room in removed_rooms or domain.instructor in removed_instructors for domain in domains):
+                model.domains[var_id] = [domain for domain in domains if domain.room not in removed_rooms
+                                         and domain.instructor not in removed_instructors]
+    for var_id in rebuilt:
+        variable = model.variables[var_id]
+        model.domains[var_id] = solver._create_domains_for_variable(variable)
+    solver.reduce_domains(rebuilt)
+
+    compiled = CompiledModel(data, model, solver.constraint_manager,
+                             solver.analyze_feasibility(parsed=(solver.records, solver.time_grid)))
+    if rebuilt and data.get('pins'):
+        # Rebuilt sessions start from full domains again, so the dataset's pins are re-applied
+        compiled = PinPropagator(compiled).apply(parse_pins(data['pins']))
+    return compiled
+
+
+def timetable_diff(base, other):
+    """Sessions of `other` that moved, changed room or changed instructor relative to `base`"""
+    def key(entry):
+        return (entry['course_id'], entry['session_type'], entry['sections'])
+
+    def placement(entry):
+        return {'day_time': entry['day_time'], 'room': entry['room'], 'instructor': entry['instructor']}
+
+    before = {key(entry): entry for entry in base}
+    after = {key(entry): entry for entry in other}
+    diff = {'unchanged': 0, 'moved': 0, 'room_changes': 0, 'instructor_changes': 0,
+            'added': [list(k) for k in after if k not in before],
+            'removed': [list(k) for k in before if k not in after],
+            'changes': []}
+    for session, entry in after.items():
+        if session not in before:
+            continue
+        old, new = placement(before[session]), placement(entry)
+        if old == new:
+            diff['unchanged'] += 1
+            continue
+        diff['moved'] += old['day_time'] != new['day_time']
+        diff['room_changes'] += old['room'] != new['room']
+        diff['instructor_changes'] += old['instructor'] != new['instructor']
+        diff['changes'].append({'course_id': session[0], 'session_type': session[1], 'sections': session[2],
+                                'before': old, 'after': new})
+    return diff
+
+
+def failed_result(scenario, error, status='error'):
+    """Result of a scenario that produced no solve of its own (its worker died, or it was cancelled)"""
+    return {'name': scenario.get('name'), 'deltas': scenario.get('deltas', []), 'status': status,
+            'error': error, 'timetable': None}
+
+
+def solve_scenario(base, scenario, mode='greedy', time_limit=30, **options):
+    """Derive and solve one scenario; never raises
+
+    `options` (restarts, seed, heuristic, value_order) are passed on to TimetableSolver.
+    """
+    result = {'name': scenario.get('name'), 'deltas': scenario.get('deltas', []), 'status': 'error',
+              'feasible': None, 'solve_s': 0.0, 'search': {}, 'classes': 0, 'quality': None,
+              'timetable': None, 'error': None}
+    start = time.perf_counter()
+    try:
+        compiled = apply_deltas(base, result['deltas']) if result['deltas'] else base
+        result['feasible'] = compiled.feasibility['feasible']
+        solver = TimetableSolver(None, time_limit=time_limit, mode=mode, verbose=False, **options)
+        try:
+            timetable = solver.generate_timetable(compiled)
+        except InfeasibleProblemError as e:
+            result['status'] = 'infeasible'
+            result['error'] = str(e)
+            result['feasibility'] = e.report
+            timetable = None
+        result['search'] = solver.last_stats or {}
+        if timetable:
+            result['status'] = 'solved'
+            result['classes'] = len(timetable)
+            result['timetable'] = timetable
+            result['quality'] = timetable_quality(timetable, compiled.records(), compiled.data['timeslots'])
+        elif result['status'] != 'infeasible':
+            result['status'] = 'timeout' if result['search'].get('timed_out') else 'no_solution'
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['traceback'] = traceback.format_exc()
+    result['solve_s'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+# Set in each worker by the pool initializer; inherited through fork rather than pickled
+_worker_state = None
+
+
+def _init_worker(base, scenarios, mode, time_limit):
+    global _worker_state
+    _worker_state = (base, scenarios, mode, time_limit)
+
+
+def _solve_in_worker(index):
+    base, scenarios, mode, time_limit = _worker_state
+    return solve_scenario(base, scenarios[index], mode, time_limit)
+
+
+class ScenarioRunner:
+    """Solves a base compiled model and what-if variants of it in up to `jobs` worker processes
+
+    Workers are forked with the compiled model already in memory, so it is neither
+    recompiled nor copied per scenario. Without fork (e.g. on Windows) scenarios run inline.
+    """
+
+    def __init__(self, compiled, mode='greedy', time_limit=30, jobs=None):
+        self.compiled = compiled
+        self.mode = mode
+        self.time_limit = time_limit
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+
+    def validate(self, scenarios):
+        """Raise ValueError for malformed scenarios before any worker starts"""
+        names = set()
+        for number, scenario in enumerate(scenarios, 1):
+            if not isinstance(scenario, dict) or not isinstance(scenario.get('deltas', []), list):
+                raise ValueError(f"Scenario {number} must be an object with a 'deltas' list")
+            name = scenario.get('name') or f"scenario-{number}"
+            if name in names or name == 'base':
+                raise ValueError(f"Scenario names must be distinct and not 'base', got '{name}' twice")
+            names.add(name)
+            scenario['name'] = name
+            try:
+                apply_deltas(self.compiled, scenario.get('deltas', []))
+            except ValueError as e:
+                raise ValueError(f"Scenario '{name}': {e}")
+
+    def run(self, scenarios, include_timetables=False):
+        """{'base': result, 'scenarios': [result, ...]} with a diff against the base per scenario"""
+        self.validate(scenarios)
+        tasks = [{'name': 'base', 'deltas': []}] + list(scenarios)
+        results = self.solve_tasks(tasks)
+
+        base, variants = results[0], results[1:]
+        for result in variants:
+            result['diff'] = (timetable_diff(base['timetable'], result['timetable'])
+                              if base.get('timetable') and result.get('timetable') else None)
+        if not include_timetables:
+            for result in results:
+                result.pop('timetable', None)
+        return {'base': base, 'scenarios': variants}
+
+    def solve_tasks(self, tasks):
+        """Results of solving each scenario, in order"""
+        if self.jobs == 1 or len(tasks) == 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            results = [solve_scenario(self.compiled, task, self.mode, self.time_limit) for task in tasks]
+        else:
+            results = [None] * len(tasks)
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(tasks)), mp_context=context,
+                                     initializer=_init_worker,
+                                     initargs=(self.compiled, tasks, self.mode, self.time_limit)) as pool:
+                futures = {pool.submit(_solve_in_worker, index): index for index in range(len(tasks))}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        # The worker process itself died (e.g. killed for memory)
+                        results[index] = failed_result(tasks[index], f"{type(e).__name__}: {e}")
+        return results
@@ -0,0 +1,169 @@
+"""
+Time Model for Timetable CSP
+Parses timeslots once into integer minute intervals, with an index of the slots each one
+overlaps and the 45-minute sub-slots tutorials are placed in
+"""
+
+from collections import namedtuple
+
+from .records import SchemaError
+
+
+DAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+# Length of a tutorial; a slot holds as many tutorials one after another as fit in it
+TUTORIAL_MINUTES = 45
+
+
+def parse_clock(text):
+    """'9:00 AM', '2:15 PM' or '14:15' -> minutes after midnight; raises ValueError"""
+    value = str(text).strip().upper()
+    suffix = value[-2:] if value[-2:] in ('AM', 'PM') else None
+    if suffix:
+        value = value[:-2].strip()
+    hours, _, minutes = value.partition(':')
+    if not hours.isdigit() or not minutes.isdigit() or len(minutes) != 2:
+        raise ValueError(f"Times look like '9:00 AM' or '14:15', got '{text}'")
+    hours, minutes = int(hours), int(minutes)
+    if suffix:
+        if not 1 <= hours <= 12:
+            raise ValueError(f"Hour out of range in '{text}'")
+        hours = hours % 12 + (12 if suffix == 'PM' else 0)
+    if hours > 23 or minutes > 59:
+        raise ValueError(f"Time out of range in '{text}'")
+    return hours * 60 + minutes
+
+
+def format_clock(minutes):
+    """Minutes after midnight -> '9:00 AM', as timeslots.csv writes times"""
+    hours, minutes = divmod(minutes, 60)
+    return f"{(hours - 1) % 12 + 1}:{minutes:02d} {'AM' if hours < 12 else 'PM'}"
+
+
+class TimeInterval(namedtuple('TimeInterval', ['day', 'start', 'end'])):
+    """Minutes [start, end) after midnight on a day (0 is Sunday)"""
+    __slots__ = ()
+
+    @property
+    def minutes(self):
+        return self.end - self.start
+
+    def overlaps(self, other):
+        return self.day == other.day and self.start < other.end and other.start < self.end
+
+
+class TimeGrid:
+    """The dataset's timeslots as integer intervals, numbered in file order
+
+    Domains carry their timeslot's number (`Domain.slot`), so conflict checks compare and
+    hash integers rather than labels. `overlapping[slot]` lists the other slots sharing any
+    minute with it, which is empty for every slot of the usual grid of disjoint slots.
+    """
+
+    def __init__(self, timeslots):
+        self.labels = []     # slot -> 'Sunday 9:00 AM', as domains and timetables name it
+        self.intervals = []  # slot -> TimeInterval
+        self.slots = {}      # label -> slot
+        for number, timeslot in enumerate(timeslots, 2):  # row 1 is the header
+            if str(timeslot.get('Day', '')).strip() not in DAYS:
+                raise SchemaError('timeslots.csv', number, f"Day must be one of {DAYS}, got '{timeslot.get('Day')}'")
+            try:
+                interval = TimeInterval(DAYS.index(timeslot['Day'].strip()), parse_clock(timeslot['StartTime']),
+                                        parse_clock(timeslot['EndTime']))
+            except KeyError as e:
+                raise SchemaError('timeslots.csv', number, f"{e} is missing")
+            except ValueError as e:
+                raise SchemaError('timeslots.csv', number, str(e))
+            if interval.end <= interval.start:
+                raise SchemaError('timeslots.csv', number, "EndTime must be after StartTime")
+            label = f"{timeslot['Day']} {timeslot['StartTime']}"
+            if label in self.slots:
+                raise SchemaError('timeslots.csv', number, f"a timeslot already starts at {label}")
+            self.slots[label] = len(self.labels)
+            self.labels.append(label)
+            self.intervals.append(interval)
+
+        # Overlap index: sweep each day's slots in start order against the ones still open
+        self.overlapping = [[] for _ in self.intervals]
+        open_slots = []
+        for slot in sorted(range(len(self.intervals)), key=lambda slot: self.intervals[slot][:2]):
+            interval = self.intervals[slot]
+            open_slots = [other for other in open_slots if self.intervals[other].overlaps(interval)]
+            for other in open_slots:
+                self.overlapping[slot].append(other)
+                self.overlapping[other].append(slot)
+            open_slots.append(slot)
+        self.overlapping = [tuple(sorted(others)) for others in self.overlapping]
+        self.partial_overlaps = any(self.overlapping)
+
+        # Tutorials one slot holds one after another, at least one however short the slot
+        self.sub_slots = [max(1, interval.minutes // TUTORIAL_MINUTES) for interval in self.intervals]
+
+        # ('9:00 AM', '10:30 AM') per slot and per tutorial sub-slot, formatted once rather
+        # than for every entry of every generated timetable
+        self.clock_times = [_clock_times(interval) for interval in self.intervals]
+        self.sub_slot_clock_times = [tuple(_clock_times(self.sub_slot(slot, index)) for index in range(count))
+                                     for slot, count in enumerate(self.sub_slots)]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def slot(self, label):
+        return self.slots[label]
+
+    def overlap(self, slot, other):
+        return slot == other or other in self.overlapping[slot]
+
+    def sub_slot(self, slot, index):
+        """Interval of a slot's `index`-th tutorial sub-slot"""
+        interval = self.intervals[slot]
+        start = interval.start + index * TUTORIAL_MINUTES
+        return TimeInterval(interval.day, start, start + TUTORIAL_MINUTES)
+
+
+def _clock_times(interval):
+    return format_clock(interval.start), format_clock(interval.end)
+
+
+def assign_sub_slots(sessions, count):
+    """Sub-slot index per session so no instructor or room has two sessions in one sub-slot
+
+    `sessions` are the (instructor, room) pairs of one slot's tutorials. They are the edges
+    of a bipartite graph between instructors and rooms, so when neither has more than
+    `count` sessions `count` sub-slots suffice (König's edge colouring theorem). A session
+    whose instructor and room have no free sub-slot in common frees one by swapping two
+    sub-slots along an alternating path. Raises ValueError when someone has too many.
+    """
+    used = {}  # ('instructor' or 'room', name) -> {sub-slot: session index}
+    chosen = [None] * len(sessions)
+    for index, (instructor, room) in enumerate(sessions):
+        ends = (('instructor', instructor), ('room', room))
+        free = []
+        for end in ends:
+            taken = used.setdefault(end, {})
+            options = [sub_slot for sub_slot in range(count) if sub_slot not in taken]
+            if not options:
+                raise ValueError(f"{end[0].capitalize()} {end[1]} has more than {count} tutorials in one slot")
+            free.append(options[0])
+        a, b = free
+        if a in used[ends[1]]:
+            # Swap sub-slots a and b along the path from the room that alternates them; in a
+            # bipartite graph it cannot end at the instructor, whose sub-slot a is free
+            path, end, sub_slot = [], ends[1], a
+            while sub_slot in used[end]:
+                session = used[end][sub_slot]
+                path.append(session)
+                other_instructor, other_room = sessions[session]
+                end = ('room', other_room) if end[0] == 'instructor' else ('instructor', other_instructor)
+                sub_slot = b if sub_slot == a else a
+            for session in path:
+                for end in (('instructor', sessions[session][0]), ('room', sessions[session][1])):
+                    del used[end][chosen[session]]
+            for session in path:
+                chosen[session] = b if chosen[session] == a else a
+                for end in (('instructor', sessions[session][0]), ('room', sessions[session][1])):
+                    used[end][chosen[session]] = session
+        chosen[index] = a
+        for end in ends:
+            used[end][a] = index
+    return chosen
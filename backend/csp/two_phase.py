@@ -0,0 +1,346 @@
+"""
+Two-phase solving for timetable CSP
+Searches over (timeslot, instructor) only, keeping per-slot room counts feasible,
+then assigns rooms slot by slot with a maximum bipartite matching
+"""
+
+import time
+from itertools import product
+
+from .csp_solver import CSPSolver
+from .feasibility import SECTION_STUDENTS
+from .flow import hopcroft_karp
+from .instructor_balance import InstructorBalancer
+from .model import CSPModel, Domain
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def _hall_condition_holds(demand):
+    """Whether sessions can get distinct rooms, for {room bitmask: sessions needing one of those rooms}
+
+    Sessions with the same room set are interchangeable, so Hall's condition only has to
+    hold for unions of whole room-set classes; it is then also sufficient.
+    """
+    items = [(mask, count) for mask, count in demand.items() if count]
+    for subset in range(1, 1 << len(items)):
+        union = needed = 0
+        for index, (mask, count) in enumerate(items):
+            if subset >> index & 1:
+                union |= mask
+                needed += count
+        if needed > _popcount(union):
+            return False
+    return True
+
+
+class TwoPhaseSearchSpace:
+    """Room-free domains and room bitmasks derived once from a compiled model"""
+
+    def __init__(self, compiled):
+        model = compiled.model
+        self.room_ids = sorted({domain.room for domains in model.domains.values() for domain in domains})
+        room_bit = {room_id: 1 << index for index, room_id in enumerate(self.room_ids)}
+        records = compiled.records()
+        # Rooms two tutorials can share (NoRoomConflict allows two half-slot sessions per room)
+        wide_mask = 0
+        for room_id, bit in room_bit.items():
+            if records.room_capacity(room_id) >= 2 * SECTION_STUDENTS:
+                wide_mask |= bit
+        self.wide_mask = wide_mask
+        self.time_grid = compiled.time_grid()
+
+        self.domains = {}     # variable_id -> [Domain(timeslot, None, instructor)]
+        self.room_masks = {}  # variable_id -> bitmask of compatible rooms
+        for var_id, domains in model.domains.items():
+            seen = {}
+            mask = 0
+            for domain in domains:
+                mask |= room_bit[domain.room]
+                key = (domain.slot, domain.instructor)
+                if key not in seen:
+                    seen[key] = Domain(domain.timeslot, None, domain.instructor, domain.slot)
+            self.domains[var_id] = list(seen.values())
+            self.room_masks[var_id] = mask
+
+        self.occupies = compiled.occupied_sections()
+        self.student_conflicts = compiled.student_conflicts()
+
+        self._rooms_of_mask = {}
+
+    def rooms_of(self, mask):
+        if mask not in self._rooms_of_mask:
+            self._rooms_of_mask[mask] = [room_id for index, room_id in enumerate(self.room_ids) if mask >> index & 1]
+        return self._rooms_of_mask[mask]
+
+    @classmethod
+    def for_compiled(cls, compiled):
+        """Built on first use and kept with the compiled model"""
+        space = compiled.derived.get('two_phase')
+        if space is None:
+            space = compiled.derived['two_phase'] = cls(compiled)
+        return space
+
+
+class TwoPhaseSolver(CSPSolver):
+    """Greedy backtracking over (timeslot, instructor), then per-timeslot room matching
+
+    Rooms of the same kind are interchangeable, so the search only keeps, per timeslot,
+    the counts of sessions by compatible room set and checks that a room assignment
+    still exists. That check is exact, so the matching afterwards always succeeds.
+    Those counts are per timeslot, so timeslots that partly overlap need the greedy search.
+    """
+
+    def __init__(self, compiled, time_limit=30, observers=None, restarts='none', seed=None,
+                 heuristic='course_aware', value_order='cost', verbose=True):
+        self.space = TwoPhaseSearchSpace.for_compiled(compiled)
+        if self.space.time_grid.partial_overlaps:
+            raise ValueError("Two-phase solving needs timeslots that do not overlap; use the 'greedy' mode")
+        model = CSPModel()
+        model.variables = compiled.model.variables
+        model.domains = self.space.domains
+        super().__init__(model, compiled.constraint_manager, time_limit=time_limit, observers=observers,
+                         restarts=restarts, seed=seed, heuristic=heuristic, occupies=self.space.occupies,
+                         value_order=value_order, verbose=verbose)
+        self._reset_indexes()
+        self._plans = {}  # slot demand signature -> tutorial pairing or None
+
+    def _reset_indexes(self):
+        self.instructor_slots = {}  # (instructor, slot) -> [full sessions, tutorials]
+        self.slot_sections = {}     # slot -> {(year, section)}
+        self.slot_sessions = {}     # slot -> StudentConflicts mask of its sessions, with enrollments
+        self.slot_full = {}         # slot -> {room mask: full sessions}
+        self.slot_tutorials = {}    # slot -> {room mask: tutorials}
+        self.instructor_load = {}
+        self.slot_load = {}
+
+    def _solve(self):
+        self._reset_indexes()
+        slot_assignment = super()._solve()
+        if slot_assignment is None:
+            return None
+        return self._assign_rooms(slot_assignment)
+
+    # ------------------------------------------------------------------
+    # Phase one: search without rooms
+    # ------------------------------------------------------------------
+
+    def _is_consistent(self, variable_id, domain):
+        self.constraint_checks += 1
+        variable = self.model.variables[variable_id]
+        slot = domain.slot
+        tutorial = variable.duration < 1.0
+
+        weighted = self.heuristic == 'dom_wdeg'
+        full, tutorials = self.instructor_slots.get((domain.instructor, slot), (0, 0))
+        if full or tutorials >= (self.space.time_grid.sub_slots[slot] if tutorial else 1):
+            if weighted:
+                self._note_conflicts([('instructor', domain.instructor)])
+            return False
+
+        busy = self.slot_sections.get(slot)
+        if busy and any(key in busy for key in self.space.occupies[variable_id]):
+            if weighted:
+                self._note_conflicts([('section', key) for key in self.space.occupies[variable_id] if key in busy])
+            return False
+
+        conflicts = self.space.student_conflicts
+        if conflicts is not None and conflicts.clashes(variable_id, self.slot_sessions.get(slot, 0)):
+            return False
+
+        if self._room_plan(slot, self.space.room_masks[variable_id], tutorial) is None:
+            if weighted:
+                self._note_conflicts([('rooms', self.space.room_masks[variable_id])])
+            return False
+        return True
+
+    def _room_plan(self, slot, extra_mask=None, extra_tutorial=False):
+        """Tutorial pairs per room set that make the slot's rooms fit, or None
+
+        `extra_mask` adds one prospective session to the slot's current demand. Two
+        tutorials only share a room in slots long enough to hold both one after another.
+        """
+        full = dict(self.slot_full.get(slot, {}))
+        tutorials = dict(self.slot_tutorials.get(slot, {}))
+        if extra_mask is not None:
+            target = tutorials if extra_tutorial else full
+            target[extra_mask] = target.get(extra_mask, 0) + 1
+        pairable = self.space.time_grid.sub_slots[slot] >= 2
+
+        signature = (tuple(sorted(full.items())), tuple(sorted(tutorials.items())), pairable)
+        if signature in self._plans:
+            return self._plans[signature]
+
+        plan = None
+        tutorial_sets = sorted(tutorials)
+        # Pair as many tutorials as possible first: a shared room frees another one
+        for pairs in product(*[range(tutorials[mask] // 2 if pairable else 0, -1, -1) for mask in tutorial_sets]):
+            demand = dict(full)
+            for mask, paired in zip(tutorial_sets, pairs):
+                demand[mask] = demand.get(mask, 0) + tutorials[mask] - 2 * paired
+                if paired:
+                    pair_mask = mask & self.space.wide_mask
+                    if not pair_mask:
+                        break
+                    demand[pair_mask] = demand.get(pair_mask, 0) + paired
+            else:
+                if _hall_condition_holds(demand):
+                    plan = dict(zip(tutorial_sets, pairs))
+                    break
+        self._plans[signature] = plan
+        return plan
+
+    def _assign(self, variable_id, domain):
+        super()._assign(variable_id, domain)
+        self._update_indexes(variable_id, domain, 1)
+
+    def _unassign(self, variable_id):
+        domain = self.model.assignment.get(variable_id)
+        super()._unassign(variable_id)
+        if domain is not None:
+            self._update_indexes(variable_id, domain, -1)
+
+    def _update_indexes(self, variable_id, domain, delta):
+        variable = self.model.variables[variable_id]
+        slot = domain.slot
+        tutorial = variable.duration < 1.0
+
+        counts = self.instructor_slots.setdefault((domain.instructor, slot), [0, 0])
+        counts[1 if tutorial else 0] += delta
+
+        busy = self.slot_sections.setdefault(slot, set())
+        for key in self.space.occupies[variable_id]:
+            if delta > 0:
+                busy.add(key)
+            else:
+                busy.discard(key)
+        if self.space.student_conflicts is not None:
+            self.slot_sessions[slot] = self.slot_sessions.get(slot, 0) ^ self.space.student_conflicts.bits[variable_id]
+
+        demand = (self.slot_tutorials if tutorial else self.slot_full).setdefault(slot, {})
+        mask = self.space.room_masks[variable_id]
+        demand[mask] = demand.get(mask, 0) + delta
+        if not demand[mask]:
+            del demand[mask]
+
+        self.instructor_load[domain.instructor] = self.instructor_load.get(domain.instructor, 0) + delta
+        self.slot_load[slot] = self.slot_load.get(slot, 0) + delta
+
+    def _reset_failure_weights(self):
+        super()._reset_failure_weights()
+        self._busy = None  # _is_consistent names the clashing resource itself
+
+    def _room_resources(self, variable_id):
+        # Rooms are matched later, so the room set a session draws from is the resource
+        return {('rooms', self.space.room_masks[variable_id])}
+
+    def _value_resources(self, variable_id, domain):
+        slot = domain.slot
+        keys = [('instructor', domain.instructor, slot), ('rooms', self.space.room_masks[variable_id], slot)]
+        keys += [('section', key, slot) for key in self.space.occupies[variable_id]]
+        return keys
+
+    def _resource_capacity(self, key):
+        return _popcount(key[1]) if key[0] == 'rooms' else 1
+
+    def _resource_name(self, resource):
+        if resource[0] == 'rooms':
+            rooms = self.space.rooms_of(resource[1])
+            return ', '.join(rooms) if len(rooms) <= 4 else f"{', '.join(rooms[:3])} and {len(rooms) - 3} more rooms"
+        return super()._resource_name(resource)
+
+    def _domain_size(self, variable_id):
+        # Rank variables as the full search would, so sessions with few rooms still go first
+        return len(self.model.domains[variable_id]) * _popcount(self.space.room_masks[variable_id])
+
+    def _value_cost(self, variable_id, domain):
+        """Same balancing costs as the greedy search, read from the maintained loads"""
+        return (self.instructor_load.get(domain.instructor, 0) * 0.3 +
+                self.slot_load.get(domain.slot, 0) * 0.2)
+
+    def _order_domain_values_by_cost(self, variable_id):
+        values = self.model.domains[variable_id]
+        if self.randomized:
+            values = list(values)
+            self.random.shuffle(values)
+        return sorted(values, key=lambda domain: self._value_cost(variable_id, domain))
+
+    # ------------------------------------------------------------------
+    # Phase two: rooms
+    # ------------------------------------------------------------------
+
+    def _assign_rooms(self, slot_assignment):
+        by_slot = {}
+        for var_id, domain in slot_assignment.items():
+            by_slot.setdefault(domain.slot, []).append(var_id)
+
+        assignment = {}
+        for slot, var_ids in by_slot.items():
+            timeslot = self.space.time_grid.labels[slot]
+            plan = self._room_plan(slot)
+            if plan is None:
+                self._log(f"⚠️ No room assignment exists for {timeslot}")
+                return None
+
+            units = {}  # unit -> (variable ids, room mask)
+            waiting = {}  # tutorial room mask -> [variable ids still to pair]
+            for var_id in var_ids:
+                mask = self.space.room_masks[var_id]
+                if self.model.variables[var_id].duration < 1.0 and plan.get(mask):
+                    waiting.setdefault(mask, []).append(var_id)
+                else:
+                    units[var_id] = ((var_id,), mask)
+            for mask, tutorials in waiting.items():
+                paired = 2 * plan[mask]
+                for index in range(0, paired, 2):
+                    units[tutorials[index]] = ((tutorials[index], tutorials[index + 1]), mask & self.space.wide_mask)
+                for var_id in tutorials[paired:]:
+                    units[var_id] = ((var_id,), mask)
+
+            matching = hopcroft_karp({unit: self.space.rooms_of(mask) for unit, (_, mask) in units.items()})
+            if len(matching) < len(units):
+                self._log(f"⚠️ Room matching left {len(units) - len(matching)} sessions without a room at {timeslot}")
+                return None
+            for unit, room in matching.items():
+                for var_id in units[unit][0]:
+                    assignment[var_id] = Domain(timeslot, room, slot_assignment[var_id].instructor, slot)
+
+        # The indexes mirror the hard constraints; confirm once on the complete timetable
+        if not self.constraint_manager.check_hard_constraints(assignment):
+            self._log("⚠️ Two-phase timetable failed the hard constraint check")
+            return None
+        self.model.assignment = assignment
+        return assignment
+
+
+class BalancedSolver(TwoPhaseSolver):
+    """Two-phase solving with instructors reassigned by min-cost flow once timeslots are fixed
+
+    The search still picks an instructor per session, which proves the timeslots leave a
+    conflict-free instructor assignment; InstructorBalancer then replaces those choices
+    with the most even one (or the one closest to `role_targets`) before rooms are matched.
+    """
+
+    def __init__(self, compiled, time_limit=30, observers=None, role_targets=None, restarts='none', seed=None,
+                 heuristic='course_aware', value_order='cost', verbose=True):
+        super().__init__(compiled, time_limit=time_limit, observers=observers, restarts=restarts, seed=seed,
+                         heuristic=heuristic, value_order=value_order, verbose=verbose)
+        self.balancer = InstructorBalancer(compiled.model.variables, self.space.domains,
+                                           compiled.data['instructors'], role_targets)
+        self.balance_seconds = 0.0
+
+    def _assign_rooms(self, slot_assignment):
+        # Room demand per timeslot does not depend on instructors, so the room plan still holds
+        started = time.perf_counter()
+        slot_assignment = self.balancer.rebalance(slot_assignment)
+        self.balance_seconds = time.perf_counter() - started
+        report = self.balancer.report
+        self._log(f"⚖️ Instructor balancing reassigned {report['reassigned']} sessions in {self.balance_seconds:.2f}s")
+        return super()._assign_rooms(slot_assignment)
+
+    def stats(self):
+        stats = super().stats()
+        stats['balance_s'] = round(self.balance_seconds, 4)
+        return stats
@@ -0,0 +1,288 @@
+"""
+Violation Report for Timetable CSP
+Lists every hard-constraint violation of a formatted timetable in one indexed pass, for
+timetables edited by hand after they were generated
+"""
+
+import time
+
+from .feasibility import LECTURE_STUDENTS, SECTION_STUDENTS
+from .time_model import DAYS
+
+
+# Fields every timetable entry needs to be checked
+ENTRY_FIELDS = ('course_id', 'session_type', 'sections', 'day_time', 'room', 'instructor')
+
+
+def check_timetable(compiled, timetable):
+    """Every hard-constraint violation of a formatted timetable, as a report dict
+
+    `timetable` is a list of entries as `generate_timetable` returns them, possibly
+    edited. Raises ValueError for entries missing a field of ENTRY_FIELDS.
+    """
+    return ViolationChecker(compiled).check(timetable)
+
+
+def check_entries(timetable):
+    """Raise ValueError unless the timetable is a list of entries with every field of ENTRY_FIELDS"""
+    if not isinstance(timetable, list):
+        raise ValueError("Timetable must be a list of entries")
+    for number, entry in enumerate(timetable, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Timetable entry {number} is not an object")
+        missing = [field for field in ENTRY_FIELDS if entry.get(field) in (None, '')]
+        if missing:
+            raise ValueError(f"Timetable entry {number} has no {', '.join(repr(f) for f in missing)}")
+
+
+def session_id(entry):
+    """Variable id of a timetable entry: 'CSC 111L|1|lecture' for 'Group 1'"""
+    _, _, number = str(entry['sections']).partition(' ')
+    return f"{entry['course_id']}|{number}|{entry['session_type']}"
+
+
+class ViolationChecker:
+    """Checks formatted timetables against a compiled model's hard constraints
+
+    The timetable is indexed once by (instructor, timeslot), (room, timeslot) and
+    timeslot, and each index is scanned once, so the whole report costs time linear in
+    the number of entries. Each group of clashing sessions is reported once with the
+    sessions, resource and timeslot involved, under the rule ConstraintManager applies:
+
+    - `instructor_conflict`, `room_conflict`: more than one full session, or more
+      tutorials than the slot's sub-slots, or a mix of both, or use in overlapping slots
+    - `room_capacity`: more students than the room holds, more than two sections or
+      more than one group lecture in one room
+    - `room_type`, `instructor_qualification`: as RoomTypeConstraint and
+      InstructorQualificationConstraint
+    - `student_conflict`: a section, or an enrolled student, in two sessions at once
+    - `rest_day`: a session on a day its year does not meet
+    - `unknown_session`, `unknown_timeslot`, `duplicate_session`, `missing_session`:
+      entries that do not match the dataset's sessions and timeslots one to one
+    """
+
+    def __init__(self, compiled):
+        # Imported here because csp_solver builds the compiled model this module checks
+        from .csp_solver import TimetableSolver
+
+        self.compiled = compiled
+        self.variables = compiled.model.variables
+        self.records = compiled.records()
+        self.time_grid = compiled.time_grid()
+        self.occupies = compiled.occupied_sections()
+        self.student_conflicts = compiled.student_conflicts()
+        available_days = TimetableSolver(None, rest_days=compiled.data.get('rest_days'))._get_available_days_for_year
+        self.year_days = {year: set(available_days(year)) for year in {v.year for v in self.variables.values()}}
+
+    def check(self, timetable):
+        start = time.perf_counter()
+        self.violations = []
+        sessions = self._index(timetable)
+
+        self._check_sessions(sessions)
+        self._check_shared('instructor', self.by_instructor, self._instructor_clash)
+        self._check_shared('room', self.by_room, self._room_clash)
+        self._check_room_capacity()
+        self._check_students()
+        if self.time_grid.partial_overlaps:
+            self._check_overlaps()
+
+        counts = {}
+        for violation in self.violations:
+            counts[violation['check']] = counts.get(violation['check'], 0) + 1
+        return {
+            'valid': not self.violations,
+            'violations': self.violations,
+            'counts': counts,
+            'stats': {
+                'entries': len(timetable),
+                'sessions': len(self.variables),
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+            }
+        }
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _index(self, timetable):
+        """Index the entries that name a known session and timeslot; returns {id: [entries]}"""
+        self.by_instructor = {}  # (instructor, slot) -> [variable ids]
+        self.by_room = {}        # (room, slot) -> [variable ids]
+        self.by_slot = {}        # slot -> [variable ids]
+        self.slot_names = {}     # ('instructor' or 'room', slot) -> names in use
+        self.listed = set()      # variable ids with an entry, known timeslot or not
+        sessions = {}
+        check_entries(timetable)
+        for number, entry in enumerate(timetable, 1):
+            var_id = session_id(entry)
+            if var_id not in self.variables:
+                self._add('unknown_session', f"Entry {number} ({entry['course_id']} {entry['session_type']}, "
+                          f"{entry['sections']}) is not a session of this dataset", sessions=[var_id], entry=number)
+                continue
+            self.listed.add(var_id)
+            slot = self.time_grid.slots.get(entry['day_time'])
+            if slot is None:
+                self._add('unknown_timeslot', f"{var_id} is at '{entry['day_time']}', which is not a timeslot",
+                          sessions=[var_id], timeslot=entry['day_time'])
+                continue
+            sessions.setdefault(var_id, []).append(entry)
+            self.by_instructor.setdefault((entry['instructor'], slot), []).append(var_id)
+            self.by_room.setdefault((entry['room'], slot), []).append(var_id)
+            self.by_slot.setdefault(slot, []).append(var_id)
+            self.slot_names.setdefault(('instructor', slot), set()).add(entry['instructor'])
+            self.slot_names.setdefault(('room', slot), set()).add(entry['room'])
+        return sessions
+
+    def _add(self, check, message, **details):
+        self.violations.append({'check': check, 'message': message, 'details': details})
+
+    def _label(self, slot):
+        return self.time_grid.labels[slot]
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+
+    def _check_sessions(self, sessions):
+        """Each session once, on one of its year's days, in a room and with an instructor it allows"""
+        for var_id in self.variables:
+            if var_id not in self.listed:
+                self._add('missing_session', f"{var_id} is not scheduled", sessions=[var_id])
+
+        for var_id, entries in sessions.items():
+            variable = self.variables[var_id]
+            if len(entries) > 1:
+                self._add('duplicate_session', f"{var_id} is scheduled {len(entries)} times",
+                          sessions=[var_id], timeslots=[entry['day_time'] for entry in entries])
+            for entry in entries:
+                slot = self.time_grid.slots[entry['day_time']]
+                day = DAYS[self.time_grid.intervals[slot].day]
+                if day not in self.year_days[variable.year]:
+                    self._add('rest_day', f"{var_id} is on {day}, a day year {variable.year} does not meet",
+                              sessions=[var_id], timeslot=entry['day_time'], year=variable.year)
+
+                room = self.records.room_lookup.get(entry['room'])
+                allowed = ('lab',) if variable.session_type == 'lab' else ('lecture', 'classroom')
+                if room is None:
+                    self._add('room_type', f"{var_id} is in unknown room '{entry['room']}'",
+                              sessions=[var_id], timeslot=entry['day_time'], room=entry['room'])
+                elif room.type not in allowed:
+                    self._add('room_type', f"{var_id} ({variable.session_type}) is in {room.type} room "
+                              f"'{entry['room']}'", sessions=[var_id], timeslot=entry['day_time'],
+                              room=entry['room'], room_type=room.type)
+
+                if variable.course_id not in self.records.qualifications.get(entry['instructor'], ()):
+                    self._add('instructor_qualification', f"{entry['instructor']} is not qualified to teach "
+                              f"{variable.course_id}", sessions=[var_id], timeslot=entry['day_time'],
+                              instructor=entry['instructor'])
+
+    def _check_shared(self, kind, index, clash):
+        for (name, slot), var_ids in index.items():
+            if len(var_ids) > 1:
+                problem = clash(name, slot, var_ids)
+                if problem:
+                    self._add(f'{kind}_conflict', f"{kind.capitalize()} {name} at {self._label(slot)}: {problem}",
+                              sessions=var_ids, timeslot=self._label(slot), **{kind: name})
+
+    def _full_and_tutorials(self, var_ids):
+        full = sum(1 for var_id in var_ids if self.variables[var_id].duration == 1.0)
+        tutorials = sum(1 for var_id in var_ids if self.variables[var_id].duration == 0.5)
+        return full, tutorials
+
+    def _instructor_clash(self, instructor, slot, var_ids):
+        full, tutorials = self._full_and_tutorials(var_ids)
+        if full > 1:
+            return f"{full} sessions at once"
+        if tutorials > self.time_grid.sub_slots[slot]:
+            return f"{tutorials} tutorials but the slot holds {self.time_grid.sub_slots[slot]}"
+        if full and tutorials:
+            return "a full session and a tutorial at once"
+        return None
+
+    def _room_clash(self, room, slot, var_ids):
+        # Seats are left to _capacity_problem, so an overfull room is reported once, as room_capacity
+        return self._instructor_clash(room, slot, var_ids)
+
+    def _check_room_capacity(self):
+        """Students each room holds, as NoStudentConflictConstraint counts them"""
+        for (room, slot), var_ids in self.by_room.items():
+            problem = self._capacity_problem(room, var_ids)
+            if problem:
+                self._add('room_capacity', f"Room {room} at {self._label(slot)}: {problem}",
+                          sessions=var_ids, timeslot=self._label(slot), room=room,
+                          capacity=self.records.room_capacity(room))
+
+    def _capacity_problem(self, room, var_ids):
+        lectures = [var_id for var_id in var_ids
+                    if self.variables[var_id].session_type == 'lecture' and self.variables[var_id].group_id]
+        sections = [var_id for var_id in var_ids
+                    if var_id not in lectures and self.variables[var_id].section_id]
+        students = LECTURE_STUDENTS * len(lectures) + SECTION_STUDENTS * len(sections)
+        capacity = self.records.room_capacity(room)
+        if students > capacity:
+            return f"{students} students for {capacity} seats"
+        if len(sections) > 2:
+            return f"{len(sections)} sections share it"
+        if len(lectures) > 1:
+            return f"{len(lectures)} group lectures share it"
+        return None
+
+    def _check_students(self):
+        for slot, var_ids in self.by_slot.items():
+            self._report_students(self._attending(var_ids).items(), self._label(slot))
+            if self.student_conflicts is not None:
+                self._report_enrolled(var_ids, var_ids, self._label(slot))
+
+    def _attending(self, var_ids):
+        """{(year, section): [variable ids]} of the core sessions each section attends"""
+        attending = {}
+        for var_id in var_ids:
+            for key in self.occupies[var_id]:
+                attending.setdefault(key, []).append(var_id)
+        return attending
+
+    def _report_students(self, attending, timeslot):
+        # A group lecture clashing with another session is one violation, not one per section
+        clashes = {}  # sessions -> sections attending all of them
+        for key, users in attending:
+            users = tuple(sorted(set(users)))
+            if len(users) > 1:
+                clashes.setdefault(users, []).append(key)
+        for users, keys in clashes.items():
+            named = ', '.join(f"year {year} section {section}" for year, section in sorted(keys))
+            self._add('student_conflict', f"{named.capitalize()} attend{'s' if len(keys) == 1 else ''} "
+                      f"{len(users)} sessions at {timeslot}", sessions=list(users), timeslot=timeslot,
+                      sections=[list(key) for key in sorted(keys)])
+
+    def _report_enrolled(self, var_ids, other_ids, timeslot):
+        conflicts = self.student_conflicts
+        others = conflicts.mask(other_ids)
+        reported = set()
+        for var_id in var_ids:
+            for other_id in conflicts.sessions(conflicts.rows[var_id] & others):
+                pair = tuple(sorted((var_id, other_id)))
+                if pair in reported or not (self.occupies[var_id].isdisjoint(self.occupies[other_id])):
+                    # Already reported, or reported as a section clash
+                    continue
+                reported.add(pair)
+                self._add('student_conflict', f"Students enrolled in both {pair[0]} and {pair[1]} have "
+                          f"them at once at {timeslot}", sessions=list(pair), timeslot=timeslot, enrolled=True)
+
+    def _check_overlaps(self):
+        """Instructors, rooms and students in two timeslots that share minutes"""
+        for slot, var_ids in self.by_slot.items():
+            for other in self.time_grid.overlapping[slot]:
+                if other < slot or other not in self.by_slot:
+                    continue
+                timeslot = f"{self._label(slot)} and {self._label(other)}"
+                other_ids = self.by_slot[other]
+                for kind, index in (('instructor', self.by_instructor), ('room', self.by_room)):
+                    for name in sorted(self.slot_names[(kind, slot)] & self.slot_names[(kind, other)]):
+                        users = index[(name, slot)] + index[(name, other)]
+                        self._add(f'{kind}_conflict', f"{kind.capitalize()} {name} is in overlapping timeslots "
+                                  f"{timeslot}", sessions=users, timeslot=timeslot, **{kind: name})
+                here, there = self._attending(var_ids), self._attending(other_ids)
+                self._report_students([(key, here[key] + there[key]) for key in here.keys() & there.keys()], timeslot)
+                if self.student_conflicts is not None:
+                    self._report_enrolled(var_ids, other_ids, timeslot)
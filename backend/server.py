@@ -0,0 +1,228 @@
+"""
+Production Server for Timetable CSP
+Compiles dataset models once, then forks workers that share them copy-on-write
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from werkzeug.serving import make_server
+
+# Signal that asks a worker to stop accepting connections and exit once its requests finish
+RETIRE_SIGNAL = getattr(signal, 'SIGUSR1', None)
+
+# Longest a retiring worker waits for requests in flight before it exits anyway
+RETIRE_TIMEOUT_S = 300
+
+# How often the parent checks for exited workers while it also polls for edited data
+REAP_INTERVAL_S = 0.5
+
+
+class PreforkServer:
+    """Pre-loads models in the parent process and serves the Flask app from forked workers
+
+    With a `watch_interval` the parent polls the preloaded datasets' files. It recompiles
+    an edited dataset once, then forks a fresh set of workers from the rebuilt models and
+    retires the old ones after their requests finish, so the workers keep sharing one
+    copy of every model instead of each recompiling its own.
+    """
+
+    def __init__(self, host='0.0.0.0', port=5000, workers=2, preload=None, max_concurrent_solves=2, backlog=128,
+                 watch_interval=None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = preload  # dataset names, None means every registered dataset
+        self.max_concurrent_solves = max_concurrent_solves
+        self.backlog = backlog
+        self.watch_interval = watch_interval  # seconds between polls for edited data, None for no watcher
+        self.children = {}  # pid -> worker index
+        self.retiring = set()  # pids of replaced workers finishing their requests
+        self.watcher = None  # DatasetWatcher polled by the parent between reaping workers
+        self.shutting_down = False
+        self.listener = None
+
+    def prepare(self):
+        """Import the app and compile the preloaded datasets before any fork"""
+        import app as web
+
+        web.configure_solve_limit(self.max_concurrent_solves)
+        if self.workers > 1 and not web.timetable_store.directory:
+            # Workers share generated timetables through files, whichever worker solved them
+            web.timetable_store.directory = tempfile.mkdtemp(prefix='timetable-store-')
+        available = web.registry.names()
+        names = self.preload if self.preload is not None else available
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValueError(f"Unknown dataset(s) to preload: {', '.join(unknown)}; "
+                             f"available: {', '.join(available)}")
+
+        # Only compiled datasets gate readiness: /readyz would otherwise wait on a broken
+        # one forever, so those are reported under failed_datasets instead
+        web.preload_datasets[:] = []
+        web.failed_datasets.clear()
+        start = time.time()
+        for name in names:
+            try:
+                web.registry.get_compiled(name)
+            except Exception as e:
+                # A broken dataset should not keep the others from being served
+                print(f"⚠️ Could not preload dataset '{name}': {e}")
+                web.failed_datasets[name] = str(e)
+            else:
+                web.preload_datasets.append(name)
+        print(f"📦 Preloaded {len(web.preload_datasets)}/{len(names)} dataset(s) in {time.time() - start:.2f}s")
+
+        # Move everything allocated so far out of the collector's reach: without this the
+        # first collection in each worker touches every object and un-shares its pages
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        return web.app
+
+    def serve_forever(self):
+        flask_app = self.prepare()
+
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.port))
+        self.listener.listen(self.backlog)
+        self.listener.set_inheritable(True)
+        print(f"🚀 Serving on http://{self.host}:{self.port} with {self.workers} worker(s)")
+
+        import app as web
+        if self.workers <= 1 or not hasattr(os, 'fork'):
+            # No fork (e.g. Windows): serve from this process, rebuilding in a background thread
+            if self.watch_interval:
+                web.start_data_watcher(self.watch_interval)
+            self._run_worker(flask_app, 0)
+            return
+
+        if self.watch_interval:
+            # Polled from this process's loop below rather than a thread, so no thread can
+            # hold a lock when a worker is forked
+            from utils.data_watcher import DatasetWatcher
+            self.watcher = web.data_watcher = DatasetWatcher(web.registry, self.watch_interval)
+            self.watcher.start(thread=False)
+
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        signal.signal(signal.SIGINT, self._handle_shutdown)
+        for index in range(self.workers):
+            self._spawn(flask_app, index)
+
+        next_poll = time.monotonic() + self.watch_interval if self.watcher else None
+        while self.children or self.retiring:
+            try:
+                if self.watcher is None:
+                    pid, status = os.wait()
+                else:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            if pid == 0:
+                # No worker exited; poll for edited data when due
+                if time.monotonic() >= next_poll and not self.shutting_down:
+                    next_poll = time.monotonic() + self.watch_interval
+                    self._poll_data(flask_app)
+                time.sleep(REAP_INTERVAL_S)
+                continue
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            index = self.children.pop(pid, None)
+            if index is not None and not self.shutting_down:
+                print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}, restarting")
+                self._spawn(flask_app, index)
+
+        self.listener.close()
+        print("👋 Server stopped")
+
+    def _poll_data(self, flask_app):
+        try:
+            rebuilt = self.watcher.poll()
+        except Exception as e:
+            print(f"⚠️ Dataset watcher poll failed: {e}")
+            return
+        if rebuilt:
+            self._recycle_workers(flask_app, rebuilt)
+
+    def _recycle_workers(self, flask_app, rebuilt):
+        """Fork a new worker per index from the rebuilt models, then retire the old ones"""
+        if hasattr(gc, 'freeze'):
+            # The replaced models were frozen with everything else; let them be collected
+            gc.unfreeze()
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        old = dict(self.children)
+        self.children = {}
+        for index in sorted(old.values()):
+            self._spawn(flask_app, index)
+        for pid in old:
+            self.retiring.add(pid)
+            try:
+                os.kill(pid, RETIRE_SIGNAL)
+            except ProcessLookupError:
+                self.retiring.discard(pid)
+        print(f"♻️ Rebuilt {', '.join(rebuilt)}; replaced {len(old)} worker(s)")
+
+    def _spawn(self, flask_app, index):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                self._run_worker(flask_app, index)
+            finally:
+                os._exit(0)
+        self.children[pid] = index
+
+    def _run_worker(self, flask_app, index):
+        server = make_server(self.host, self.port, flask_app, threaded=True, fd=self.listener.fileno())
+        if self.watcher is not None:
+            import app as web
+            # The parent rebuilds the models compiled before the fork and replaces this
+            # worker; datasets this worker compiles itself still reload on requests
+            web.registry.watched = False
+            for name in web.registry.names():
+                entry = web.registry.get_entry(name)
+                entry.watched = entry.is_loaded
+            # shutdown() waits for serve_forever(), so it cannot run in the handler itself
+            signal.signal(RETIRE_SIGNAL, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+        print(f"👷 Worker {index} ready (pid {os.getpid()})")
+        server.serve_forever()
+        self._finish_requests()
+
+    def _finish_requests(self):
+        """Wait for request threads still running after the server stopped accepting"""
+        deadline = time.monotonic() + RETIRE_TIMEOUT_S
+        current = threading.current_thread()
+        for thread in threading.enumerate():
+            if thread is not current:
+                thread.join(max(0.0, deadline - time.monotonic()))
+
+    def _handle_shutdown(self, signum, frame):
+        self.shutting_down = True
+        for pid in list(self.children) + list(self.retiring):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def serve(host='0.0.0.0', port=5000, workers=2, preload=None, max_concurrent_solves=2, watch_interval=None):
+    """Run the production server until interrupted"""
+    PreforkServer(host, port, workers, preload, max_concurrent_solves,
+                  watch_interval=watch_interval).serve_forever()
@@ -0,0 +1,163 @@
+"""
+Batch Solving for Timetable CSP
+Solves many dataset directories in parallel worker processes and writes timetables and stats
+"""
+
+import contextlib
+import csv
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.csv_loader import CSVDataLoader
+from utils.exporters import TimetableExporter
+
+
+BATCH_FORMATS = ('json', 'csv')
+
+# Per-dataset outcomes, from best to worst
+STATUSES = ('solved', 'timeout', 'no_solution', 'infeasible', 'error')
+
+SUMMARY_COLUMNS = ['name', 'status', 'classes', 'elapsed_s', 'nodes', 'backtracks', 'restarts', 'constraint_checks',
+                   'data_dir', 'output_dir', 'error']
+
+
+def dataset_names(data_dirs):
+    """Output name for each data directory (its basename); duplicates raise ValueError"""
+    names = [os.path.basename(os.path.normpath(path)) or 'data' for path in data_dirs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Data directories must have distinct names, got duplicates {duplicates}")
+    return names
+
+
+def solve_dataset(name, data_dir, output_dir, formats=BATCH_FORMATS, time_limit=30, mode='greedy',
+                  role_targets=None, restarts='none', seed=None, heuristic='course_aware', value_order='cost'):
+    """Solve one dataset and write its outputs; runs in a worker process and never raises
+
+    The solver's console output goes to solve.log in the output directory.
+    """
+    # Imported here so the pool's workers load the solver themselves
+    from csp.csp_solver import TimetableSolver
+    from csp.feasibility import InfeasibleProblemError
+
+    os.makedirs(output_dir, exist_ok=True)
+    result = {'name': name, 'data_dir': data_dir, 'output_dir': output_dir, 'status': 'error',
+              'classes': 0, 'elapsed_s': 0.0, 'search': {}, 'error': None}
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, 'solve.log'), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        try:
+            data_loader = CSVDataLoader(data_dir, cache=True)
+            is_valid, message = data_loader.validate_data()
+            if not is_valid:
+                raise ValueError(f"Data validation failed: {message}")
+
+            solver = TimetableSolver(data_loader, time_limit=time_limit, mode=mode, role_targets=role_targets,
+                                     restarts=restarts, seed=seed, heuristic=heuristic, value_order=value_order)
+            try:
+                timetable = solver.generate_timetable()
+            except InfeasibleProblemError as e:
+                result['status'] = 'infeasible'
+                result['error'] = str(e)
+                result['feasibility'] = e.report
+                timetable = None
+            result['search'] = solver.last_stats or {}
+            if solver.last_balance:
+                result['balance'] = solver.last_balance
+
+            if timetable:
+                result['status'] = 'solved'
+                result['classes'] = len(timetable)
+                _write_timetable(timetable, data_loader, output_dir, formats)
+            elif result['status'] != 'infeasible':
+                result['status'] = 'timeout' if result['search'].get('timed_out') else 'no_solution'
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc(file=log)
+
+    result['elapsed_s'] = round(time.perf_counter() - start, 3)
+    with open(os.path.join(output_dir, 'stats.json'), 'w', encoding='utf-8') as file:
+        json.dump(result, file, indent=2)
+    return result
+
+
+def _write_timetable(timetable, data_loader, output_dir, formats):
+    if 'json' in formats:
+        with open(os.path.join(output_dir, 'timetable.json'), 'w', encoding='utf-8') as file:
+            json.dump(timetable, file, indent=2)
+    if 'csv' in formats:
+        exporter = TimetableExporter(sections=data_loader.load_sections(), timeslots=data_loader.load_timeslots())
+        with open(os.path.join(output_dir, 'timetable.csv'), 'wb') as stream:
+            exporter.write_csv(timetable, stream)
+
+
+class BatchSolver:
+    """Solves datasets in up to `jobs` worker processes"""
+
+    def __init__(self, output_dir, jobs=None, formats=BATCH_FORMATS, time_limit=30, mode='greedy', role_targets=None,
+                 restarts='none', seed=None, heuristic='course_aware', value_order='cost'):
+        unknown = [f for f in formats if f not in BATCH_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown output formats {unknown}; choose from {list(BATCH_FORMATS)}")
+        self.output_dir = output_dir
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.formats = tuple(formats)
+        self.time_limit = time_limit
+        self.mode = mode
+        self.role_targets = role_targets
+        self.restarts = restarts
+        self.seed = seed
+        self.heuristic = heuristic
+        self.value_order = value_order
+
+    def run(self, data_dirs, progress=None):
+        """Solve every directory; returns results in input order and writes the summary files"""
+        missing = [path for path in data_dirs if not os.path.isdir(path)]
+        if missing:
+            raise ValueError(f"Data directories not found: {missing}")
+        names = dataset_names(data_dirs)
+        tasks = [(name, path, os.path.join(self.output_dir, name), self.formats, self.time_limit, self.mode,
+                  self.role_targets, self.restarts, self.seed, self.heuristic, self.value_order)
+                 for name, path in zip(names, data_dirs)]
+
+        results = {}
+        if self.jobs == 1 or len(tasks) == 1:
+            for task in tasks:
+                results[task[0]] = solve_dataset(*task)
+                if progress:
+                    progress(results[task[0]])
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(tasks))) as pool:
+                futures = {pool.submit(solve_dataset, *task): task[0] for task in tasks}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        # The worker process itself died (e.g. killed for memory)
+                        results[name] = {'name': name, 'status': 'error', 'classes': 0, 'elapsed_s': 0.0,
+                                         'search': {}, 'error': f"{type(e).__name__}: {e}"}
+                    if progress:
+                        progress(results[name])
+
+        ordered = [results[name] for name in names]
+        self.write_summary(ordered)
+        return ordered
+
+    def write_summary(self, results):
+        os.makedirs(self.output_dir, exist_ok=True)
+        counts = {status: sum(1 for r in results if r['status'] == status) for status in STATUSES}
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w', encoding='utf-8') as file:
+            json.dump({'counts': counts, 'results': results}, file, indent=2)
+        with open(os.path.join(self.output_dir, 'summary.csv'), 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=SUMMARY_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            for result in results:
+                row = dict(result)
+                row.update({key: result.get('search', {}).get(key, '')
+                            for key in ('nodes', 'backtracks', 'restarts', 'constraint_checks')})
+                writer.writerow(row)
@@ -0,0 +1,249 @@
+"""
+Solver Benchmark Suite for Timetable CSP
+Times model build, domain reduction and search over a ladder of generated instances
+and compares the results with a stored baseline
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+from utils.csv_loader import CSVDataLoader
+from utils.instance_generator import InstanceGenerator
+
+
+# Instance sizes from a toy department up to five times the bundled data
+BENCHMARK_LADDER = [
+    ('xs', {'years': 1, 'groups_per_year': 1, 'courses_per_year': 2}),
+    ('s', {'years': 2, 'groups_per_year': 1, 'courses_per_year': 3}),
+    ('m', {'years': 4, 'groups_per_year': 2, 'courses_per_year': 4}),
+    ('l', {'years': 4, 'groups_per_year': 3, 'courses_per_year': 5}),
+    ('xl', {'years': 4, 'groups_per_year': 15, 'courses_per_year': 5}),
+]
+DEFAULT_SIZES = ('xs', 's', 'm', 'l')
+PHASES = ('parse', 'feasibility', 'build', 'reduce', 'solve')
+
+# Wall-time differences below this are timer noise, not regressions
+MIN_TIME_DELTA = 0.01
+
+
+class BenchmarkSuite:
+    """Runs every phase of a solve on each instance and records time, search counters and memory"""
+
+    def __init__(self, sizes=None, data_dirs=None, time_limit=10, repeat=1, memory=True, seed=0, mode='greedy',
+                 restarts='none', heuristic='course_aware', value_order='cost'):
+        ladder = dict(BENCHMARK_LADDER)
+        sizes = list(sizes) if sizes is not None else list(DEFAULT_SIZES)
+        unknown = [size for size in sizes if size not in ladder]
+        if unknown:
+            raise ValueError(f"Unknown benchmark sizes {unknown}; choose from {[name for name, _ in BENCHMARK_LADDER]}")
+        if repeat < 1:
+            raise ValueError("repeat must be at least 1")
+        self.sizes = sizes
+        self.data_dirs = list(data_dirs or [])
+        self.time_limit = time_limit
+        self.repeat = repeat
+        self.memory = memory
+        self.seed = seed
+        self.mode = mode
+        self.restarts = restarts
+        self.heuristic = heuristic
+        self.value_order = value_order
+
+    def run(self, progress=None):
+        """Benchmark every instance; returns the results dict written by save_results"""
+        results = {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'environment': {
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count()
+            },
+            'settings': {'time_limit': self.time_limit, 'repeat': self.repeat, 'memory': self.memory,
+                         'seed': self.seed, 'mode': self.mode, 'restarts': self.restarts,
+                         'heuristic': self.heuristic, 'value_order': self.value_order},
+            'instances': []
+        }
+
+        ladder = dict(BENCHMARK_LADDER)
+        with tempfile.TemporaryDirectory(prefix='timetable-bench-') as workdir:
+            instances = []
+            for size in self.sizes:
+                generator = InstanceGenerator(seed=self.seed, **ladder[size])
+                data_dir = os.path.join(workdir, size)
+                generator.write(data_dir)
+                instances.append((size, data_dir, generator.parameters()))
+            for data_dir in self.data_dirs:
+                instances.append((os.path.basename(os.path.normpath(data_dir)), data_dir, {'data_dir': data_dir}))
+
+            for name, data_dir, params in instances:
+                if progress:
+                    progress(f"⏱️ Benchmarking '{name}'...")
+                result = self.run_instance(data_dir)
+                result['name'] = name
+                result['params'] = params
+                results['instances'].append(result)
+                if progress:
+                    progress(_summary_line(result))
+        return results
+
+    def run_instance(self, data_dir):
+        """Best wall times over `repeat` untraced runs, plus one traced run for peak memory"""
+        runs = [self._run_once(data_dir, trace=False) for _ in range(self.repeat)]
+        result = runs[0]
+        for phase in PHASES:
+            result['phases'][phase]['wall_s'] = min(run['phases'][phase]['wall_s'] for run in runs)
+
+        if self.memory:
+            # tracemalloc slows allocation down, so memory comes from a separate pass
+            traced = self._run_once(data_dir, trace=True)
+            for phase in PHASES:
+                result['phases'][phase]['peak_kb'] = traced['phases'][phase]['peak_kb']
+        return result
+
+    def _run_once(self, data_dir, trace):
+        # Imported here so utils does not depend on the solver package at import time
+        from csp.csp_solver import CompiledModel, TimetableSolver
+        from csp.feasibility import InfeasibleProblemError
+
+        phases = {}
+        # Restarted searches are seeded like the instances, so runs stay reproducible
+        solver = TimetableSolver(CSVDataLoader(data_dir), time_limit=self.time_limit, mode=self.mode,
+                                 restarts=self.restarts, seed=self.seed if self.restarts != 'none' else None,
+                                 heuristic=self.heuristic, value_order=self.value_order)
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = solver.load_data()
+
+            with _measure(phases, 'parse', trace):
+                records, time_grid = parsed = solver.parse_data(data)
+
+            with _measure(phases, 'feasibility', trace):
+                feasibility = solver.analyze_feasibility(parsed=parsed)
+
+            with _measure(phases, 'build', trace):
+                solver.model = solver._create_model(records, time_grid)
+                solver.constraint_manager = solver._create_constraints()
+
+            with _measure(phases, 'reduce', trace):
+                domains_before, domains_after = solver.reduce_domains()
+
+            compiled = CompiledModel(data, solver.model, solver.constraint_manager, feasibility)
+            timetable = None
+            with _measure(phases, 'solve', trace):
+                try:
+                    timetable = solver.generate_timetable(compiled)
+                except InfeasibleProblemError:
+                    pass
+
+        return {
+            'variables': compiled.model.get_variable_count(),
+            'domain_values': domains_before,
+            'reduced_domain_values': domains_after,
+            'feasible': feasibility['feasible'],
+            'solved': bool(timetable),
+            'phases': phases,
+            'search': solver.last_stats or {}
+        }
+
+
+@contextlib.contextmanager
+def _measure(phases, phase, trace):
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        phases[phase] = {'wall_s': round(elapsed, 4)}
+        if trace:
+            phases[phase]['peak_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.stop()
+
+
+def _summary_line(result):
+    search = result.get('search', {})
+    times = ', '.join(f"{phase} {result['phases'][phase]['wall_s']:.3f}s" for phase in PHASES)
+    outcome = 'solved' if result['solved'] else ('timed out' if search.get('timed_out') else 'unsolved')
+    return (f"   {result['variables']} variables, {outcome}: {times}; "
+            f"{search.get('nodes', 0)} nodes, {search.get('backtracks', 0)} backtracks, "
+            f"{search.get('checks_per_second', 0):.0f} checks/s")
+
+
+def compare_results(results, baseline, tolerance=0.25):
+    """Regressions of `results` against `baseline`, as a list of dicts
+
+    Times and memory may grow by `tolerance` (a fraction) before they count; an instance
+    that stops solving always does.
+    """
+    regressions = []
+    baseline_instances = {instance['name']: instance for instance in baseline.get('instances', [])}
+
+    def flag(name, metric, old, new):
+        change = (new - old) / old if old else None
+        regressions.append({'instance': name, 'metric': metric, 'baseline': old, 'current': new,
+                            'change': round(change, 3) if change is not None else None})
+
+    for current in results.get('instances', []):
+        name = current['name']
+        previous = baseline_instances.get(name)
+        if previous is None:
+            continue
+
+        if previous.get('solved') and not current.get('solved'):
+            flag(name, 'solved', 1, 0)
+
+        both_timed_out = previous.get('search', {}).get('timed_out') and current.get('search', {}).get('timed_out')
+        for phase in PHASES:
+            old_phase = previous['phases'].get(phase, {})
+            new_phase = current['phases'].get(phase, {})
+            old_time, new_time = old_phase.get('wall_s'), new_phase.get('wall_s')
+            # A search cut off by the time limit on both sides says nothing about speed
+            if old_time is not None and new_time is not None and not (phase == 'solve' and both_timed_out):
+                if new_time > old_time * (1 + tolerance) and new_time - old_time > MIN_TIME_DELTA:
+                    flag(name, f'{phase}.wall_s', old_time, new_time)
+            old_peak, new_peak = old_phase.get('peak_kb'), new_phase.get('peak_kb')
+            if old_peak and new_peak and new_peak > old_peak * (1 + tolerance):
+                flag(name, f'{phase}.peak_kb', old_peak, new_peak)
+
+        old_search, new_search = previous.get('search', {}), current.get('search', {})
+        if previous.get('solved') and current.get('solved'):
+            old_nodes, new_nodes = old_search.get('nodes'), new_search.get('nodes')
+            if old_nodes and new_nodes and new_nodes > old_nodes * (1 + tolerance):
+                flag(name, 'search.nodes', old_nodes, new_nodes)
+        old_rate, new_rate = old_search.get('checks_per_second'), new_search.get('checks_per_second')
+        if old_rate and new_rate and new_rate < old_rate / (1 + tolerance):
+            flag(name, 'search.checks_per_second', old_rate, new_rate)
+
+    return regressions
+
+
+def format_regressions(regressions):
+    if not regressions:
+        return "✅ No regressions against the baseline"
+    lines = [f"❌ {len(regressions)} regression(s) against the baseline:"]
+    for regression in regressions:
+        change = f" ({regression['change']:+.0%})" if regression['change'] is not None else ''
+        lines.append(f"   {regression['instance']}: {regression['metric']} "
+                     f"{regression['baseline']} -> {regression['current']}{change}")
+    return '\n'.join(lines)
+
+
+def save_results(results, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+        file.write('\n')
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
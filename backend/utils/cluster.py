@@ -0,0 +1,563 @@
+"""
+Distributed Solving for Timetable CSP
+Sends scenario and portfolio solves to worker processes on other machines over HTTP, with
+heartbeats, re-queueing of a dead worker's tasks and local solving once no worker is left
+"""
+
+import contextlib
+import hashlib
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from csp.csp_solver import TimetableSolver
+from csp.scenarios import ScenarioRunner, failed_result, solve_scenario
+
+
+# Task fields passed on to TimetableSolver besides mode and time_limit
+STRATEGY_OPTIONS = ('restarts', 'seed', 'heuristic', 'value_order')
+
+# Header carrying the shared secret of workers started with a token
+TOKEN_HEADER = 'X-Cluster-Token'
+
+# Finished results nobody fetched (their coordinator died) are dropped after this long
+RESULT_TTL_S = 600
+
+
+def parse_workers(value):
+    """'host:port,host:port' -> ['host:port', ...]; raises ValueError for a malformed address"""
+    workers = []
+    for address in (item.strip() for item in (value or '').split(',')):
+        if not address:
+            continue
+        host, _, port = address.rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f"Worker addresses look like 'host:port', got '{address}'")
+        workers.append(address)
+    return workers
+
+
+def dataset_key(data):
+    """Content hash naming a dataset on the workers, so each is uploaded and compiled once"""
+    encoded = json.dumps(data, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def compile_dataset(data):
+    """CompiledModel of an uploaded dataset's tables"""
+    # JSON turned the years of scenario rest days into strings
+    rest_days = {int(year): day for year, day in (data.get('rest_days') or {}).items()}
+    if rest_days:
+        data = dict(data, rest_days=rest_days)
+    return TimetableSolver(None, rest_days=rest_days, verbose=False).compile(data)
+
+
+def run_task(compiled, task):
+    """Solve one task, a scenario ({'name', 'deltas'}) with its mode, time_limit and strategy options"""
+    options = {key: task[key] for key in STRATEGY_OPTIONS if task.get(key) is not None}
+    mode = task.get('mode', 'greedy')
+    result = solve_scenario(compiled, task, mode, task.get('time_limit', 30), **options)
+    result['strategy'] = {'mode': mode, **options}
+    return result
+
+
+def portfolio_strategies(modes=('greedy',), heuristics=('course_aware',), value_orders=('cost',),
+                         restarts=('none',), seeds=(None,)):
+    """Every combination of the given strategy settings, named after its settings"""
+    strategies = []
+    for mode, heuristic, value_order, schedule, seed in itertools.product(modes, heuristics, value_orders,
+                                                                         restarts, seeds):
+        # Unknown settings raise ValueError here rather than failing every run on the workers
+        TimetableSolver(None, mode=mode, heuristic=heuristic, value_order=value_order, restarts=schedule, seed=seed)
+        name = '/'.join([mode, heuristic, value_order] + ([f"restarts={schedule}"] if schedule != 'none' else [])
+                        + ([f"seed={seed}"] if seed is not None else []))
+        strategies.append({'name': name, 'mode': mode, 'heuristic': heuristic, 'value_order': value_order,
+                           'restarts': schedule, 'seed': seed})
+    return strategies
+
+
+def best_result(results):
+    """Solved result with the lowest quality score (then the fastest), or None"""
+    solved = [result for result in results if result.get('status') == 'solved']
+    if not solved:
+        return None
+    return min(solved, key=lambda result: ((result.get('quality') or {}).get('score', float('inf')),
+                                           result.get('solve_s', 0.0)))
+
+
+def _job_process(compiled, task, connection):
+    try:
+        connection.send(run_task(compiled, task))
+    finally:
+        connection.close()
+
+
+class SolverWorker:
+    """Solves tasks for Coordinators over HTTP, each in a process forked for it
+
+    Endpoints (JSON bodies):
+      GET    /health           heartbeat: slots, running jobs and compiled datasets
+      PUT    /datasets/<key>   dataset tables, compiled once and kept (least recently used dropped)
+      POST   /jobs             {'dataset': key, 'task': {...}} -> 202 {'id'}; 404 unknown dataset, 503 full
+      GET    /jobs/<id>        {'status': 'running'} or {'status': 'done', 'result': {...}}, handed out once
+      DELETE /jobs/<id>        cancel a job
+    Forked jobs keep the heartbeat answering however long a solve takes. Without fork
+    (e.g. on Windows) jobs run in threads and cannot be cancelled.
+    """
+
+    def __init__(self, host='127.0.0.1', port=5100, slots=None, token=None, max_datasets=4):
+        self.host = host
+        self.port = port
+        self.slots = max(1, slots or os.cpu_count() or 1)
+        self.token = token
+        self.max_datasets = max_datasets
+        self.datasets = OrderedDict()  # key -> CompiledModel, least recently used first
+        self.jobs = {}  # id -> {'name', 'process', 'cancelled', 'result', 'finished'}
+        self.completed = 0
+        self.started = time.time()
+        self.server = None
+        self._lock = threading.Lock()
+
+    def bind(self):
+        """Open the listening socket (port 0 picks a free one); returns (host, port)"""
+        handler = type('Handler', (_WorkerHandler,), {'worker': self})
+        self.server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.port = self.server.server_address[1]
+        return self.host, self.port
+
+    def serve_forever(self):
+        if self.server is None:
+            self.bind()
+        print(f"🛠️ Solver worker on http://{self.host}:{self.port} with {self.slots} slot(s)")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        with self._lock:
+            for job in self.jobs.values():
+                job['cancelled'] = True
+                if job['process'] is not None:
+                    job['process'].terminate()
+        if self.server is not None:
+            self.server.server_close()
+
+    def handle(self, method, path, payload, token=None):
+        """(HTTP status, JSON reply) for one request"""
+        if self.token and token != self.token:
+            return 403, {'error': 'Missing or wrong cluster token'}
+        parts = [part for part in path.split('?', 1)[0].split('/') if part]
+        if method == 'GET' and parts == ['health']:
+            return 200, self.health()
+        if method == 'PUT' and len(parts) == 2 and parts[0] == 'datasets':
+            if not isinstance(payload, dict):
+                return 400, {'error': 'Send the dataset tables as a JSON object'}
+            return self.add_dataset(parts[1], payload)
+        if method == 'POST' and parts == ['jobs']:
+            if not isinstance(payload, dict) or not isinstance(payload.get('task'), dict):
+                return 400, {'error': "Send {'dataset': key, 'task': {...}}"}
+            return self.submit(payload.get('dataset'), payload['task'])
+        if len(parts) == 2 and parts[0] == 'jobs':
+            if method == 'GET':
+                return self.poll(parts[1])
+            if method == 'DELETE':
+                return self.cancel(parts[1])
+        return 404, {'error': f"No endpoint {method} {path}"}
+
+    def health(self):
+        with self._lock:
+            now = time.time()
+            for job_id in [job_id for job_id, job in self.jobs.items()
+                           if job['result'] is not None and now - job['finished'] > RESULT_TTL_S]:
+                del self.jobs[job_id]
+            running = [job['name'] for job in self.jobs.values() if job['result'] is None]
+            return {'status': 'ok', 'slots': self.slots, 'running': running, 'completed': self.completed,
+                    'datasets': list(self.datasets), 'uptime_s': round(now - self.started, 1)}
+
+    def add_dataset(self, key, data):
+        try:
+            compiled = compile_dataset(data)
+        except Exception as e:
+            return 400, {'error': f"Could not compile dataset: {type(e).__name__}: {e}"}
+        with self._lock:
+            self.datasets[key] = compiled
+            self.datasets.move_to_end(key)
+            while len(self.datasets) > self.max_datasets:
+                self.datasets.popitem(last=False)
+        return 201, {'dataset': key}
+
+    def submit(self, key, task):
+        with self._lock:
+            compiled = self.datasets.get(key)
+            if compiled is None:
+                return 404, {'error': f"Unknown dataset '{key}'; upload it first"}
+            self.datasets.move_to_end(key)
+            if sum(1 for job in self.jobs.values() if job['result'] is None) >= self.slots:
+                return 503, {'error': 'Every slot is busy'}
+            job_id = uuid.uuid4().hex[:12]
+            job = self.jobs[job_id] = {'name': task.get('name'), 'process': None, 'cancelled': False,
+                                       'result': None, 'finished': None}
+        threading.Thread(target=self._run, args=(job, compiled, task), daemon=True).start()
+        return 202, {'id': job_id}
+
+    def poll(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return 404, {'error': f"Unknown job '{job_id}'"}
+            if job['result'] is None:
+                return 200, {'status': 'running'}
+            del self.jobs[job_id]
+            return 200, {'status': 'done', 'result': job['result']}
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self.jobs.pop(job_id, None)
+            if job is None:
+                return 404, {'error': f"Unknown job '{job_id}'"}
+            job['cancelled'] = True
+            if job['process'] is not None:
+                job['process'].terminate()
+        return 200, {'id': job_id, 'status': 'cancelled'}
+
+    def _run(self, job, compiled, task):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            result = run_task(compiled, task)
+        else:
+            context = multiprocessing.get_context('fork')
+            receiver, sender = context.Pipe(duplex=False)
+            # Forked with the compiled model already in memory, like ScenarioRunner's workers
+            process = context.Process(target=_job_process, args=(compiled, task, sender), daemon=True)
+            with self._lock:
+                if job['cancelled']:
+                    return
+                process.start()
+                job['process'] = process
+            sender.close()
+            try:
+                result = receiver.recv()
+            except EOFError:
+                process.join()
+                result = failed_result(task, f"Job process exited with code {process.exitcode}")
+            receiver.close()
+        with self._lock:
+            job['process'] = None
+            job['result'] = result
+            job['finished'] = time.time()
+            if not job['cancelled']:
+                self.completed += 1
+        if 'fork' in multiprocessing.get_all_start_methods():
+            process.join()  # after handing the result over, as tearing down a large process takes a while
+
+
+class _WorkerHandler(BaseHTTPRequestHandler):
+    worker = None  # set on a subclass per SolverWorker
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length)) if length else None
+        except ValueError:
+            status, reply = 400, {'error': 'Request body is not valid JSON'}
+        else:
+            status, reply = self.worker.handle(self.command, self.path, payload, self.headers.get(TOKEN_HEADER))
+        body = json.dumps(reply).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _respond
+
+    def log_message(self, format, *args):
+        pass  # a line per heartbeat would drown everything else
+
+
+class WorkerLost(Exception):
+    """A worker could not be reached"""
+
+
+class JobLost(WorkerLost):
+    """A worker died or restarted while running a job"""
+
+
+class _RemoteWorker:
+    """Coordinator-side state of one worker"""
+
+    def __init__(self, address, token, timeout):
+        host, _, port = address.rpartition(':')
+        self.address = address
+        self.url = f"http://{host}:{int(port)}"
+        self.token = token
+        self.timeout = timeout
+        self.alive = False
+        self.generation = 0  # bumped each time it (re)joins; older dispatch threads then stop
+        self.misses = 0  # failed requests in a row
+        self.slots = 1
+        self.datasets = set()  # keys uploaded to it
+        self.completed = 0
+        self.lost_tasks = 0
+
+    def request(self, method, path, payload=None, timeout=None):
+        """(status, JSON reply); raises WorkerLost when the worker cannot be reached"""
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = Request(self.url + path, data=body, method=method, headers=headers)
+        try:
+            with urlopen(request, timeout=timeout or self.timeout) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except HTTPError as e:
+            try:
+                reply = json.loads(e.read() or b'null')
+            except ValueError:
+                reply = None
+            return e.code, reply or {}
+        except (URLError, OSError, ValueError, http.client.HTTPException) as e:
+            raise WorkerLost(f"{self.address}: {getattr(e, 'reason', None) or e}")
+
+
+class Coordinator:
+    """Runs solve tasks on remote SolverWorkers, and in this process once none is left
+
+    Each live worker gets as many tasks at a time as it has slots. A heartbeat thread pings
+    every worker each `heartbeat_s`; a worker that fails `heartbeat_misses` requests in a
+    row, or forgets a job (it restarted), is dead and its tasks go back on the queue for the
+    others. A task is given up after `max_attempts` workers died running it, and a dead
+    worker that answers again rejoins. With `local_fallback`, tasks left while no worker is
+    alive are solved here, one at a time. One run at a time per Coordinator.
+    """
+
+    def __init__(self, workers, token=None, heartbeat_s=1.0, heartbeat_misses=3, poll_s=0.25,
+                 max_attempts=2, local_fallback=True, request_timeout=10.0, upload_timeout=300.0):
+        self.workers = [_RemoteWorker(address, token, request_timeout) for address in workers]
+        self.heartbeat_s = heartbeat_s
+        self.heartbeat_misses = heartbeat_misses
+        self.poll_s = poll_s
+        self.max_attempts = max_attempts
+        self.local_fallback = local_fallback
+        self.upload_timeout = upload_timeout
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._threads = []
+        self._started = False
+
+    def stats(self):
+        return [{'worker': worker.address, 'alive': worker.alive, 'slots': worker.slots,
+                 'completed': worker.completed, 'lost_tasks': worker.lost_tasks} for worker in self.workers]
+
+    def run(self, compiled, tasks, first_solved=False, progress=None):
+        """Results of solving each task on `compiled`, in order
+
+        A task is a scenario ({'name', 'deltas'}) with optional mode, time_limit and
+        strategy options (STRATEGY_OPTIONS). Results are solve_scenario's, with the
+        'strategy', the 'worker' that solved it (or 'local') and its 'attempts'. With
+        `first_solved` the run stops at the first solved task; unfinished tasks are
+        cancelled. `progress` is called with each result as it arrives.
+        """
+        self._compiled = compiled
+        self._data = compiled.data
+        self._key = dataset_key(compiled.data)
+        self._tasks = [dict(task, name=task.get('name') or f"task-{index}") for index, task in enumerate(tasks, 1)]
+        self._results = [None] * len(tasks)
+        self._remaining = len(tasks)
+        self._first_solved = first_solved
+        self._progress = progress
+        self._queue = queue.Queue()
+        self._finished = threading.Event()
+        self._threads = []
+        self._started = False
+        for index in range(len(tasks)):
+            self._queue.put((index, 0))
+
+        for worker in self.workers:
+            worker.alive = False  # dispatch threads start when it answers
+            worker.misses = 0
+            self._ping(worker)
+        if self.workers and not any(worker.alive for worker in self.workers):
+            print(f"⚠️ None of {len(self.workers)} worker(s) answered"
+                  + ("; solving here" if self.local_fallback else ""))
+        self._started = True
+        self._start_thread(self._heartbeat)
+
+        while True:
+            with self._done:
+                if self._remaining == 0 or self._finished.is_set():
+                    break
+                if any(worker.alive for worker in self.workers):
+                    self._done.wait(self.poll_s)
+                    continue
+            try:
+                index, attempts = self._queue.get_nowait()
+            except queue.Empty:
+                # Only tasks still being given up by dead workers' threads are left
+                time.sleep(self.poll_s)
+                continue
+            if self.local_fallback:
+                self._finish(index, run_task(compiled, self._tasks[index]), 'local', attempts + 1)
+            else:
+                self._finish(index, failed_result(self._tasks[index], 'No worker is alive'), None, attempts)
+
+        self._finished.set()
+        for thread in self._threads:
+            thread.join(self.upload_timeout)
+        for index, result in enumerate(self._results):
+            if result is None:
+                self._results[index] = failed_result(self._tasks[index], 'Another task solved first', 'cancelled')
+        return self._results
+
+    def portfolio(self, compiled, strategies, time_limit=30, deltas=(), first_solved=False, progress=None):
+        """{'best': best_result of the runs, 'runs': a result per strategy}"""
+        tasks = [dict(strategy, deltas=list(deltas), time_limit=time_limit) for strategy in strategies]
+        runs = self.run(compiled, tasks, first_solved=first_solved, progress=progress)
+        return {'best': best_result(runs), 'runs': runs}
+
+    def _start_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _heartbeat(self):
+        while not self._finished.wait(self.heartbeat_s):
+            for worker in self.workers:
+                self._ping(worker)
+
+    def _ping(self, worker):
+        try:
+            status, reply = worker.request('GET', '/health', timeout=max(self.heartbeat_s, 1.0))
+        except WorkerLost as e:
+            self._missed(worker, str(e))
+            return
+        if status != 200:
+            self._missed(worker, f"{worker.address}: health check answered {status} {reply.get('error', '')}")
+            return
+        with self._lock:
+            worker.misses = 0
+            worker.slots = max(1, int(reply.get('slots', 1)))
+            worker.datasets &= set(reply.get('datasets', []))
+            if not worker.alive and not self._finished.is_set():
+                if self._started:
+                    print(f"🔌 Worker {worker.address} is back")
+                worker.alive = True
+                worker.generation += 1
+                for _ in range(worker.slots):
+                    self._start_thread(self._dispatch, worker, worker.generation)
+
+    def _missed(self, worker, reason):
+        with self._lock:
+            worker.misses += 1
+            if worker.alive and worker.misses >= self.heartbeat_misses:
+                worker.alive = False
+                print(f"⚠️ Worker {reason}; its tasks go back on the queue")
+
+    def _dispatch(self, worker, generation):
+        # A worker that died and rejoined has new threads, so this one stops after its job
+        while worker.alive and worker.generation == generation and not self._finished.is_set():
+            try:
+                index, attempts = self._queue.get(timeout=self.poll_s)
+            except queue.Empty:
+                continue
+            try:
+                result = self._run_remote(worker, self._tasks[index])
+            except JobLost as e:
+                worker.lost_tasks += 1
+                if attempts + 1 >= self.max_attempts:
+                    self._finish(index, failed_result(self._tasks[index], f"Lost with {attempts + 1} worker(s), "
+                                                                          f"last {e}"), worker.address, attempts + 1)
+                else:
+                    self._queue.put((index, attempts + 1))
+                continue
+            except WorkerLost as e:
+                # Never started there, so it costs the task no attempt
+                self._missed(worker, str(e))
+                self._queue.put((index, attempts))
+                time.sleep(self.poll_s)
+                continue
+            if result is None:
+                if not self._finished.is_set():
+                    self._queue.put((index, attempts))  # the worker was busy; try again later
+                    time.sleep(self.poll_s)
+                continue
+            worker.completed += 1
+            self._finish(index, result, worker.address, attempts + 1)
+
+    def _run_remote(self, worker, task):
+        """Result of `task` on `worker`, or None when it was busy or the run finished first"""
+        if self._key not in worker.datasets:
+            self._upload(worker)
+        status, reply = worker.request('POST', '/jobs', {'dataset': self._key, 'task': task})
+        if status == 404:
+            # The worker restarted or dropped the dataset since
+            self._upload(worker)
+            status, reply = worker.request('POST', '/jobs', {'dataset': self._key, 'task': task})
+        if status == 503:
+            return None
+        if status != 202:
+            raise WorkerLost(f"{worker.address} refused a job: {status} {reply.get('error', '')}")
+
+        job_id = reply['id']
+        while True:
+            time.sleep(self.poll_s)
+            if self._finished.is_set():
+                with contextlib.suppress(WorkerLost):
+                    worker.request('DELETE', f"/jobs/{job_id}")
+                return None
+            if not worker.alive:
+                raise JobLost(f"{worker.address} stopped answering")
+            try:
+                status, reply = worker.request('GET', f"/jobs/{job_id}")
+            except WorkerLost as e:
+                self._missed(worker, str(e))
+                continue
+            worker.misses = 0
+            if status == 404:
+                raise JobLost(f"{worker.address} lost job {job_id}")
+            if reply.get('status') == 'done':
+                return reply['result']
+
+    def _upload(self, worker):
+        status, reply = worker.request('PUT', f"/datasets/{self._key}", self._data, timeout=self.upload_timeout)
+        if status != 201:
+            raise WorkerLost(f"{worker.address} could not take the dataset: {status} {reply.get('error', '')}")
+        worker.datasets.add(self._key)
+
+    def _finish(self, index, result, worker, attempts):
+        with self._done:
+            if self._results[index] is not None or self._finished.is_set():
+                return
+            result['worker'] = worker
+            result['attempts'] = attempts
+            self._results[index] = result
+            self._remaining -= 1
+            if self._first_solved and result.get('status') == 'solved':
+                self._finished.set()
+            self._done.notify_all()
+        if self._progress:
+            self._progress(result)
+
+
+class DistributedScenarioRunner(ScenarioRunner):
+    """ScenarioRunner solving the base and its scenarios on a Coordinator's workers"""
+
+    def __init__(self, compiled, coordinator, mode='greedy', time_limit=30):
+        super().__init__(compiled, mode=mode, time_limit=time_limit, jobs=1)
+        self.coordinator = coordinator
+
+    def solve_tasks(self, tasks):
+        return self.coordinator.run(self.compiled, [dict(task, mode=self.mode, time_limit=self.time_limit)
+                                                    for task in tasks])
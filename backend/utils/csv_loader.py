@@ -6,12 +6,29 @@ Loads and validates CSV data files
 import csv
 import os
 
+from csp.records import base_course_of
+
 
 class CSVDataLoader:
     """Loads CSV data files for timetable generation"""
     
-    def __init__(self, data_dir='data'):
+    def __init__(self, data_dir='data', cache=False):
         self.data_dir = data_dir
+        # When caching, each file is parsed once and the rows are shared by all callers
+        self._cache = {} if cache else None
+    
+    def clear_cache(self):
+        """Forget cached rows so the next load re-reads the files"""
+        if self._cache is not None:
+            self._cache.clear()
+    
+    def get_source_files(self):
+        """Paths of the CSV files this loader reads from (existing files only)"""
+        if not os.path.isdir(self.data_dir):
+            return []
+        return [os.path.join(self.data_dir, filename)
+                for filename in sorted(os.listdir(self.data_dir))
+                if filename.lower().endswith('.csv')]
     
     def load_courses(self):
         """Load courses from CSV file"""
@@ -33,70 +50,88 @@ class CSVDataLoader:
         """Load timeslots from CSV file"""
         return self._load_csv_flexible('timeslots.csv')
     
+    def load_pins(self):
+        """Load pinned assignments from the optional pins.csv (none without one)"""
+        if not self._candidate_paths('pins.csv'):
+            return []
+        return self._load_csv_flexible('pins.csv')
+    
+    def load_enrollments(self):
+        """Load elective enrollments from the optional enrollments.csv (none without one)"""
+        if not self._candidate_paths('enrollments.csv'):
+            return []
+        return self._load_csv_flexible('enrollments.csv')
+    
     def _load_csv_flexible(self, *possible_filenames):
         """Load CSV with flexible filename matching"""
+        if self._cache is not None:
+            if possible_filenames not in self._cache:
+                self._cache[possible_filenames] = self._find_and_load_csv(*possible_filenames)
+            return self._cache[possible_filenames]
+        return self._find_and_load_csv(*possible_filenames)
+    
+    def _candidate_paths(self, *possible_filenames):
+        """Existing files matching the candidate names in any letter case, exact spellings first"""
+        if not os.path.isdir(self.data_dir):
+            return []
+        present = sorted(os.listdir(self.data_dir))
+        paths = []
         for filename in possible_filenames:
-            file_path = os.path.join(self.data_dir, filename)
-            if os.path.exists(file_path):
-                return self._load_csv(file_path)
+            matches = [name for name in present if name.lower() == filename.lower()]
+            matches.sort(key=lambda name: name != filename)
+            paths += [os.path.join(self.data_dir, name) for name in matches
+                      if os.path.join(self.data_dir, name) not in paths]
+        return paths
+    
+    def _find_and_load_csv(self, *possible_filenames):
+        """Load the first of the candidate files that has rows
         
-        # Also try capitalized versions
-        for filename in possible_filenames:
-            capitalized = filename.replace('.csv', '').capitalize() + '.csv'
-            file_path = os.path.join(self.data_dir, capitalized)
-            if os.path.exists(file_path):
-                return self._load_csv(file_path)
+        Names match in any letter case, and an empty file (such as a stray courses.csv next
+        to Courses.csv on a case-sensitive filesystem) does not shadow a later candidate.
+        """
+        paths = self._candidate_paths(*possible_filenames)
+        for file_path in paths:
+            rows = self._load_csv(file_path)
+            if rows:
+                return rows
         
-        print(f"Warning: None of {possible_filenames} found")
+        if paths:
+            print(f"Warning: {[os.path.basename(path) for path in paths]} have no rows")
+        else:
+            print(f"Warning: None of {possible_filenames} found")
         return []
     
     def _load_csv(self, file_path):
-        """Generic CSV loader"""
+        """Generic CSV loader, with a byte order mark dropped and names and values stripped"""
         if not os.path.exists(file_path):
             print(f"Warning: {file_path} not found")
             return []
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                # Try UTF-8 first, fallback to other encodings if needed
-                reader = csv.DictReader(file)
-                data = list(reader)
-                
-                # Clean up any BOM characters
-                if data and data[0]:
-                    first_key = list(data[0].keys())[0]
-                    if first_key.startswith('\ufeff'):
-                        # Remove BOM from first column name
-                        clean_key = first_key.replace('\ufeff', '')
-                        for row in data:
-                            row[clean_key] = row.pop(first_key)
-                
-                return data
-                
-        except UnicodeDecodeError:
-            # Try with different encoding
+        # UTF-8 first (utf-8-sig drops a BOM), then the Windows code page Excel saves in
+        for encoding in ('utf-8-sig', 'cp1252'):
             try:
-                with open(file_path, 'r', encoding='cp1252') as file:
-                    reader = csv.DictReader(file)
-                    return list(reader)
+                with open(file_path, 'r', encoding=encoding, newline='') as file:
+                    rows = list(csv.DictReader(file))
+                break
+            except UnicodeDecodeError:
+                continue
             except Exception as e:
                 print(f"Error loading {file_path}: {e}")
                 return []
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
+        else:
+            print(f"Error loading {file_path}: not UTF-8 or cp1252 text")
             return []
+        
+        # Cells past the header's columns are collected under None by DictReader; drop them
+        return [{key.strip().lstrip('\ufeff'): value.strip() if isinstance(value, str) else value
+                 for key, value in row.items() if key is not None}
+                for row in rows]
     
     def get_data_summary(self):
         """Get summary of loaded data"""
-        # Count unique base courses (remove L/B/T suffixes)
+        # Count unique base courses (CSC 111L, CSC 111B and CSC 111T are one course)
         courses = self.load_courses()
-        unique_courses = set()
-        
-        for course in courses:
-            course_id = course.get('course_id', '')
-            # Remove L/B/T suffix to get base course ID
-            base_course_id = course_id.rstrip('LBT')
-            unique_courses.add(base_course_id)
+        unique_courses = {base_course_of(course.get('course_id', '')) for course in courses}
         
         return {
             'courses': len(unique_courses),
@@ -0,0 +1,105 @@
+"""
+Dataset Watcher for Timetable CSP
+Polls the registry's dataset directories and recompiles edited datasets in the background,
+so requests start from a warm model of the current files
+"""
+
+import os
+import threading
+import time
+
+
+DEFAULT_INTERVAL_S = 2.0
+
+
+class DatasetWatcher:
+    """Background thread that rebuilds compiled datasets whose CSV files change
+
+    Every `interval` seconds it compares each compiled dataset's file signature (path,
+    mtime and size of every CSV) with the one its model was built from. A change is
+    rebuilt once the files look the same on two polls in a row, so a coordinator saving
+    several files is compiled once, after the last save. Datasets that are not compiled
+    are left to the registry's lazy loading. Polling needs nothing beyond the standard
+    library and behaves the same on every platform and network drive.
+
+    `start(thread=False)` leaves the polling to the caller, as the prefork server's
+    parent does so that it can re-fork its workers from the rebuilt models.
+    """
+
+    def __init__(self, registry, interval=DEFAULT_INTERVAL_S):
+        self.registry = registry
+        self.interval = interval
+        self._pending = {}  # dataset name -> signature seen on the previous poll
+        self._failed = {}   # dataset name -> signature that did not compile
+        self._stop = threading.Event()
+        self._thread = None
+        self.running = False
+        self.pid = None  # process that polls
+        self.polls = 0
+        self.last_poll = None
+
+    def start(self, thread=True):
+        """Start watching; the registry then keeps models until they are rebuilt"""
+        if self.running:
+            return
+        self.registry.watched = True
+        self.running = True
+        self.pid = os.getpid()
+        if thread:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='dataset-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.running = False
+        self.registry.watched = False
+
+    def poll(self):
+        """Check every compiled dataset once; returns the names rebuilt"""
+        rebuilt = []
+        for name in self.registry.names():
+            entry = self.registry.get_entry(name)
+            if not entry.is_loaded:
+                self._pending.pop(name, None)
+                continue
+            signature = entry.source_signature()
+            if signature == entry.signature or signature == self._failed.get(name):
+                self._pending.pop(name, None)
+                continue
+            if self._pending.get(name) != signature:
+                # Still being written, or the first poll to see the change
+                self._pending[name] = signature
+                continue
+            try:
+                if self.registry.rebuild(name):
+                    rebuilt.append(name)
+                    self._pending.pop(name, None)
+                    self._failed.pop(name, None)
+            except Exception as e:
+                # The previous model keeps serving until the files are edited again
+                print(f"⚠️ Dataset '{name}' changed but does not compile, keeping the previous model: {e}")
+                self._pending.pop(name, None)
+                self._failed[name] = signature
+        self.polls += 1
+        self.last_poll = time.time()
+        return rebuilt
+
+    def status(self):
+        return {
+            'interval_s': self.interval,
+            'running': self.running,
+            'pid': self.pid,
+            'polls': self.polls,
+            'last_poll': self.last_poll
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️ Dataset watcher poll failed: {e}")
@@ -0,0 +1,264 @@
+"""
+Dataset Registry for Timetable CSP
+Pools loaded data and compiled models for several dataset directories with LRU eviction
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.csv_loader import CSVDataLoader
+
+
+DEFAULT_DATASET = 'default'
+
+
+class UnknownDatasetError(KeyError):
+    """Raised when a request names a dataset that is not registered"""
+
+
+class DatasetEntry:
+    """One dataset directory with its cached rows and compiled model"""
+
+    def __init__(self, name, data_dir):
+        self.name = name
+        self.data_dir = data_dir
+        self.loader = CSVDataLoader(data_dir, cache=True)
+        self.compiled = None
+        self.feasibility = None
+        self.size_bytes = 0
+        self.signature = None
+        self.last_used = None
+        self.hits = 0
+        self.rebuild_error = None  # why the files on disk last failed to compile in the background
+        self.watched = False  # whether the model is kept until a watcher replaces it (see DatasetRegistry.watched)
+        self.lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        return self.compiled is not None
+
+    def source_signature(self):
+        """(path, mtime, size) of every CSV file, used to notice edits"""
+        signature = []
+        for path in self.loader.get_source_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def unload(self):
+        """Drop cached rows and the compiled model"""
+        self.loader.clear_cache()
+        self.compiled = None
+        self.feasibility = None
+        self.size_bytes = 0
+        self.signature = None
+
+    def status(self):
+        return {
+            'name': self.name,
+            'data_dir': self.data_dir,
+            'loaded': self.is_loaded,
+            'size_mb': round(self.size_bytes / (1024 * 1024), 2),
+            'variables': self.compiled.model.get_variable_count() if self.compiled else 0,
+            'hits': self.hits,
+            'last_used': self.last_used,
+            'compiled_at': self.compiled.compiled_at if self.compiled else None,
+            'rebuild_error': self.rebuild_error
+        }
+
+
+class DatasetRegistry:
+    """Named datasets served from one process, kept warm under a memory budget"""
+
+    def __init__(self, root_dir='data', memory_budget_mb=512):
+        self.root_dir = root_dir
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._entries = {}             # name -> DatasetEntry
+        self._loaded = OrderedDict()   # name -> DatasetEntry, least recently used first
+        self._lock = threading.RLock()
+        self.stats = {'hits': 0, 'misses': 0, 'reloads': 0, 'evictions': 0, 'rebuilds': 0, 'rebuild_failures': 0}
+        # With a DatasetWatcher, compiled models are replaced by rebuild() rather than
+        # dropped on the request path when their files change. Prefork workers mark only
+        # the entries their parent watches (DatasetEntry.watched) instead.
+        self.watched = False
+        self.discover()
+
+    def discover(self):
+        """Register the root directory as 'default' and each CSV subdirectory by its name"""
+        with self._lock:
+            if DEFAULT_DATASET not in self._entries:
+                self._entries[DEFAULT_DATASET] = DatasetEntry(DEFAULT_DATASET, self.root_dir)
+            if not os.path.isdir(self.root_dir):
+                return
+            for name in sorted(os.listdir(self.root_dir)):
+                path = os.path.join(self.root_dir, name)
+                if name in self._entries or not os.path.isdir(path):
+                    continue
+                if any(f.lower().endswith('.csv') for f in os.listdir(path)):
+                    self._entries[name] = DatasetEntry(name, path)
+
+    def register(self, name, data_dir):
+        """Register (or re-point) a dataset name at a data directory"""
+        self.evict(name)
+        with self._lock:
+            self._entries[name] = DatasetEntry(name, data_dir)
+            return self._entries[name]
+
+    def names(self):
+        with self._lock:
+            return list(self._entries)
+
+    def get_entry(self, name=None):
+        """Return the entry for a dataset name without loading it"""
+        name = name or DEFAULT_DATASET
+        with self._lock:
+            if name not in self._entries:
+                # Datasets added to disk after startup are picked up lazily
+                self.discover()
+            if name not in self._entries:
+                raise UnknownDatasetError(name)
+            return self._entries[name]
+
+    def get_loader(self, name=None):
+        """Caching data loader for a dataset"""
+        entry = self.get_entry(name)
+        with entry.lock:
+            self._refresh(entry)
+        return entry.loader
+
+    def get_feasibility(self, name=None):
+        """Feasibility report for a dataset, computed without compiling the model"""
+        from csp.csp_solver import TimetableSolver
+
+        entry = self.get_entry(name)
+        with entry.lock:
+            self._refresh(entry)
+            if entry.compiled is not None:
+                return entry.compiled.feasibility
+            if entry.feasibility is None:
+                entry.feasibility = TimetableSolver(entry.loader).analyze_feasibility()
+            return entry.feasibility
+
+    def get_compiled(self, name=None):
+        """Compiled model for a dataset, loading and compiling it on first use"""
+        # Imported here so the registry module does not pull in the solver at import time
+        from csp.csp_solver import TimetableSolver
+
+        entry = self.get_entry(name)
+        with entry.lock:
+            self._refresh(entry)
+            if entry.compiled is not None:
+                entry.hits += 1
+                self._touch(entry, hit=True)
+                return entry.compiled
+
+            start = time.time()
+            compiled = TimetableSolver(entry.loader).compile()
+            entry.compiled = compiled
+            entry.size_bytes = compiled.estimate_memory()
+            print(f"📦 Compiled dataset '{entry.name}' in {time.time() - start:.2f}s "
+                  f"(~{entry.size_bytes / (1024 * 1024):.1f} MB)")
+            self._touch(entry, hit=False)
+
+        self._enforce_budget(keep=entry.name)
+        return compiled
+
+    def rebuild(self, name):
+        """Compile a dataset's current files and swap them in at once; returns True if swapped
+
+        The compile runs without holding the entry's lock, so requests keep using the
+        previous model until the swap, which replaces rows, model and feasibility report
+        together. Errors (such as a SchemaError) propagate and leave the previous version.
+        Files edited again during the compile are left for the next call.
+        """
+        from csp.csp_solver import TimetableSolver
+
+        entry = self.get_entry(name)
+        signature = entry.source_signature()
+        loader = CSVDataLoader(entry.data_dir, cache=True)
+        start = time.time()
+        try:
+            compiled = TimetableSolver(loader).compile()
+        except Exception as e:
+            entry.rebuild_error = str(e)
+            self.stats['rebuild_failures'] += 1
+            raise
+        if entry.source_signature() != signature:
+            return False
+
+        with entry.lock:
+            entry.loader = loader
+            entry.compiled = compiled
+            entry.feasibility = compiled.feasibility
+            entry.size_bytes = compiled.estimate_memory()
+            entry.signature = signature
+            entry.rebuild_error = None
+        with self._lock:
+            self.stats['rebuilds'] += 1
+            self._loaded[entry.name] = entry
+            self._loaded.move_to_end(entry.name)
+        print(f"🔄 Recompiled dataset '{entry.name}' in the background in {time.time() - start:.2f}s")
+        self._enforce_budget(keep=entry.name)
+        return True
+
+    def evict(self, name):
+        """Unload one dataset from memory"""
+        with self._lock:
+            entry = self._loaded.pop(name, None)
+        if entry is not None:
+            with entry.lock:
+                entry.unload()
+            self.stats['evictions'] += 1
+            print(f"🗑️ Evicted dataset '{name}' from memory")
+
+    def memory_in_use(self):
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._loaded.values())
+
+    def status(self):
+        with self._lock:
+            return {
+                'memory_budget_mb': round(self.memory_budget / (1024 * 1024), 2),
+                'memory_in_use_mb': round(self.memory_in_use() / (1024 * 1024), 2),
+                'stats': dict(self.stats),
+                'datasets': [entry.status() for entry in self._entries.values()]
+            }
+
+    def _refresh(self, entry):
+        """Drop cached rows and model if the dataset's files changed (caller holds entry.lock)
+
+        A watched registry or entry keeps a compiled model until the watcher rebuilds it.
+        """
+        if (self.watched or entry.watched) and entry.compiled is not None:
+            return
+        signature = entry.source_signature()
+        if entry.signature is not None and signature != entry.signature:
+            if entry.compiled is not None:
+                print(f"🔄 Dataset '{entry.name}' changed on disk, reloading")
+                self.stats['reloads'] += 1
+            entry.unload()
+        entry.signature = signature
+
+    def _touch(self, entry, hit):
+        with self._lock:
+            self.stats['hits' if hit else 'misses'] += 1
+            entry.last_used = time.time()
+            self._loaded[entry.name] = entry
+            self._loaded.move_to_end(entry.name)
+
+    def _enforce_budget(self, keep):
+        """Evict least recently used datasets until the pool fits the budget"""
+        while True:
+            with self._lock:
+                if self.memory_in_use() <= self.memory_budget:
+                    return
+                victims = [name for name in self._loaded if name != keep]
+            if not victims:
+                # A single dataset larger than the budget stays loaded
+                return
+            self.evict(victims[0])
@@ -0,0 +1,387 @@
+"""
+Timetable Exporters
+Streams timetables as XLSX, CSV and iCalendar, one file or per-section/instructor/room in bulk
+"""
+
+import csv
+import datetime
+import hashlib
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from csp.records import parse_sections
+
+
+DAY_ORDER = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+# (timetable entry key, column header)
+EXPORT_COLUMNS = [
+    ('year', 'Year'),
+    ('sections', 'Sections'),
+    ('course_id', 'Course ID'),
+    ('course_name', 'Course Name'),
+    ('session_type', 'Type'),
+    ('day', 'Day'),
+    ('start_time', 'Start'),
+    ('end_time', 'End'),
+    ('room', 'Room'),
+    ('instructor', 'Instructor'),
+    ('duration', 'Duration'),
+]
+
+EXPORT_FORMATS = ('xlsx', 'csv', 'ics')
+EXPORT_GROUPINGS = ('section', 'instructor', 'room')
+
+_CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_HEADER_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_SHEET_FOOTER_XML = '</sheetData></worksheet>'
+
+# Characters XML 1.0 does not allow inside a worksheet
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class _StreamSink(io.RawIOBase):
+    """Unseekable write target that hands written bytes back in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        """Return and forget everything written since the last drain"""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class TimetableExporter:
+    """Writes timetable entries to CSV, XLSX and ICS files"""
+
+    def __init__(self, sections=None, timeslots=None, term_start=None, weeks=14):
+        self.weeks = weeks
+        self.term_start = term_start or self._next_sunday(datetime.date.today())
+
+        # (year, group) -> section ids, to expand group lectures per section
+        self.group_sections = {}
+        for section in parse_sections(sections or []):
+            self.group_sections.setdefault((section.year, section.group), []).append(section.section)
+
+        # "Sunday 9:00 AM" -> (start, end) as datetime.time
+        self.slot_times = {}
+        for timeslot in timeslots or []:
+            start = self._parse_time(timeslot['StartTime'])
+            end = self._parse_time(timeslot['EndTime'])
+            self.slot_times[f"{timeslot['Day']} {timeslot['StartTime']}"] = (start, end)
+
+    # ------------------------------------------------------------------
+    # Single-file writers
+    # ------------------------------------------------------------------
+
+    def write_csv(self, entries, stream):
+        """Write entries as CSV to a binary stream"""
+        text = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True)
+        try:
+            writer = csv.writer(text)
+            writer.writerow([header for _, header in EXPORT_COLUMNS])
+            for row in self._iter_rows(entries):
+                writer.writerow(row)
+        finally:
+            # Leave the underlying stream open for the caller
+            text.detach()
+
+    def write_xlsx(self, entries, stream, sheet_name='Timetable'):
+        """Write entries as a single-sheet XLSX workbook to a binary stream"""
+        sheet_name = re.sub(r'[\[\]:*?/\\]', ' ', sheet_name)[:31] or 'Timetable'
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as workbook:
+            workbook.writestr('[Content_Types].xml', _CONTENT_TYPES_XML)
+            workbook.writestr('_rels/.rels', _ROOT_RELS_XML)
+            workbook.writestr('xl/workbook.xml', _WORKBOOK_XML.format(sheet_name=escape(sheet_name, {'"': '&quot;'})))
+            workbook.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS_XML)
+
+            # Rows are written one by one so the sheet never exists as a whole string
+            with workbook.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+                sheet.write(_SHEET_HEADER_XML.encode('utf-8'))
+                sheet.write(self._xlsx_row(1, [header for _, header in EXPORT_COLUMNS]))
+                for row_number, row in enumerate(self._iter_rows(entries), start=2):
+                    sheet.write(self._xlsx_row(row_number, row))
+                sheet.write(_SHEET_FOOTER_XML.encode('utf-8'))
+
+    def write_ics(self, entries, stream, calendar_name='Timetable'):
+        """Write entries as weekly recurring iCalendar events to a binary stream"""
+        stamp = datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+        self._write_ics_lines(stream, [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//Timetable CSP//Timetable Export//EN',
+            'CALSCALE:GREGORIAN',
+            f'X-WR-CALNAME:{self._ics_text(calendar_name)}',
+        ])
+        for entry in self._sorted(entries):
+            day, start, end = self._entry_times(entry)
+            first_date = self._first_date_for_day(day)
+            if first_date is None or start is None:
+                continue
+            start_dt = datetime.datetime.combine(first_date, start)
+            end_dt = datetime.datetime.combine(first_date, end)
+            uid_source = f"{entry.get('course_id')}|{entry.get('year')}|{entry.get('sections')}|{entry.get('day_time')}"
+            uid = hashlib.sha1(uid_source.encode('utf-8')).hexdigest()
+            summary = f"{entry.get('course_id', '')} {entry.get('course_name', '')} ({entry.get('session_type', '')})"
+            description = (f"Instructor: {entry.get('instructor', '')}\n"
+                           f"Year {entry.get('year', '')} {entry.get('sections', '')}")
+            self._write_ics_lines(stream, [
+                'BEGIN:VEVENT',
+                f'UID:{uid}@timetable-csp',
+                f'DTSTAMP:{stamp}',
+                f"DTSTART:{start_dt.strftime('%Y%m%dT%H%M%S')}",
+                f"DTEND:{end_dt.strftime('%Y%m%dT%H%M%S')}",
+                f'RRULE:FREQ=WEEKLY;COUNT={self.weeks}',
+                f'SUMMARY:{self._ics_text(summary.strip())}',
+                f"LOCATION:{self._ics_text(entry.get('room', ''))}",
+                f'DESCRIPTION:{self._ics_text(description)}',
+                'END:VEVENT',
+            ])
+        self._write_ics_lines(stream, ['END:VCALENDAR'])
+
+    def write(self, entries, stream, export_format, title='Timetable'):
+        """Write entries in the given format ('xlsx', 'csv' or 'ics')"""
+        if export_format == 'xlsx':
+            self.write_xlsx(entries, stream, sheet_name=title)
+        elif export_format == 'csv':
+            self.write_csv(entries, stream)
+        elif export_format == 'ics':
+            self.write_ics(entries, stream, calendar_name=title)
+        else:
+            raise ValueError(f"Unknown export format '{export_format}', expected one of {EXPORT_FORMATS}")
+
+    # ------------------------------------------------------------------
+    # Bulk export
+    # ------------------------------------------------------------------
+
+    def group_entries(self, timetable, grouping):
+        """Group entries per section, instructor or room: {label: [entries]}"""
+        groups = {}
+        for entry in timetable:
+            for label in self._group_labels(entry, grouping):
+                groups.setdefault(label, []).append(entry)
+        return dict(sorted(groups.items()))
+
+    def iter_archive(self, timetable, formats=EXPORT_FORMATS, groupings=EXPORT_GROUPINGS):
+        """Yield a zip archive of the timetable chunk by chunk, one file per group and format"""
+        self.validate_options(formats, groupings)
+        sink = _StreamSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for export_format in formats:
+                with archive.open(self._member_info(f'timetable.{export_format}'), 'w') as member:
+                    self.write(timetable, member, export_format)
+                yield sink.drain()
+
+            for grouping in groupings:
+                for label, entries in self.group_entries(timetable, grouping).items():
+                    name = f'{grouping}s/{self._safe_filename(label)}'
+                    for export_format in formats:
+                        with archive.open(self._member_info(f'{name}.{export_format}'), 'w') as member:
+                            self.write(entries, member, export_format, title=label)
+                        yield sink.drain()
+        yield sink.drain()
+
+    def write_archive(self, timetable, stream, formats=EXPORT_FORMATS, groupings=EXPORT_GROUPINGS):
+        """Write the bulk zip archive to a binary stream"""
+        for chunk in self.iter_archive(timetable, formats, groupings):
+            if chunk:
+                stream.write(chunk)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def validate_options(self, formats, groupings):
+        """Raise ValueError for unknown formats or groupings"""
+        unknown_formats = [f for f in formats if f not in EXPORT_FORMATS]
+        if unknown_formats:
+            raise ValueError(f"Unknown export formats {unknown_formats}, expected any of {EXPORT_FORMATS}")
+        unknown_groupings = [g for g in groupings if g not in EXPORT_GROUPINGS]
+        if unknown_groupings:
+            raise ValueError(f"Unknown groupings {unknown_groupings}, expected any of {EXPORT_GROUPINGS}")
+
+    def _group_labels(self, entry, grouping):
+        if grouping == 'instructor':
+            return [entry.get('instructor') or 'Unassigned']
+        if grouping == 'room':
+            return [entry.get('room') or 'Unassigned']
+
+        # Section grouping: a group lecture belongs to every section of the group
+        year = int(entry.get('year') or 0)
+        kind, _, number = str(entry.get('sections', '')).partition(' ')
+        if not number.isdigit():
+            return [f"Year {year} {entry.get('sections', '')}".strip()]
+        if kind == 'Group':
+            section_ids = self.group_sections.get((year, int(number)))
+            if not section_ids:
+                return [f'Year {year} Group {number}']
+            return [f'Year {year} Section {section_id}' for section_id in section_ids]
+        return [f'Year {year} Section {number}']
+
+    def _iter_rows(self, entries):
+        for entry in self._sorted(entries):
+            day, start, end = self._entry_times(entry)
+            values = dict(entry)
+            values['day'] = day
+            values['start_time'] = start.strftime('%H:%M') if start else ''
+            values['end_time'] = end.strftime('%H:%M') if end else ''
+            yield [values.get(key, '') for key, _ in EXPORT_COLUMNS]
+
+    def _sorted(self, entries):
+        def sort_key(entry):
+            day, start, _ = self._entry_times(entry)
+            day_index = DAY_ORDER.index(day) if day in DAY_ORDER else len(DAY_ORDER)
+            return (day_index, start or datetime.time.max, str(entry.get('course_id', '')))
+        return sorted(entries, key=sort_key)
+
+    def _entry_times(self, entry):
+        """Return (day, start, end) for an entry, halving the slot for tutorials
+
+        Entries that carry their own 'start' and 'end' (a tutorial's sub-slot) use those.
+        """
+        day_time = entry.get('day_time', '')
+        day, _, time_text = day_time.partition(' ')
+        if entry.get('start') and entry.get('end'):
+            try:
+                return day, self._parse_time(entry['start']), self._parse_time(entry['end'])
+            except ValueError:
+                pass
+        if day_time in self.slot_times:
+            start, end = self.slot_times[day_time]
+        else:
+            try:
+                start = self._parse_time(time_text)
+            except ValueError:
+                return day, None, None
+            end = (datetime.datetime.combine(datetime.date.min, start) + datetime.timedelta(minutes=90)).time()
+
+        duration = float(entry.get('duration') or 1.0)
+        if duration < 1.0:
+            start_dt = datetime.datetime.combine(datetime.date.min, start)
+            end_dt = datetime.datetime.combine(datetime.date.min, end)
+            end = (start_dt + (end_dt - start_dt) * duration).time()
+        return day, start, end
+
+    def _first_date_for_day(self, day):
+        if day not in DAY_ORDER:
+            return None
+        # DAY_ORDER starts on Sunday, date.weekday() on Monday
+        target = (DAY_ORDER.index(day) - 1) % 7
+        offset = (target - self.term_start.weekday()) % 7
+        return self.term_start + datetime.timedelta(days=offset)
+
+    def _xlsx_row(self, row_number, values):
+        cells = []
+        for column, value in enumerate(values):
+            ref = f'{self._column_letter(column)}{row_number}'
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+            else:
+                text = escape(_XML_INVALID.sub('', str(value)))
+                cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+        return f'<row r="{row_number}">{"".join(cells)}</row>'.encode('utf-8')
+
+    def _write_ics_lines(self, stream, lines):
+        stream.write(''.join(self._fold_ics_line(line) for line in lines).encode('utf-8'))
+
+    @staticmethod
+    def _fold_ics_line(line):
+        """Fold a content line at 75 octets as required by RFC 5545"""
+        encoded = line.encode('utf-8')
+        if len(encoded) <= 75:
+            return line + '\r\n'
+        parts = []
+        current = ''
+        limit = 75
+        for char in line:
+            if len((current + char).encode('utf-8')) > limit:
+                parts.append(current)
+                current = ''
+                limit = 74  # continuation lines start with a space
+            current += char
+        parts.append(current)
+        return '\r\n '.join(parts) + '\r\n'
+
+    @staticmethod
+    def _ics_text(value):
+        return (str(value).replace('\\', '\\\\').replace(';', '\\;')
+                .replace(',', '\\,').replace('\n', '\\n'))
+
+    @staticmethod
+    def _column_letter(index):
+        letters = ''
+        index += 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            letters = chr(65 + remainder) + letters
+        return letters
+
+    @staticmethod
+    def _member_info(name):
+        info = zipfile.ZipInfo(name, date_time=datetime.datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    @staticmethod
+    def _safe_filename(label):
+        return re.sub(r'[^\w.\- ]+', '_', str(label)).strip() or 'unnamed'
+
+    @staticmethod
+    def _parse_time(text):
+        return datetime.datetime.strptime(text.strip(), '%I:%M %p').time()
+
+    @staticmethod
+    def _next_sunday(date):
+        return date + datetime.timedelta(days=(6 - date.weekday()) % 7)
@@ -0,0 +1,252 @@
+"""
+Synthetic Instance Generator for Timetable CSP
+Writes reproducible CSV datasets in the loader's schemas for scale testing
+"""
+
+import csv
+import json
+import math
+import os
+import random
+
+
+DAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday']
+COURSE_PREFIXES = ['CSC', 'AID', 'CNC', 'MTH', 'PHY', 'ECE', 'CSE', 'ACM']
+
+# Students per session as counted by the room capacity constraints
+LECTURE_STUDENTS = 45
+SECTION_STUDENTS = 15
+
+
+class InstanceGenerator:
+    """Builds a random but solvable-by-construction department
+
+    Rooms and instructors are sized from the generated demand: `tightness` is
+    the fraction of the supply the demand uses (1.0 = no slack at all).
+    """
+
+    def __init__(self, years=4, groups_per_year=3, sections_per_group=3, courses_per_year=5,
+                 lab_ratio=0.7, tutorial_ratio=0.5, project_years=(4,), slots_per_day=4,
+                 qualification_density=2, tightness=0.5, seed=0):
+        if not 0 < tightness <= 1:
+            raise ValueError("tightness must be in (0, 1]")
+        if courses_per_year > 99 * len(COURSE_PREFIXES):
+            raise ValueError(f"courses_per_year must be at most {99 * len(COURSE_PREFIXES)}")
+        self.years = years
+        self.groups_per_year = groups_per_year
+        self.sections_per_group = sections_per_group
+        self.courses_per_year = courses_per_year
+        self.lab_ratio = lab_ratio
+        self.tutorial_ratio = tutorial_ratio
+        self.project_years = tuple(project_years)
+        self.slots_per_day = slots_per_day
+        self.qualification_density = max(1, qualification_density)
+        self.tightness = tightness
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    def parameters(self):
+        return {
+            'years': self.years,
+            'groups_per_year': self.groups_per_year,
+            'sections_per_group': self.sections_per_group,
+            'courses_per_year': self.courses_per_year,
+            'lab_ratio': self.lab_ratio,
+            'tutorial_ratio': self.tutorial_ratio,
+            'project_years': list(self.project_years),
+            'slots_per_day': self.slots_per_day,
+            'qualification_density': self.qualification_density,
+            'tightness': self.tightness,
+            'seed': self.seed
+        }
+
+    def generate(self):
+        """Return {'courses', 'sections', 'instructors', 'rooms', 'timeslots'} as lists of row dicts"""
+        self.random = random.Random(self.seed)
+        timeslots = self._generate_timeslots()
+        sections = self._generate_sections()
+        courses = self._generate_courses()
+        self._check_section_load(courses)
+        rooms = self._generate_rooms(courses)
+        instructors = self._generate_instructors(courses)
+        return {
+            'courses': courses,
+            'sections': sections,
+            'instructors': instructors,
+            'rooms': rooms,
+            'timeslots': timeslots
+        }
+
+    def write(self, output_dir):
+        """Generate the instance and write it as CSV files; returns row counts"""
+        data = self.generate()
+        os.makedirs(output_dir, exist_ok=True)
+        files = [
+            ('Courses.csv', ['course_id', 'course', 'type', 'Year'], data['courses']),
+            ('Sections.csv', ['section', 'group', 'year', 'student'], data['sections']),
+            ('Instructor.csv', ['instructor_id', 'name', 'role', 'qualifications'], data['instructors']),
+            ('Rooms.csv', ['room_id', 'type', 'capacity'], data['rooms']),
+            ('timeslots.csv', ['Day', 'StartTime', 'EndTime', 'TimeSlotID'], data['timeslots']),
+        ]
+        for filename, fieldnames, rows in files:
+            with open(os.path.join(output_dir, filename), 'w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(rows)
+
+        counts = {key: len(rows) for key, rows in data.items()}
+        with open(os.path.join(output_dir, 'instance.json'), 'w', encoding='utf-8') as file:
+            json.dump({'generator': self.parameters(), 'counts': counts}, file, indent=2)
+        return counts
+
+    # ------------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------------
+
+    def _generate_timeslots(self):
+        timeslots = []
+        for day in DAYS:
+            start = 9 * 60
+            for _ in range(self.slots_per_day):
+                # 90-minute slots with a 15-minute break, as in the bundled data
+                timeslots.append({
+                    'Day': day,
+                    'StartTime': self._format_time(start),
+                    'EndTime': self._format_time(start + 90),
+                    'TimeSlotID': f'TS{len(timeslots)}'
+                })
+                start += 105
+        return timeslots
+
+    def _generate_sections(self):
+        sections = []
+        for year in range(1, self.years + 1):
+            for index in range(self.groups_per_year * self.sections_per_group):
+                sections.append({
+                    'section': index + 1,
+                    'group': index // self.sections_per_group + 1,
+                    'year': year,
+                    'student': SECTION_STUDENTS
+                })
+        return sections
+
+    def _generate_courses(self):
+        courses = []
+        for year in range(1, self.years + 1):
+            for index in range(self.courses_per_year):
+                prefix = COURSE_PREFIXES[index % len(COURSE_PREFIXES)]
+                number = f'{year}{index // len(COURSE_PREFIXES) + 1:02d}'
+                base = f'{prefix} {number}'
+                name = f'{prefix} Course {number}'
+                courses.append({'course_id': f'{base}L', 'course': name, 'type': 'Lecture', 'Year': year})
+                if self.random.random() < self.lab_ratio:
+                    courses.append({'course_id': f'{base}B', 'course': name, 'type': 'Lab', 'Year': year})
+                if self.random.random() < self.tutorial_ratio:
+                    courses.append({'course_id': f'{base}T', 'course': name, 'type': 'Tutorial', 'Year': year})
+            if year in self.project_years:
+                courses.append({'course_id': f'PRJ {year}99', 'course': 'Graduation Project',
+                                'type': 'Project', 'Year': year})
+        return courses
+
+    def _check_section_load(self, courses):
+        """Every section attends one session per timeslot at most"""
+        for year in range(1, self.years + 1):
+            load = sum(1 for c in courses if int(c['Year']) == year and c['type'] != 'Project')
+            if load > self._year_slots():
+                raise ValueError(f"Year {year} sections would need {load} sessions per week but only "
+                                 f"{self._year_slots()} timeslots exist; lower courses_per_year or "
+                                 f"raise slots_per_day")
+
+    def _sessions_per_component(self, course):
+        per_group = course['type'] in ('Lecture', 'Project')
+        return self.groups_per_year if per_group else self.groups_per_year * self.sections_per_group
+
+    def _year_slots(self):
+        # Every year rests one day, as TimetableSolver._get_available_days_for_year enforces
+        return (len(DAYS) - 1) * self.slots_per_day
+
+    def _generate_rooms(self, courses):
+        demand = {}  # (year, kind) -> sessions per week
+        for course in courses:
+            kind = {'Lab': 'lab', 'Lecture': 'lecture', 'Tutorial': 'tutorial', 'Project': 'lecture'}[course['type']]
+            key = (int(course['Year']), kind)
+            demand[key] = demand.get(key, 0) + self._sessions_per_component(course)
+
+        def rooms_needed(kind):
+            busiest_year = max((demand.get((year, kind), 0) for year in range(1, self.years + 1)), default=0)
+            total = sum(v for (year, k), v in demand.items() if k == kind)
+            per_slot = max(busiest_year / self._year_slots(), total / (len(DAYS) * self.slots_per_day))
+            return math.ceil(per_slot / self.tightness) if per_slot else 0
+
+        rooms = []
+        for index in range(rooms_needed('lab')):
+            rooms.append({'room_id': f'LAB {index + 1:03d}', 'type': 'Lab', 'capacity': SECTION_STUDENTS})
+        for index in range(rooms_needed('lecture')):
+            rooms.append({'room_id': f'HALL {index + 1:03d}', 'type': 'Lecture', 'capacity': LECTURE_STUDENTS})
+        for index in range(rooms_needed('tutorial')):
+            rooms.append({'room_id': f'CLS {index + 1:03d}', 'type': 'Classroom', 'capacity': SECTION_STUDENTS})
+        return rooms
+
+    def _generate_instructors(self, courses):
+        """Doctors teach lectures and projects, assistants labs and tutorials"""
+        # An instructor is kept below tightness x the slots of the years they teach
+        max_load = max(1, int(self._year_slots() * self.tightness))
+        pools = {'Doctor': [], 'Assistant': []}
+
+        def new_instructor(role):
+            instructor = {'role': role, 'load': 0, 'qualifications': []}
+            pools[role].append(instructor)
+            return instructor
+
+        for course in courses:
+            role = 'Doctor' if course['type'] in ('Lecture', 'Project') else 'Assistant'
+            sessions = self._sessions_per_component(course)
+            # Tutorials are half slots
+            load = sessions / 2 if course['type'] == 'Tutorial' else sessions
+
+            # Primary instructors: spread the course over as few instructors as capacity allows
+            remaining = load
+            primaries = []
+            for instructor in sorted(pools[role], key=lambda i: i['load']):
+                if remaining <= 0:
+                    break
+                free = max_load - instructor['load']
+                if free <= 0:
+                    continue
+                take = min(free, remaining)
+                instructor['load'] += take
+                remaining -= take
+                primaries.append(instructor)
+            while remaining > 0:
+                instructor = new_instructor(role)
+                take = min(max_load, remaining)
+                instructor['load'] += take
+                remaining -= take
+                primaries.append(instructor)
+
+            # Extra qualified instructors up to the requested density, chosen at random
+            qualified = list(primaries)
+            others = [i for i in pools[role] if i not in qualified]
+            self.random.shuffle(others)
+            while len(qualified) < self.qualification_density and others:
+                qualified.append(others.pop())
+            for instructor in qualified:
+                instructor['qualifications'].append(course['course_id'])
+
+        rows = []
+        for role in ('Doctor', 'Assistant'):
+            for index, instructor in enumerate(pools[role], start=1):
+                rows.append({
+                    'instructor_id': len(rows) + 1,
+                    'name': f'{role} {index:03d}',
+                    'role': role,
+                    'qualifications': ','.join(instructor['qualifications'])
+                })
+        return rows
+
+    @staticmethod
+    def _format_time(minutes):
+        hour, minute = divmod(minutes, 60)
+        suffix = 'AM' if hour < 12 else 'PM'
+        hour = hour % 12 or 12
+        return f'{hour}:{minute:02d} {suffix}'
@@ -0,0 +1,200 @@
+"""
+Timetable Store for Timetable CSP
+Keeps the last generated timetable of each dataset with posting-list indexes, so queries by
+instructor, room, year/section/group and day/timeslot cost time in the size of the answer
+"""
+
+import datetime
+import json
+import os
+import tempfile
+import threading
+import uuid
+from urllib.parse import quote
+
+
+# Fields timetables are indexed and queried by
+QUERY_FIELDS = ('instructor', 'room', 'year', 'section', 'group', 'day', 'timeslot')
+_INTEGER_FIELDS = ('year', 'section', 'group')
+
+
+class TimetableIndex:
+    """Posting lists over one formatted timetable
+
+    Section keys are (year, section) and group keys (year, group). A section is indexed
+    under its own labs and tutorials and under its group's lectures; a group under its
+    lectures and every session of its sections. `sections` are {'year', 'section', 'group'}
+    dicts of whole numbers, as TimetableStore.put builds them from the typed records.
+    """
+
+    def __init__(self, timetable, sections=(), rooms=(), instructors=(), timetable_id=None, generated_at=None):
+        self.timetable = timetable
+        self.rooms = list(rooms)
+        self.instructors = list(instructors)
+        self.id = timetable_id or uuid.uuid4().hex[:12]
+        self.generated_at = generated_at or datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+
+        self.sections = list(sections)
+        group_of = {}        # (year, section) -> group
+        group_sections = {}  # (year, group) -> [section, ...]
+        for section in self.sections:
+            year, number, group = section['year'], section['section'], section['group']
+            group_of[(year, number)] = group
+            group_sections.setdefault((year, group), []).append(number)
+
+        self.postings = {field: {} for field in QUERY_FIELDS}  # field -> key -> [positions]
+        self.entry_keys = []  # position -> {field: keys of that entry}
+        for position, entry in enumerate(timetable):
+            year = int(entry['year'])
+            day = entry['day_time'].split(' ', 1)[0]
+            kind, _, number = entry['sections'].partition(' ')
+            number = int(number) if number.isdigit() else None
+            if kind == 'Group':
+                groups = [number]
+                members = group_sections.get((year, number), [])
+            else:
+                groups = [group_of[(year, number)]] if (year, number) in group_of else []
+                members = [number] if number is not None else []
+
+            keys = {
+                'instructor': (entry['instructor'],),
+                'room': (entry['room'],),
+                'year': (year,),
+                'section': tuple((year, section) for section in members),
+                'group': tuple((year, group) for group in groups),
+                'day': (day,),
+                'timeslot': (entry['day_time'],)
+            }
+            self.entry_keys.append(keys)
+            for field, field_keys in keys.items():
+                for key in field_keys:
+                    self.postings[field].setdefault(key, []).append(position)
+
+    def keys(self, filters):
+        """Index keys for request filters ({field: string}); raises ValueError for bad values"""
+        unknown = sorted(set(filters) - set(QUERY_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown query fields {unknown}; choose from {list(QUERY_FIELDS)}")
+        keys = {}
+        for field, value in filters.items():
+            if field in _INTEGER_FIELDS:
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"{field} must be a number, got {value!r}")
+            keys[field] = value
+        for field in ('section', 'group'):
+            if field in keys:
+                if 'year' not in keys:
+                    raise ValueError(f"{field} is numbered within a year; give year as well")
+                keys[field] = (keys['year'], keys[field])
+        return keys
+
+    def query(self, **filters):
+        """Sessions matching every filter, in timetable order
+
+        Walks the shortest matching posting list and checks each of its entries against
+        the other filters, so the cost is bounded by the most selective filter.
+        """
+        keys = self.keys(filters)
+        if not keys:
+            return list(self.timetable)
+        field = min(keys, key=lambda name: len(self.postings[name].get(keys[name], ())))
+        others = [(name, key) for name, key in keys.items() if name != field]
+        return [self.timetable[position] for position in self.postings[field].get(keys[field], ())
+                if all(key in self.entry_keys[position][name] for name, key in others)]
+
+    def free(self, timeslot, kind='room'):
+        """Rooms or instructors with no session in a timeslot (e.g. 'Monday 10:45 AM')"""
+        if kind not in ('room', 'instructor'):
+            raise ValueError("kind must be 'room' or 'instructor'")
+        busy = {self.timetable[position][kind] for position in self.postings['timeslot'].get(timeslot, [])}
+        everyone = self.rooms if kind == 'room' else self.instructors
+        return [name for name in everyone if name not in busy]
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'generated_at': self.generated_at,
+            'sessions': len(self.timetable),
+            'instructors': len(self.postings['instructor']),
+            'rooms': len(self.postings['room']),
+            'timeslots': len(self.postings['timeslot'])
+        }
+
+
+class TimetableStore:
+    """Latest timetable per dataset, indexed once when it is stored
+
+    With a `directory`, stored timetables are also written there and picked up by every
+    process reading the same directory (e.g. the prefork server's workers), re-indexed
+    once per process when the file changes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._indexes = {}  # dataset -> (file signature, TimetableIndex)
+        self._lock = threading.Lock()
+
+    def put(self, dataset, timetable, records):
+        """Index and keep a generated timetable; `records` are the compiled model's Records"""
+        sections = [{'year': section.year, 'section': section.section, 'group': section.group}
+                    for section in records.sections]
+        index = TimetableIndex(timetable, sections,
+                               rooms=[room.room_id for room in records.rooms],
+                               instructors=[instructor.name for instructor in records.instructors])
+        signature = self._write(dataset, index) if self.directory else None
+        with self._lock:
+            self._indexes[dataset] = (signature, index)
+        return index
+
+    def get(self, dataset):
+        """Index of the dataset's last stored timetable, or None"""
+        with self._lock:
+            signature, index = self._indexes.get(dataset, (None, None))
+        if not self.directory:
+            return index
+
+        path = self._path(dataset)
+        current = self._signature(path)
+        if current is None or current == signature:
+            return index
+        try:
+            with open(path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read stored timetable for '{dataset}': {e}")
+            return index
+        index = TimetableIndex(stored['timetable'], stored['sections'], stored['rooms'], stored['instructors'],
+                               timetable_id=stored['id'], generated_at=stored['generated_at'])
+        with self._lock:
+            self._indexes[dataset] = (current, index)
+        return index
+
+    def _path(self, dataset):
+        return os.path.join(self.directory, quote(dataset, safe='') + '.json')
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _write(self, dataset, index):
+        """Write atomically so readers in other processes never see half a file"""
+        os.makedirs(self.directory, exist_ok=True)
+        stored = {'id': index.id, 'generated_at': index.generated_at, 'timetable': index.timetable,
+                  'sections': index.sections, 'rooms': index.rooms, 'instructors': index.instructors}
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                json.dump(stored, f)
+            path = self._path(dataset)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return self._signature(path)
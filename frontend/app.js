@@ -1,9 +1,25 @@
 // Timetable CSP Generator Frontend JavaScript
+// Uses TIME_SLOTS, DAYS, entryYear and buildTimetableIndex from timetable-index.js
+
+// Estimated table row heights in px per row kind, corrected once rows are rendered
+const TABLE_ROW_HEIGHTS = { year: 72, type: 56, entry: 74, spacer: 20 };
+// Rows rendered above and below the visible part of the table
+const TABLE_OVERSCAN_ROWS = 10;
 
 class TimetableApp {
     constructor() {
         this.apiBase = '';
+        // Dataset served by the backend, selectable with ?dataset=<name> in the page URL
+        this.dataset = new URLSearchParams(window.location.search).get('dataset') || 'default';
         this.currentTimetable = null;
+        this.timetableIndex = null;   // built once per timetable, see timetable-index.js
+        this.indexWorker = undefined; // started on first use; null when workers are unavailable
+        this.indexRequests = 0;
+        this.pendingIndexes = new Map();
+        this.viewCache = new Map();
+        this.tableRows = [];
+        this.rowHeights = { ...TABLE_ROW_HEIGHTS };
+        this.measuredRowKinds = new Set();
         this.init();
     }
 
@@ -18,7 +34,8 @@ class TimetableApp {
             'loadDataBtn', 'validateBtn', 'generateBtn',
             'tableViewBtn', 'dayViewBtn', 'gridViewBtn',
             'year1Filter', 'year2Filter', 'year3Filter', 'year4Filter',
-            'selectAllYears', 'clearAllYears', 'downloadBtn', 'downloadExcelBtn'
+            'selectAllYears', 'clearAllYears', 'downloadBtn', 'downloadExcelBtn',
+            'downloadBundleBtn'
         ];
 
         elements.forEach(id => {
@@ -29,6 +46,8 @@ class TimetableApp {
                         console.log('Excel download clicked');
                         this.downloadExcel();
                     });
+                } else if (id === 'downloadBundleBtn') {
+                    el.addEventListener('click', () => this.downloadBundle());
                 } else if (id === 'downloadBtn') {
                     el.addEventListener('click', () => this.downloadTimetable());
                 } else if (id === 'loadDataBtn') {
@@ -61,7 +80,7 @@ class TimetableApp {
         this.showStatus('Loading data summary...', 'loading');
 
         try {
-            const response = await fetch(`${this.apiBase}/api/data-summary`);
+            const response = await fetch(`${this.apiBase}/api/data-summary?dataset=${encodeURIComponent(this.dataset)}`);
             const data = await response.json();
 
             if (data.success) {
@@ -79,7 +98,7 @@ class TimetableApp {
         this.showStatus('Validating data...', 'loading');
 
         try {
-            const response = await fetch(`${this.apiBase}/api/validate`);
+            const response = await fetch(`${this.apiBase}/api/validate?dataset=${encodeURIComponent(this.dataset)}`);
             const data = await response.json();
 
             if (data.success) {
@@ -97,7 +116,7 @@ class TimetableApp {
         this.showStatus('Generating timetable... This may take a moment.', 'loading');
 
         try {
-            const response = await fetch(`${this.apiBase}/api/generate`, {
+            const response = await fetch(`${this.apiBase}/api/generate?dataset=${encodeURIComponent(this.dataset)}`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -108,8 +127,7 @@ class TimetableApp {
 
             if (data.success) {
                 this.currentTimetable = data.timetable;
-                this.displayTimetable(data.timetable);
-                this.displayTimetableStats(data.timetable);
+                await this.displayTimetable(data.timetable);
                 this.showStatus(data.message, 'success');
             } else {
                 this.showStatus(`Generation failed: ${data.error}`, 'error');
@@ -214,137 +232,66 @@ class TimetableApp {
         container.style.display = 'block';
     }
 
-    displayTimetable(timetable) {
-        const container = document.getElementById('timetableContainer');
-        const tbody = document.getElementById('timetableBody');
-
-        // Clear existing content
-        tbody.innerHTML = '';
-
-        // Group timetable by year
-        const yearGroups = this.groupTimetableByYear(timetable);
-
-        // Sort years
-        const sortedYears = Object.keys(yearGroups).sort((a, b) => parseInt(a) - parseInt(b));
-
-        // Populate table with year sections
-        sortedYears.forEach(year => {
-            // Add year header row
-            const yearHeaderRow = document.createElement('tr');
-            yearHeaderRow.className = 'year-header';
-            yearHeaderRow.innerHTML = `
-                <td colspan="7" class="year-title">
-                    <div class="year-section">
-                        <h3>Year ${year}</h3>
-                        <div class="year-stats">
-                            ${this.getYearStats(yearGroups[year])}
-                        </div>
-                    </div>
-                </td>
-            `;
-            tbody.appendChild(yearHeaderRow);
-
-            // Group courses by type within the year
-            const coursesByType = this.groupCoursesByType(yearGroups[year]);
-
-            // Display courses grouped by type
-            ['lecture', 'lab', 'tutorial', 'project'].forEach(type => {
-                if (coursesByType[type] && coursesByType[type].length > 0) {
-                    // Add type subheader
-                    const typeHeaderRow = document.createElement('tr');
-                    typeHeaderRow.className = `type-header type-${type}`;
-                    typeHeaderRow.innerHTML = `
-                        <td colspan="7" class="type-title">
-                            <div class="type-section">
-                                <span class="session-type ${type}">${type.toUpperCase()}</span>
-                                <span class="type-count">${coursesByType[type].length} courses</span>
-                            </div>
-                        </td>
-                    `;
-                    tbody.appendChild(typeHeaderRow);
-
-                    // Sort courses within type by day/time
-                    const sortedCourses = coursesByType[type].sort((a, b) => {
-                        return a.day_time.localeCompare(b.day_time);
-                    });
-
-                    // Add courses for this type
-                    sortedCourses.forEach(entry => {
-                        const row = document.createElement('tr');
-                        row.className = `year-${year}-course type-${type}-course`;
+    async displayTimetable(timetable) {
+        const index = await this.indexTimetable(timetable);
+        if (!index) return; // superseded by a newer timetable
 
-                        const sessionTypeClass = entry.session_type.toLowerCase();
-                        const durationText = entry.duration === 0.5 ? '½ slot' : '1 slot';
-
-                        row.innerHTML = `
-                            <td>
-                                <div class="course-info">
-                                    <strong>${entry.course_name}</strong><br>
-                                    <small class="course-id">${entry.course_id}</small>
-                                </div>
-                            </td>
-                            <td>
-                                <span class="session-type ${sessionTypeClass}">${entry.session_type}</span>
-                            </td>
-                            <td>${entry.sections}</td>
-                            <td>${entry.day_time}</td>
-                            <td>${entry.room}</td>
-                            <td>${entry.instructor}</td>
-                            <td>${durationText}</td>
-                        `;
-
-                        tbody.appendChild(row);
-                    });
-                }
-            });
-
-            // Add spacing row between years
-            if (year !== sortedYears[sortedYears.length - 1]) {
-                const spacerRow = document.createElement('tr');
-                spacerRow.className = 'year-spacer';
-                spacerRow.innerHTML = '<td colspan="7" class="spacer"></td>';
-                tbody.appendChild(spacerRow);
-            }
-        });
-
-        container.style.display = 'block';
-
-        // Initialize filtered timetable to show all years by default
-        this.filteredTimetable = this.currentTimetable;
+        this.timetableIndex = index;
+        this.viewCache = new Map();
+        this.filterTimetable();
+        this.displayTimetableStats(this.filteredTimetable);
 
+        document.getElementById('timetableContainer').style.display = 'block';
         this.showTableView();
     }
 
-    generateCourseColor(courseId) {
-        if (!courseId) return { bg: '#4a5568', border: '#2d3748' };
-
-        // Simple hash function to generate a number from string
-        let hash = 0;
-        for (let i = 0; i < courseId.length; i++) {
-            hash = courseId.charCodeAt(i) + ((hash << 5) - hash);
+    indexTimetable(timetable) {
+        // Grouping runs in a Web Worker when the browser allows one, else on the main thread
+        const id = ++this.indexRequests;
+        if (this.indexWorker === undefined) {
+            this.indexWorker = this.startIndexWorker();
         }
+        if (!this.indexWorker) {
+            return Promise.resolve(buildTimetableIndex(timetable));
+        }
+        return new Promise(resolve => {
+            this.pendingIndexes.set(id, { resolve, timetable });
+            this.indexWorker.postMessage({ id, timetable });
+        });
+    }
 
-        // Generate nice distinct colors
-        // Use golden ratio conjugate to spread colors better
-        const h = Math.abs(hash % 360);
-
-        // We want dark, rich colors for good contrast with white text
-        // Saturation: 60-80%, Lightness: 30-45%
-        const s = 65 + (Math.abs(hash) % 20);
-        const l = 35 + (Math.abs(hash) % 15);
+    startIndexWorker() {
+        if (typeof Worker === 'undefined') return null;
+        try {
+            const worker = new Worker('timetable-index.js');
+            worker.onmessage = event => this.resolveIndex(event.data.id, event.data.index);
+            worker.onerror = event => {
+                console.error('Timetable worker failed, indexing on the main thread:', event.message);
+                event.preventDefault();
+                worker.terminate();
+                this.indexWorker = null;
+                this.pendingIndexes.forEach((pending, id) => this.resolveIndex(id, buildTimetableIndex(pending.timetable)));
+            };
+            return worker;
+        } catch (error) {
+            console.error('Timetable worker unavailable:', error);
+            return null;
+        }
+    }
 
-        return {
-            bg: `hsla(${h}, ${s}%, ${l}%, 0.85)`,
-            border: `hsl(${h}, ${s}%, ${l - 10}%)`
-        };
+    resolveIndex(id, index) {
+        const pending = this.pendingIndexes.get(id);
+        if (!pending) return;
+        this.pendingIndexes.delete(id);
+        // Only the latest timetable is displayed; older requests resolve to null
+        pending.resolve(id === this.indexRequests ? index : null);
     }
 
     groupTimetableByYear(timetable) {
         const yearGroups = {};
 
         timetable.forEach(entry => {
-            // Extract year from course_id or use a default method
-            let year = this.extractYearFromCourse(entry);
+            const year = entryYear(entry);
 
             if (!yearGroups[year]) {
                 yearGroups[year] = [];
@@ -355,73 +302,7 @@ class TimetableApp {
         return yearGroups;
     }
 
-    groupCoursesByType(courses) {
-        const typeGroups = {
-            lecture: [],
-            lab: [],
-            tutorial: [],
-            project: []
-        };
-
-        courses.forEach(course => {
-            const type = course.session_type.toLowerCase();
-            if (typeGroups[type]) {
-                typeGroups[type].push(course);
-            }
-        });
-
-        return typeGroups;
-    }
-
-    extractYearFromCourse(entry) {
-        // Use explicit year from backend if available
-        if (entry.year) {
-            return entry.year;
-        }
-
-        // Try to extract year from course_id (e.g., CSC 111 -> Year 1, CSC 211 -> Year 2)
-        const courseId = entry.course_id;
-        const match = courseId.match(/(\d)(\d)\d/);
-
-        if (match) {
-            const firstDigit = parseInt(match[1]);
-            const secondDigit = parseInt(match[2]);
-
-            // If first digit is 1-4, use it as year
-            if (firstDigit >= 1 && firstDigit <= 4) {
-                return firstDigit;
-            }
-            // If second digit is 1-4, use it as year  
-            if (secondDigit >= 1 && secondDigit <= 4) {
-                return secondDigit;
-            }
-        }
-
-        // Fallback: try to find year in course name or default to 1
-        if (entry.course_name && entry.course_name.includes('(1)')) return 1;
-        if (entry.course_name && entry.course_name.includes('(2)')) return 2;
-        if (entry.course_name && entry.course_name.includes('(3)')) return 3;
-        if (entry.course_name && entry.course_name.includes('(4)')) return 4;
-
-        return 1; // Default to year 1
-    }
-
-    getYearStats(yearCourses) {
-        const stats = {
-            total: yearCourses.length,
-            lecture: 0,
-            lab: 0,
-            tutorial: 0,
-            project: 0
-        };
-
-        yearCourses.forEach(course => {
-            const type = course.session_type.toLowerCase();
-            if (stats.hasOwnProperty(type)) {
-                stats[type]++;
-            }
-        });
-
+    getYearStats(stats) {
         return `
             <span class="stat-badge total">${stats.total} Total</span>
             ${stats.lecture > 0 ? `<span class="stat-badge lecture">${stats.lecture} Lectures</span>` : ''}
@@ -557,13 +438,13 @@ class TimetableApp {
         document.getElementById('gridViewBtn').classList.remove('active');
 
         // Apply current filters
-        if (this.currentTimetable) {
+        if (this.timetableIndex) {
             this.displayFilteredTimetable();
         }
     }
 
     showDayView() {
-        if (!this.currentTimetable) return;
+        if (!this.timetableIndex) return;
 
         document.getElementById('tableView').style.display = 'none';
         document.getElementById('dayView').style.display = 'block';
@@ -577,7 +458,7 @@ class TimetableApp {
     }
 
     showGridView() {
-        if (!this.currentTimetable) return;
+        if (!this.timetableIndex) return;
 
         document.getElementById('tableView').style.display = 'none';
         document.getElementById('dayView').style.display = 'none';
@@ -590,320 +471,6 @@ class TimetableApp {
         this.generateFilteredGridView();
     }
 
-    generateDayView() {
-        const dayViewContent = document.getElementById('dayViewContent');
-
-        // Group timetable by day
-        const dayGroups = {};
-        this.currentTimetable.forEach(entry => {
-            const day = entry.day_time.split(' ')[0];
-            if (!dayGroups[day]) {
-                dayGroups[day] = [];
-            }
-            dayGroups[day].push(entry);
-        });
-
-        // Sort days
-        const dayOrder = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday'];
-        const sortedDays = Object.keys(dayGroups).sort((a, b) => {
-            return dayOrder.indexOf(a) - dayOrder.indexOf(b);
-        });
-
-        let dayViewHtml = '';
-
-        sortedDays.forEach(day => {
-            const dayClasses = dayGroups[day].sort((a, b) => {
-                const timeA = a.day_time.split(' ').slice(1).join(' ');
-                const timeB = b.day_time.split(' ').slice(1).join(' ');
-                return timeA.localeCompare(timeB);
-            });
-
-            dayViewHtml += `
-                <div class="day-column">
-                    <h4>${day}</h4>
-            `;
-
-            dayClasses.forEach(entry => {
-                const time = entry.day_time.split(' ').slice(1).join(' ');
-                const sessionTypeClass = entry.session_type.toLowerCase();
-                const durationText = entry.duration === 0.5 ? '(½ slot)' : '';
-                const year = this.extractYearFromCourse(entry);
-
-                dayViewHtml += `
-                    <div class="time-slot year-${year}-slot">
-                        <div class="time">${time} ${durationText}</div>
-                        <div class="course">
-                            ${entry.course_name}
-                            <span class="year-badge-small">Y${year}</span>
-                        </div>
-                        <div class="details">
-                            <span class="session-type ${sessionTypeClass}">${entry.session_type}</span><br>
-                            ${entry.sections}<br>
-                            Room: ${entry.room}<br>
-                            Instructor: ${entry.instructor}
-                        </div>
-                    </div>
-                `;
-            });
-
-            dayViewHtml += '</div>';
-        });
-
-        dayViewContent.innerHTML = dayViewHtml;
-    }
-
-    generateGridView() {
-        const gridViewContent = document.getElementById('gridViewContent');
-
-        // Create weekly timetable grid
-        const weeklyGrid = this.createWeeklyTimetableGrid();
-        gridViewContent.innerHTML = weeklyGrid;
-    }
-
-    createWeeklyTimetableGrid() {
-        // Create section-based timetable grid (sections as columns, time slots as rows)
-        return this.createSectionBasedGrid();
-    }
-
-    createSectionBasedGrid() {
-        // Define time slots and days
-        const timeSlots = [
-            '9:00 AM - 10:30 AM',
-            '10:45 AM - 12:15 PM',
-            '12:30 PM - 2:00 PM',
-            '2:15 PM - 3:45 PM'
-        ];
-
-        const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday'];
-
-        // Create schedule grid: [timeSlot][day] = [classes]
-        const scheduleGrid = {};
-
-        this.currentTimetable.forEach(entry => {
-            const day = entry.day_time.split(' ')[0];
-            const timeStr = entry.day_time.split(' ').slice(1).join(' ');
-            const year = this.extractYearFromCourse(entry);
-
-            // Map time string to time slot
-            let timeSlot = '';
-            if (timeStr.includes('9:00 AM')) timeSlot = timeSlots[0];
-            else if (timeStr.includes('10:45 AM')) timeSlot = timeSlots[1];
-            else if (timeStr.includes('12:30 PM')) timeSlot = timeSlots[2];
-            else if (timeStr.includes('2:15 PM')) timeSlot = timeSlots[3];
-
-            if (!scheduleGrid[timeSlot]) scheduleGrid[timeSlot] = {};
-            if (!scheduleGrid[timeSlot][day]) scheduleGrid[timeSlot][day] = [];
-
-            scheduleGrid[timeSlot][day].push({
-                ...entry,
-                year: year
-            });
-        });
-
-        // Generate HTML for horizontal weekly grid
-        let gridHtml = `
-            <div class="weekly-timetable-container">
-                <h3>📅 Weekly Timetable Grid</h3>
-                <div class="timetable-grid">
-                    <table class="weekly-grid-table">
-                        <thead>
-                            <tr>
-                                <th class="time-header">Time</th>
-                                ${days.map(day => `<th class="day-header">${day}</th>`).join('')}
-                            </tr>
-                        </thead>
-                        <tbody>
-        `;
-
-        // Generate rows for each time slot
-        timeSlots.forEach(timeSlot => {
-            gridHtml += `<tr class="time-row">`;
-            gridHtml += `<td class="time-cell">${timeSlot}</td>`;
-
-            days.forEach(day => {
-                const classes = scheduleGrid[timeSlot] && scheduleGrid[timeSlot][day] || [];
-                gridHtml += `<td class="schedule-cell">`;
-
-                if (classes.length > 0) {
-                    classes.forEach(classEntry => {
-                        const yearClass = `year-${classEntry.year}`;
-                        const sessionClass = classEntry.session_type.toLowerCase();
-
-                        // Generate dynamic color for the course
-                        const courseColor = this.generateCourseColor(classEntry.course_id);
-
-                        gridHtml += `
-                            <div class="class-block ${yearClass}-block ${sessionClass}-block" 
-                                 style="background: ${courseColor.bg}; border-left-color: ${courseColor.border}; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.2); margin-bottom: 8px;">
-                                <div class="class-course" style="color: white; font-weight: 700; text-shadow: 0 1px 2px rgba(0,0,0,0.5);">${this.truncateCourseName(classEntry.course_name)}</div>
-                                <div class="class-id" style="color: rgba(255,255,255,0.9); font-size: 0.8rem;">${classEntry.course_id}</div>
-                                <div class="class-type" style="color: rgba(255,255,255,0.8); font-size: 0.7rem;">${classEntry.session_type}</div>
-                                <div class="class-sections" style="color: rgba(255,255,255,0.8); font-size: 0.7rem;">${classEntry.sections}</div>
-                                <div class="class-room" style="color: rgba(255,255,255,0.8); font-size: 0.7rem;">📍 ${classEntry.room}</div>
-                                <div class="class-instructor" style="color: rgba(255,255,255,0.8); font-size: 0.7rem;">👨‍🏫 ${this.truncateInstructorName(classEntry.instructor)}</div>
-                            </div>
-                        `;
-                    });
-                }
-
-                gridHtml += `</td>`;
-            });
-
-            gridHtml += `</tr>`;
-        });
-
-        gridHtml += `
-                        </tbody>
-                    </table>
-                </div>
-                
-                <div class="legend">
-                    <h4>📋 Legend</h4>
-                    <div class="legend-items">
-                        <div class="legend-item">
-                            <div class="legend-color year-1-block"></div>
-                            <span>Year 1</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-2-block"></div>
-                            <span>Year 2</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-3-block"></div>
-                            <span>Year 3</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-4-block"></div>
-                            <span>Year 4</span>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        `;
-
-        return gridHtml;
-        timeSlots.forEach((timeSlot, timeIndex) => {
-            gridHtml += `<tr class="schedule-row">`;
-
-            // First column: Day and time
-            if (timeIndex === 0) {
-                gridHtml += `<td class="day-time-cell" rowspan="${timeSlots.length}">
-                        <div class="day-label">${day}</div>
-                    </td>`;
-            }
-
-            gridHtml += `<td class="time-label-cell">${timeSlot}</td>`;
-
-            // Generate cells for each section
-            sections.forEach(sectionKey => {
-                const classEntry = scheduleGrid[day] && scheduleGrid[day][timeSlot] && scheduleGrid[day][timeSlot][sectionKey];
-
-                gridHtml += `<td class="section-schedule-cell">`;
-
-                if (classEntry) {
-                    const yearClass = `year-${classEntry.year}`;
-                    const sessionClass = classEntry.session_type.toLowerCase();
-
-                    // Generate dynamic color for the course
-                    const courseColor = this.generateCourseColor(classEntry.course_id);
-
-                    gridHtml += `
-                                <div class="section-class-block ${yearClass}-block" 
-                                     style="background: ${courseColor.bg}; border-left-color: ${courseColor.border}; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.2);">
-                                    <div class="class-code" style="color: white; text-shadow: 0 1px 2px rgba(0,0,0,0.5);">${classEntry.course_id}</div>
-                                    <div class="class-name" style="color: rgba(255,255,255,0.9);">${this.truncateCourseName(classEntry.course_name)}</div>
-                                    <div class="class-type-badge">${classEntry.session_type}</div>
-                                    <div class="class-room-info" style="color: rgba(255,255,255,0.8);">Room: ${classEntry.room}</div>
-                                    <div class="class-instructor-info" style="color: rgba(255,255,255,0.8);">${this.truncateInstructorName(classEntry.instructor)}</div>
-                                </div>
-                            `;
-                }
-
-                gridHtml += `</td>`;
-            });
-
-            gridHtml += `</tr>`;
-        });
-
-        gridHtml += `
-                        </tbody>
-                    </table>
-                </div>
-                
-                <div class="section-legend">
-                    <h4>Legend</h4>
-                    <div class="legend-items">
-                        <div class="legend-item">
-                            <div class="legend-color year-1-block"></div>
-                            <span>Year 1</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-2-block"></div>
-                            <span>Year 2</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-3-block"></div>
-                            <span>Year 3</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-4-block"></div>
-                            <span>Year 4</span>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        `;
-
-        return gridHtml;
-    }
-
-    getAllSections(timetable = this.currentTimetable) {
-        // Get all unique sections from the timetable
-        const sections = new Set();
-
-        timetable.forEach(entry => {
-            const year = this.extractYearFromCourse(entry);
-            const affectedSections = this.getAffectedSections(entry, year);
-            affectedSections.forEach(section => sections.add(section));
-        });
-
-        // Sort sections by year and then by section number
-        return Array.from(sections).sort((a, b) => {
-            const [yearA, sectionA] = a.split('S');
-            const [yearB, sectionB] = b.split('S');
-
-            if (yearA !== yearB) {
-                return parseInt(yearA.replace('Y', '')) - parseInt(yearB.replace('Y', ''));
-            }
-            return parseInt(sectionA) - parseInt(sectionB);
-        });
-    }
-
-    getAffectedSections(entry, year) {
-        // Determine which sections are affected by this class
-        const sections = [];
-
-        if (entry.session_type.toLowerCase() === 'lecture') {
-            // Lectures affect entire groups (3 sections each)
-            if (entry.sections.includes('Group 1')) {
-                sections.push(`Y${year}S1`, `Y${year}S2`, `Y${year}S3`);
-            } else if (entry.sections.includes('Group 2')) {
-                sections.push(`Y${year}S4`, `Y${year}S5`, `Y${year}S6`);
-            } else if (entry.sections.includes('Group 3')) {
-                sections.push(`Y${year}S7`, `Y${year}S8`, `Y${year}S9`);
-            }
-        } else {
-            // Labs and tutorials affect individual sections
-            const sectionMatch = entry.sections.match(/Section (\d+)/);
-            if (sectionMatch) {
-                const sectionNum = sectionMatch[1];
-                sections.push(`Y${year}S${sectionNum}`);
-            }
-        }
-
-        return sections;
-    }
-
     truncateCourseName(courseName) {
         // Truncate long course names for better display
         if (courseName.length > 25) {
@@ -930,16 +497,18 @@ class TimetableApp {
         return selectedYears;
     }
 
-    applyYearFilters() {
-        if (!this.currentTimetable) return;
+    filterTimetable() {
+        // Per-year lists are prebuilt, so a filter change only concatenates them
+        const index = this.timetableIndex;
+        this.selectedYears = this.getSelectedYears().filter(year => index.years[year]);
+        this.filterKey = this.selectedYears.join(',');
+        this.filteredTimetable = this.selectedYears.flatMap(year => index.years[year].entries.map(i => index.entries[i]));
+    }
 
-        const selectedYears = this.getSelectedYears();
+    applyYearFilters() {
+        if (!this.timetableIndex) return;
 
-        // Filter timetable data by selected years
-        this.filteredTimetable = this.currentTimetable.filter(entry => {
-            const year = this.extractYearFromCourse(entry);
-            return selectedYears.includes(year);
-        });
+        this.filterTimetable();
 
         // Update current view
         const activeView = document.querySelector('.btn.active').id;
@@ -972,537 +541,249 @@ class TimetableApp {
     }
 
     displayFilteredTimetable() {
-        const container = document.getElementById('timetableContainer');
-        const tbody = document.getElementById('timetableBody');
-
-        // Clear existing content
-        tbody.innerHTML = '';
-
-        // Use filtered timetable
-        const timetableToShow = this.filteredTimetable || this.currentTimetable;
-
-        // Group timetable by year
-        const yearGroups = this.groupTimetableByYear(timetableToShow);
-
-        // Sort years
-        const sortedYears = Object.keys(yearGroups).sort((a, b) => parseInt(a) - parseInt(b));
-
-        // Populate table with year sections
-        sortedYears.forEach(year => {
-            // Add year header row
-            const yearHeaderRow = document.createElement('tr');
-            yearHeaderRow.className = 'year-header';
-            yearHeaderRow.innerHTML = `
-                <td colspan="7" class="year-title">
-                    <div class="year-section">
-                        <h3>📚 Year ${year}</h3>
-                        <div class="year-stats">
-                            ${this.getYearStats(yearGroups[year])}
-                        </div>
-                    </div>
-                </td>
-            `;
-            tbody.appendChild(yearHeaderRow);
-
-            // Group courses by type within the year
-            const coursesByType = this.groupCoursesByType(yearGroups[year]);
-
-            // Display courses grouped by type
-            ['lecture', 'lab', 'tutorial', 'project'].forEach(type => {
-                if (coursesByType[type] && coursesByType[type].length > 0) {
-                    // Add type subheader
-                    const typeHeaderRow = document.createElement('tr');
-                    typeHeaderRow.className = `type-header type-${type}`;
-                    typeHeaderRow.innerHTML = `
-                        <td colspan="7" class="type-title">
-                            <div class="type-section">
-                                <span class="session-type ${type}">${type.toUpperCase()}</span>
-                                <span class="type-count">${coursesByType[type].length} courses</span>
-                            </div>
-                        </td>
-                    `;
-                    tbody.appendChild(typeHeaderRow);
-
-                    // Sort courses within type by day/time
-                    const sortedCourses = coursesByType[type].sort((a, b) => {
-                        return a.day_time.localeCompare(b.day_time);
-                    });
-
-                    // Add courses for this type
-                    sortedCourses.forEach(entry => {
-                        const row = document.createElement('tr');
-                        row.className = `year-${year}-course type-${type}-course`;
-
-                        const sessionTypeClass = entry.session_type.toLowerCase();
-                        const durationText = entry.duration === 0.5 ? '½ slot' : '1 slot';
-
-                        row.innerHTML = `
-                            <td>
-                                <div class="course-info">
-                                    <strong>${entry.course_name}</strong><br>
-                                    <small class="course-id">${entry.course_id}</small>
-                                </div>
-                            </td>
-                            <td>
-                                <span class="session-type ${sessionTypeClass}">${entry.session_type}</span>
-                            </td>
-                            <td>${entry.sections}</td>
-                            <td>${entry.day_time}</td>
-                            <td>${entry.room}</td>
-                            <td>${entry.instructor}</td>
-                            <td>${durationText}</td>
-                        `;
-
-                        tbody.appendChild(row);
-                    });
-                }
-            });
+        // Flat row model for the selected years; only the rows in view are in the DOM
+        const index = this.timetableIndex;
+        let rows = [];
+        this.selectedYears.forEach((year, position) => {
+            if (position > 0) rows.push({ kind: 'spacer' });
+            rows.push({ kind: 'year', year });
+            rows = rows.concat(index.years[year].rows);
+        });
+        this.tableRows = rows;
+        this.layoutTableRows();
+
+        const scroller = document.querySelector('#tableView .table-container');
+        if (!this.tableScrollBound) {
+            scroller.addEventListener('scroll', () => this.scheduleTableRender(), { passive: true });
+            window.addEventListener('resize', () => this.scheduleTableRender());
+            this.tableScrollBound = true;
+        }
+        scroller.scrollTop = 0;
+        this.renderTableWindow();
+    }
 
-            // Add spacing row between years
-            if (year !== sortedYears[sortedYears.length - 1]) {
-                const spacerRow = document.createElement('tr');
-                spacerRow.className = 'year-spacer';
-                spacerRow.innerHTML = '<td colspan="7" class="spacer"></td>';
-                tbody.appendChild(spacerRow);
-            }
+    layoutTableRows() {
+        // rowOffsets[i] is the top of row i; heights are per row kind
+        const offsets = new Array(this.tableRows.length + 1);
+        offsets[0] = 0;
+        this.tableRows.forEach((row, i) => {
+            offsets[i + 1] = offsets[i] + this.rowHeights[row.kind];
         });
+        this.rowOffsets = offsets;
+    }
 
-        container.style.display = 'block';
+    scheduleTableRender() {
+        if (this.tableRenderPending || !this.tableRows.length) return;
+        this.tableRenderPending = true;
+        requestAnimationFrame(() => this.renderTableWindow());
     }
 
-    displayFilteredTimetable() {
-        const container = document.getElementById('timetableContainer');
+    renderTableWindow() {
+        this.tableRenderPending = false;
+        const scroller = document.querySelector('#tableView .table-container');
         const tbody = document.getElementById('timetableBody');
-
-        // Clear existing content
-        tbody.innerHTML = '';
-
-        // Use filtered timetable
-        const timetableToShow = this.filteredTimetable || this.currentTimetable;
-
-        // Group timetable by year
-        const yearGroups = this.groupTimetableByYear(timetableToShow);
-
-        // Sort years
-        const sortedYears = Object.keys(yearGroups).sort((a, b) => parseInt(a) - parseInt(b));
-
-        // Populate table with year sections
-        sortedYears.forEach(year => {
-            // Add year header row
-            const yearHeaderRow = document.createElement('tr');
-            yearHeaderRow.className = 'year-header';
-            yearHeaderRow.innerHTML = `
-            <td colspan="7" class="year-title">
-                <div class="year-section">
-                    <h3>📚 Year ${year}</h3>
-                    <div class="year-stats">
-                        ${this.getYearStats(yearGroups[year])}
-                    </div>
-                </div>
-            </td>
-        `;
-            tbody.appendChild(yearHeaderRow);
-
-            // Group courses by type within the year
-            const coursesByType = this.groupCoursesByType(yearGroups[year]);
-
-            // Display courses grouped by type
-            ['lecture', 'lab', 'tutorial', 'project'].forEach(type => {
-                if (coursesByType[type] && coursesByType[type].length > 0) {
-                    // Add type subheader
-                    const typeHeaderRow = document.createElement('tr');
-                    typeHeaderRow.className = `type-header type-${type}`;
-                    typeHeaderRow.innerHTML = `
-                    <td colspan="7" class="type-title">
-                        <div class="type-section">
-                            <span class="session-type ${type}">${type.toUpperCase()}</span>
-                            <span class="type-count">${coursesByType[type].length} courses</span>
-                        </div>
-                    </td>
-                `;
-                    tbody.appendChild(typeHeaderRow);
-
-                    // Sort courses within type by day/time
-                    const sortedCourses = coursesByType[type].sort((a, b) => {
-                        return a.day_time.localeCompare(b.day_time);
-                    });
-
-                    // Add courses for this type
-                    sortedCourses.forEach(entry => {
-                        const row = document.createElement('tr');
-                        row.className = `year-${year}-course type-${type}-course`;
-
-                        const sessionTypeClass = entry.session_type.toLowerCase();
-                        const durationText = entry.duration === 0.5 ? '½ slot' : '1 slot';
-
-                        row.innerHTML = `
-                        <td>
-                            <div class="course-info">
-                                <strong>${entry.course_name}</strong><br>
-                                <small class="course-id">${entry.course_id}</small>
-                            </div>
-                        </td>
-                        <td>
-                            <span class="session-type ${sessionTypeClass}">${entry.session_type}</span>
-                        </td>
-                        <td>${entry.sections}</td>
-                        <td>${entry.day_time}</td>
-                        <td>${entry.room}</td>
-                        <td>${entry.instructor}</td>
-                        <td>${durationText}</td>
-                    `;
-
-                        tbody.appendChild(row);
-                    });
-                }
-            });
-
-            // Add spacing row between years
-            if (year !== sortedYears[sortedYears.length - 1]) {
-                const spacerRow = document.createElement('tr');
-                spacerRow.className = 'year-spacer';
-                spacerRow.innerHTML = '<td colspan="7" class="spacer"></td>';
-                tbody.appendChild(spacerRow);
+        const rows = this.tableRows;
+        const offsets = this.rowOffsets;
+        const top = scroller.scrollTop;
+        const bottom = top + (scroller.clientHeight || window.innerHeight);
+
+        // First row ending below the scroll position
+        let low = 0;
+        let high = rows.length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (offsets[mid + 1] <= top) {
+                low = mid + 1;
+            } else {
+                high = mid;
             }
-        });
+        }
+        let end = low;
+        while (end < rows.length && offsets[end] < bottom) end++;
+        const start = Math.max(0, low - TABLE_OVERSCAN_ROWS);
+        end = Math.min(rows.length, end + TABLE_OVERSCAN_ROWS);
+
+        const html = [];
+        if (start > 0) html.push(this.tableSpacerHtml(offsets[start]));
+        for (let i = start; i < end; i++) {
+            html.push(this.tableRowHtml(rows[i]));
+        }
+        if (end < rows.length) html.push(this.tableSpacerHtml(offsets[rows.length] - offsets[end]));
+        tbody.innerHTML = html.join('');
 
-        container.style.display = 'block';
+        this.measureTableRows(tbody);
     }
 
-    generateFilteredDayView() {
-        const dayViewContent = document.getElementById('dayViewContent');
-        const timetableToShow = this.filteredTimetable || this.currentTimetable;
-
-        // Group timetable by day
-        const dayGroups = {};
-        timetableToShow.forEach(entry => {
-            const day = entry.day_time.split(' ')[0];
-            if (!dayGroups[day]) {
-                dayGroups[day] = [];
+    measureTableRows(tbody) {
+        // Swap each row kind's estimated height for its rendered one, the first time it is seen
+        let changed = false;
+        tbody.querySelectorAll('tr[data-kind]').forEach(tr => {
+            const kind = tr.dataset.kind;
+            if (this.measuredRowKinds.has(kind) || !tr.offsetHeight) return;
+            this.measuredRowKinds.add(kind);
+            if (tr.offsetHeight !== this.rowHeights[kind]) {
+                this.rowHeights[kind] = tr.offsetHeight;
+                changed = true;
             }
-            dayGroups[day].push(entry);
-        });
-
-        // Sort days
-        const dayOrder = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday'];
-        const sortedDays = Object.keys(dayGroups).sort((a, b) => {
-            return dayOrder.indexOf(a) - dayOrder.indexOf(b);
-        });
-
-        let dayViewHtml = '';
-
-        sortedDays.forEach(day => {
-            const dayClasses = dayGroups[day].sort((a, b) => {
-                const timeA = a.day_time.split(' ').slice(1).join(' ');
-                const timeB = b.day_time.split(' ').slice(1).join(' ');
-                return timeA.localeCompare(timeB);
-            });
-
-            dayViewHtml += `
-                <div class="day-column">
-                    <h4>${day}</h4>
-            `;
-
-            dayClasses.forEach(entry => {
-                const time = entry.day_time.split(' ').slice(1).join(' ');
-                const sessionTypeClass = entry.session_type.toLowerCase();
-                const durationText = entry.duration === 0.5 ? '(½ slot)' : '';
-                const year = this.extractYearFromCourse(entry);
-
-                dayViewHtml += `
-                    <div class="time-slot year-${year}-slot">
-                        <div class="time">${time} ${durationText}</div>
-                        <div class="course">
-                            ${entry.course_name}
-                            <span class="year-badge-small">Y${year}</span>
-                        </div>
-                        <div class="details">
-                            <span class="session-type ${sessionTypeClass}">${entry.session_type}</span><br>
-                            ${entry.sections}<br>
-                            Room: ${entry.room}<br>
-                            Instructor: ${entry.instructor}
-                        </div>
-                    </div>
-                `;
-            });
-
-            dayViewHtml += '</div>';
         });
-
-        dayViewContent.innerHTML = dayViewHtml;
+        if (changed) {
+            this.layoutTableRows();
+            this.scheduleTableRender();
+        }
     }
 
-    generateFilteredGridView() {
-        console.log('generateFilteredGridView called');
-        const gridViewContent = document.getElementById('gridViewContent');
-        const timetableToShow = this.filteredTimetable || this.currentTimetable;
-
-        // Create weekly timetable grid using filtered data
-        const weeklyGrid = this.createWeeklyTimetableGridFromData(timetableToShow);
-        console.log('Generated grid HTML:', weeklyGrid.substring(0, 200) + '...');
-        gridViewContent.innerHTML = weeklyGrid;
+    tableSpacerHtml(height) {
+        return `<tr class="virtual-spacer"><td colspan="7" style="height: ${height}px"></td></tr>`;
     }
 
-    createWeeklyTimetableGridFromData(timetableData) {
-        console.log('createWeeklyTimetableGridFromData called with data:', timetableData.length, 'entries');
-        // Define time slots and days
-        const timeSlots = [
-            '9:00 AM - 10:30 AM',
-            '10:45 AM - 12:15 PM',
-            '12:30 PM - 2:00 PM',
-            '2:15 PM - 3:45 PM'
-        ];
-
-        const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday'];
-
-        // Create schedule grid: [timeSlot][day] = [classes]
-        const scheduleGrid = {};
-
-        timetableData.forEach(entry => {
-            const day = entry.day_time.split(' ')[0];
-            const timeStr = entry.day_time.split(' ').slice(1).join(' ');
-            const year = this.extractYearFromCourse(entry);
-
-            // Map time string to time slot
-            let timeSlot = '';
-            if (timeStr.includes('9:00 AM')) timeSlot = timeSlots[0];
-            else if (timeStr.includes('10:45 AM')) timeSlot = timeSlots[1];
-            else if (timeStr.includes('12:30 PM')) timeSlot = timeSlots[2];
-            else if (timeStr.includes('2:15 PM')) timeSlot = timeSlots[3];
-
-            if (!scheduleGrid[timeSlot]) scheduleGrid[timeSlot] = {};
-            if (!scheduleGrid[timeSlot][day]) scheduleGrid[timeSlot][day] = [];
-
-            scheduleGrid[timeSlot][day].push({
-                ...entry,
-                year: year
-            });
-        });
-
-        // Generate HTML for weekly grid
-        let gridHtml = `
-        <div class="weekly-timetable-container">
-            <h3>📅 Weekly Timetable Grid</h3>
-            <div class="timetable-grid">
-                <table class="weekly-grid-table">
-                    <thead>
-                        <tr>
-                            <th class="time-header">Time</th>
-                            ${days.map(day => `<th class="day-header">${day}</th>`).join('')}
-                        </tr>
-                    </thead>
-                    <tbody>
-    `;
-
-        // Generate rows for each time slot
-        timeSlots.forEach(timeSlot => {
-            gridHtml += `<tr class="time-row">`;
-            gridHtml += `<td class="time-cell">${timeSlot}</td>`;
+    tableRowHtml(row) {
+        if (row.kind === 'spacer') {
+            return '<tr class="year-spacer" data-kind="spacer"><td colspan="7" class="spacer"></td></tr>';
+        }
 
-            days.forEach(day => {
-                const classes = scheduleGrid[timeSlot] && scheduleGrid[timeSlot][day] || [];
-                gridHtml += `<td class="schedule-cell">`;
-
-                if (classes.length > 0) {
-                    classes.forEach(classEntry => {
-                        const yearClass = `year-${classEntry.year}`;
-                        const sessionClass = classEntry.session_type.toLowerCase();
-
-                        // Generate dynamic color for the course
-                        const courseColor = this.generateCourseColor(classEntry.course_id);
-
-                        gridHtml += `
-                        <div class="class-block ${yearClass}-block ${sessionClass}-block" 
-                             style="background: ${courseColor.bg}; border-left-color: ${courseColor.border}; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.2); margin-bottom: 8px;">
-                            <div class="class-course" style="color: white; font-weight: 700; text-shadow: 0 1px 2px rgba(0,0,0,0.5);">${this.truncateCourseName(classEntry.course_name)}</div>
-                            <div class="class-id" style="color: rgba(255,255,255,0.9); font-size: 0.8rem;">${classEntry.course_id}</div>
-                            <div class="class-type" style="color: rgba(255,255,255,0.8); font-size: 0.7rem;">${classEntry.session_type}</div>
-                            <div class="class-sections" style="color: rgba(255,255,255,0.8); font-size: 0.7rem;">${classEntry.sections}</div>
-                            <div class="class-room" style="color: rgba(255,255,255,0.8); font-size: 0.7rem;">📍 ${classEntry.room}</div>
-                            <div class="class-instructor" style="color: rgba(255,255,255,0.8); font-size: 0.7rem;">👨‍🏫 ${this.truncateInstructorName(classEntry.instructor)}</div>
+        if (row.kind === 'year') {
+            return `
+                <tr class="year-header" data-kind="year">
+                    <td colspan="7" class="year-title">
+                        <div class="year-section">
+                            <h3>Year ${row.year}</h3>
+                            <div class="year-stats">
+                                ${this.getYearStats(this.timetableIndex.years[row.year].stats)}
+                            </div>
                         </div>
-                    `;
-                    });
-                }
-
-                gridHtml += `</td>`;
-            });
+                    </td>
+                </tr>
+            `;
+        }
 
-            gridHtml += `</tr>`;
-        });
+        if (row.kind === 'type') {
+            return `
+                <tr class="type-header type-${row.type}" data-kind="type">
+                    <td colspan="7" class="type-title">
+                        <div class="type-section">
+                            <span class="session-type ${row.type}">${row.type.toUpperCase()}</span>
+                            <span class="type-count">${row.count} courses</span>
+                        </div>
+                    </td>
+                </tr>
+            `;
+        }
 
-        gridHtml += `
-                    </tbody>
-                </table>
-            </div>
-            
-            <div class="legend">
-                <h4>📋 Legend</h4>
-                <div class="legend-items">
-                    <div class="legend-item">
-                        <div class="legend-color year-1-block"></div>
-                        <span>Year 1</span>
-                    </div>
-                    <div class="legend-item">
-                        <div class="legend-color year-2-block"></div>
-                        <span>Year 2</span>
-                    </div>
-                    <div class="legend-item">
-                        <div class="legend-color year-3-block"></div>
-                        <span>Year 3</span>
-                    </div>
-                    <div class="legend-item">
-                        <div class="legend-color year-4-block"></div>
-                        <span>Year 4</span>
+        const entry = this.timetableIndex.entries[row.index];
+        const durationText = entry.duration === 0.5 ? '½ slot' : '1 slot';
+        return `
+            <tr class="year-${entry.year}-course type-${entry.type}-course" data-kind="entry">
+                <td>
+                    <div class="course-info">
+                        <strong>${entry.course_name}</strong><br>
+                        <small class="course-id">${entry.course_id}</small>
                     </div>
-                </div>
-            </div>
-        </div>
-    `;
-
-        return gridHtml;
-    }
-
-    getSelectedYears() {
-        const selectedYears = [];
-        if (document.getElementById('year1Filter').checked) selectedYears.push(1);
-        if (document.getElementById('year2Filter').checked) selectedYears.push(2);
-        if (document.getElementById('year3Filter').checked) selectedYears.push(3);
-        if (document.getElementById('year4Filter').checked) selectedYears.push(4);
-        return selectedYears;
+                </td>
+                <td>
+                    <span class="session-type ${entry.type}">${entry.session_type}</span>
+                </td>
+                <td>${entry.sections}</td>
+                <td>${entry.day_time}</td>
+                <td>${entry.room}</td>
+                <td>${entry.instructor}</td>
+                <td>${durationText}</td>
+            </tr>
+        `;
     }
 
-    applyYearFilters() {
-        if (!this.currentTimetable) return;
-
-        const selectedYears = this.getSelectedYears();
-
-        // Filter timetable data by selected years
-        this.filteredTimetable = this.currentTimetable.filter(entry => {
-            const year = this.extractYearFromCourse(entry);
-            return selectedYears.includes(year);
-        });
-
-        // Update current view
-        const activeView = document.querySelector('.btn.active').id;
-        if (activeView === 'tableViewBtn') {
-            this.displayFilteredTimetable();
-        } else if (activeView === 'dayViewBtn') {
-            this.generateFilteredDayView();
-        } else if (activeView === 'gridViewBtn') {
-            this.generateFilteredGridView();
+    cachedView(view, render) {
+        // Rendered day and grid views per year selection, kept as DOM nodes until the next timetable
+        const key = `${view}:${this.filterKey}`;
+        if (!this.viewCache.has(key)) {
+            const wrapper = document.createElement('div');
+            wrapper.innerHTML = render();
+            this.viewCache.set(key, Array.from(wrapper.childNodes));
         }
-
-        // Update statistics
-        this.displayTimetableStats(this.filteredTimetable);
+        return this.viewCache.get(key);
     }
 
-    selectAllYears() {
-        document.getElementById('year1Filter').checked = true;
-        document.getElementById('year2Filter').checked = true;
-        document.getElementById('year3Filter').checked = true;
-        document.getElementById('year4Filter').checked = true;
-        this.applyYearFilters();
-    }
-
-    clearAllYears() {
-        document.getElementById('year1Filter').checked = false;
-        document.getElementById('year2Filter').checked = false;
-        document.getElementById('year3Filter').checked = false;
-        document.getElementById('year4Filter').checked = false;
-        this.applyYearFilters();
+    generateFilteredDayView() {
+        const nodes = this.cachedView('day', () => {
+            const { entries, byDay } = this.timetableIndex;
+            const selected = new Set(this.selectedYears);
+
+            return byDay.map(({ day, entries: dayEntries }) => {
+                const dayClasses = dayEntries.filter(i => selected.has(entries[i].year));
+                if (!dayClasses.length) return '';
+
+                return `
+                    <div class="day-column">
+                        <h4>${day}</h4>
+                        ${dayClasses.map(i => {
+                            const entry = entries[i];
+                            const durationText = entry.duration === 0.5 ? '(½ slot)' : '';
+                            return `
+                                <div class="time-slot year-${entry.year}-slot">
+                                    <div class="time">${entry.time} ${durationText}</div>
+                                    <div class="course">
+                                        ${entry.course_name}
+                                        <span class="year-badge-small">Y${entry.year}</span>
+                                    </div>
+                                    <div class="details">
+                                        <span class="session-type ${entry.type}">${entry.session_type}</span><br>
+                                        ${entry.sections}<br>
+                                        Room: ${entry.room}<br>
+                                        Instructor: ${entry.instructor}
+                                    </div>
+                                </div>
+                            `;
+                        }).join('')}
+                    </div>
+                `;
+            }).join('');
+        });
+        document.getElementById('dayViewContent').replaceChildren(...nodes);
     }
 
     generateFilteredGridView() {
-        const gridViewContent = document.getElementById('gridViewContent');
-        const timetableToShow = this.filteredTimetable || this.currentTimetable;
-
-        // Create horizontal timetable grid matching the requested shape
-        const horizontalGrid = this.createHorizontalSectionGrid(timetableToShow);
-        gridViewContent.innerHTML = horizontalGrid;
+        const nodes = this.cachedView('grid', () => this.createHorizontalSectionGrid());
+        document.getElementById('gridViewContent').replaceChildren(...nodes);
     }
 
-    createHorizontalSectionGrid(timetableData) {
-        const sections = this.getAllSections(timetableData);
-        // Use standard 90 min slots as per data logic
-        const timeSlots = [
-            '9:00 AM - 10:30 AM',
-            '10:45 AM - 12:15 PM',
-            '12:30 PM - 2:00 PM',
-            '2:15 PM - 3:45 PM'
-        ];
-
-        const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday'];
-
-        // Group by Day -> Section -> TimeSlot -> Class
-        const gridData = {}; // { Day: { Section: { TimeSlot: ClassEntry } } }
-
-        timetableData.forEach(entry => {
-            const day = entry.day_time.split(' ')[0];
-            const timeStr = entry.day_time.split(' ').slice(1).join(' ');
-            const year = this.extractYearFromCourse(entry);
-
-            let timeSlot = '';
-            if (timeStr.includes('9:00 AM')) timeSlot = timeSlots[0];
-            else if (timeStr.includes('10:45 AM')) timeSlot = timeSlots[1];
-            else if (timeStr.includes('12:30 PM')) timeSlot = timeSlots[2];
-            else if (timeStr.includes('2:15 PM')) timeSlot = timeSlots[3];
-
-            const affectedSections = this.getAffectedSections(entry, year);
-
-            if (!gridData[day]) gridData[day] = {};
-
-            affectedSections.forEach(sec => {
-                if (!gridData[day][sec]) gridData[day][sec] = {};
-                // If collision, we might overwrite, but given CSP there shouldn't be collisions for same section
-                gridData[day][sec][timeSlot] = {
-                    ...entry,
-                    year: year
-                };
-            });
-        });
+    createHorizontalSectionGrid() {
+        // Day -> section -> time slot cells come prebuilt from the timetable index
+        const { entries, years, grid } = this.timetableIndex;
+        const sections = this.selectedYears.flatMap(year => years[year].sections);
 
         let html = '<div class="horizontal-sched-container">';
 
-        days.forEach(day => {
-            // Only show table if day has content? Or show empty table?
-            // User photo shows populated grid.
-
+        DAYS.forEach(day => {
             html += `
                 <div class="day-schedule-wrapper">
                     <table class="horizontal-grid-table">
                         <thead>
                             <tr class="day-header-row">
                                 <th rowspan="2" class="section-col-header">Section</th>
-                                <th colspan="${timeSlots.length}" class="day-main-header">${day}</th>
+                                <th colspan="${TIME_SLOTS.length}" class="day-main-header">${day}</th>
                             </tr>
                             <tr class="time-header-row">
-                                ${timeSlots.map(slot => `<th>${slot}</th>`).join('')}
+                                ${TIME_SLOTS.map(slot => `<th>${slot}</th>`).join('')}
                             </tr>
                         </thead>
                         <tbody>
             `;
 
             sections.forEach(section => {
-                const sectionData = gridData[day] && gridData[day][section] ? gridData[day][section] : {};
+                const sectionData = grid[day] && grid[day][section] ? grid[day][section] : {};
 
                 // Get year from section name (e.g., Y1S1) for row styling
-                const sectionYearMatch = section.match(/Y(\d+)/);
-                const sectionYear = sectionYearMatch ? sectionYearMatch[1] : '1';
+                const sectionYear = section.match(/Y(\d+)/)[1];
 
                 html += `<tr class="section-row year-${sectionYear}-row">`;
                 html += `<td class="section-cell">
                             <span class="section-name">${section}</span>
                          </td>`;
 
-                timeSlots.forEach(slot => {
-                    const cellData = sectionData[slot];
+                TIME_SLOTS.forEach((slot, slotIndex) => {
+                    const cellData = sectionData[slotIndex] !== undefined ? entries[sectionData[slotIndex]] : null;
                     if (cellData) {
-                        const yearClass = `year-${cellData.year}`;
-                        const sessionType = cellData.session_type.toLowerCase();
-
                         html += `
-                            <td class="class-cell filled ${yearClass}-cell ${sessionType}-cell">
+                            <td class="class-cell filled year-${cellData.year}-cell ${cellData.type}-cell">
                                 <div class="cell-content">
                                     <div class="cell-course-code">${cellData.course_id}</div>
                                     <div class="cell-course-name">${this.truncateCourseName(cellData.course_name)}</div>
@@ -1533,122 +814,6 @@ class TimetableApp {
         return html;
     }
 
-    createWeeklyTimetableGridFromData(timetableData) {
-        // Define time slots and days
-        const timeSlots = [
-            '9:00 AM - 10:30 AM',
-            '10:45 AM - 12:15 PM',
-            '12:30 PM - 2:00 PM',
-            '2:15 PM - 3:45 PM'
-        ];
-
-        const days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday'];
-
-        // Group timetable by day and time
-        const scheduleGrid = {};
-
-        timetableData.forEach(entry => {
-            const day = entry.day_time.split(' ')[0];
-            const timeStr = entry.day_time.split(' ').slice(1).join(' ');
-            const year = this.extractYearFromCourse(entry);
-
-            // Map time string to time slot
-            let timeSlot = '';
-            if (timeStr.includes('9:00 AM')) timeSlot = timeSlots[0];
-            else if (timeStr.includes('10:45 AM')) timeSlot = timeSlots[1];
-            else if (timeStr.includes('12:30 PM')) timeSlot = timeSlots[2];
-            else if (timeStr.includes('2:15 PM')) timeSlot = timeSlots[3];
-
-            if (!scheduleGrid[timeSlot]) scheduleGrid[timeSlot] = {};
-            if (!scheduleGrid[timeSlot][day]) scheduleGrid[timeSlot][day] = [];
-
-            scheduleGrid[timeSlot][day].push({
-                ...entry,
-                year: year
-            });
-        });
-
-        // Generate HTML for weekly grid
-        let gridHtml = `
-            <div class="weekly-timetable-container">
-                <h3>📅 Weekly Timetable Grid</h3>
-                <div class="timetable-grid">
-                    <table class="weekly-grid-table">
-                        <thead>
-                            <tr>
-                                <th class="time-header">Time</th>
-                                ${days.map(day => `<th class="day-header">${day}</th>`).join('')}
-                            </tr>
-                        </thead>
-                        <tbody>
-        `;
-
-        // Generate rows for each time slot
-        timeSlots.forEach(timeSlot => {
-            gridHtml += `<tr class="time-row">`;
-            gridHtml += `<td class="time-cell">${timeSlot}</td>`;
-
-            days.forEach(day => {
-                const classes = scheduleGrid[timeSlot] && scheduleGrid[timeSlot][day] || [];
-                gridHtml += `<td class="schedule-cell">`;
-
-                if (classes.length > 0) {
-                    classes.forEach(classEntry => {
-                        const yearClass = `year-${classEntry.year}`;
-                        const sessionClass = classEntry.session_type.toLowerCase();
-
-                        gridHtml += `
-                            <div class="class-block ${yearClass}-block ${sessionClass}-block">
-                                <div class="class-course">${classEntry.course_name}</div>
-                                <div class="class-id">${classEntry.course_id}</div>
-                                <div class="class-type">${classEntry.session_type}</div>
-                                <div class="class-sections">${classEntry.sections}</div>
-                                <div class="class-room">Room: ${classEntry.room}</div>
-                                <div class="class-instructor">${classEntry.instructor}</div>
-                                <div class="class-year">Year ${classEntry.year}</div>
-                            </div>
-                        `;
-                    });
-                }
-
-                gridHtml += `</td>`;
-            });
-
-            gridHtml += `</tr>`;
-        });
-
-        gridHtml += `
-                        </tbody>
-                    </table>
-                </div>
-                
-                <div class="legend">
-                    <h4>📋 Legend</h4>
-                    <div class="legend-items">
-                        <div class="legend-item">
-                            <div class="legend-color year-1-block"></div>
-                            <span>Year 1</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-2-block"></div>
-                            <span>Year 2</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-3-block"></div>
-                            <span>Year 3</span>
-                        </div>
-                        <div class="legend-item">
-                            <div class="legend-color year-4-block"></div>
-                            <span>Year 4</span>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        `;
-
-        return gridHtml;
-    }
-
     showStatus(message, type) {
         const statusDiv = document.getElementById('status');
         statusDiv.textContent = message;
@@ -1660,7 +825,7 @@ class TimetableApp {
     }
 
     async downloadTimetable() {
-        if (!this.currentTimetable) {
+        if (!this.timetableIndex) {
             this.showStatus('No timetable generated to download.', 'error');
             return;
         }
@@ -1760,6 +925,53 @@ class TimetableApp {
         }
     }
 
+    async downloadBundle() {
+        if (!this.currentTimetable) {
+            this.showStatus('No timetable generated to download.', 'error');
+            return;
+        }
+
+        const btn = document.getElementById('downloadBundleBtn');
+        const originalText = btn.innerHTML;
+        btn.innerHTML = '⏳ Processing...';
+        btn.disabled = true;
+
+        this.showStatus('Exporting timetables per section, instructor and room...', 'loading');
+
+        try {
+            // The server builds the XLSX/CSV/ICS files, keeping the tab responsive
+            const response = await fetch(`${this.apiBase}/api/export?dataset=${encodeURIComponent(this.dataset)}`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ timetable: this.currentTimetable })
+            });
+
+            if (!response.ok) {
+                const data = await response.json();
+                throw new Error(data.error || response.statusText);
+            }
+
+            const blob = await response.blob();
+            const url = URL.createObjectURL(blob);
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = 'timetable_export.zip';
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+            URL.revokeObjectURL(url);
+
+            this.showStatus('Export downloaded successfully!', 'success');
+        } catch (error) {
+            this.showStatus(`Export failed: ${error.message}`, 'error');
+        } finally {
+            btn.innerHTML = originalText;
+            btn.disabled = false;
+        }
+    }
+
     async downloadExcel() {
         if (typeof XLSX === 'undefined') {
             this.showStatus('Excel library (XLSX) not loaded. Please refresh the page.', 'error');
@@ -1846,7 +1058,7 @@ class TimetableApp {
             const scheduleMap = {};
 
             this.currentTimetable.forEach(entry => {
-                const year = this.extractYearFromCourse(entry);
+                const year = entryYear(entry);
                 const day = entry.day_time.split(' ')[0];
                 const timeStr = entry.day_time.split(' ').slice(1).join(' ');
 
@@ -2070,149 +1282,6 @@ class TimetableApp {
             btn.disabled = false;
         }
     }
-
-    extractYearFromCourse(entry) {
-        // First priority: Use the year data from the timetable entry (from CSV)
-        if (entry.year && entry.year >= 1 && entry.year <= 4) {
-            return entry.year;
-        }
-
-        // Second priority: Try to extract year from course_id (e.g., CSC 211 -> Year 2)
-        const courseId = entry.course_id;
-        const match = courseId.match(/(\d)(\d)\d/);
-
-        if (match) {
-            const firstDigit = parseInt(match[1]);
-            const secondDigit = parseInt(match[2]);
-
-            // If second digit is 1-4, use it as year (more reliable for course numbering)
-            if (secondDigit >= 1 && secondDigit <= 4) {
-                return secondDigit;
-            }
-            // If first digit is 1-4, use it as year
-            if (firstDigit >= 1 && firstDigit <= 4) {
-                return firstDigit;
-            }
-        }
-
-        // Fallback: try to find year in course name
-        if (entry.course_name && entry.course_name.includes('(1)')) return 1;
-        if (entry.course_name && entry.course_name.includes('(2)')) return 2;
-        if (entry.course_name && entry.course_name.includes('(3)')) return 3;
-        if (entry.course_name && entry.course_name.includes('(4)')) return 4;
-
-        return 1; // Default to year 1
-    }
-
-    truncateCourseName(courseName) {
-        // Truncate long course names for better display
-        if (courseName.length > 25) {
-            return courseName.substring(0, 22) + '...';
-        }
-        return courseName;
-    }
-
-    truncateInstructorName(instructorName) {
-        // Show only first name and last initial
-        const parts = instructorName.split(' ');
-        if (parts.length > 1) {
-            return `${parts[0]} ${parts[parts.length - 1].charAt(0)}.`;
-        }
-        return instructorName;
-    }
-
-    generateCourseColor(courseId) {
-        if (!courseId) return { bg: '#4a5568', border: '#2d3748' };
-
-        // Simple hash function to generate a number from string
-        let hash = 0;
-        for (let i = 0; i < courseId.length; i++) {
-            hash = courseId.charCodeAt(i) + ((hash << 5) - hash);
-        }
-
-        // Generate nice distinct colors
-        // Use golden ratio conjugate to spread colors better
-        const h = Math.abs(hash % 360);
-
-        // We want dark, rich colors for good contrast with white text
-        // Saturation: 60-80%, Lightness: 30-45%
-        const s = 65 + (Math.abs(hash) % 20);
-        const l = 35 + (Math.abs(hash) % 15);
-
-        return {
-            bg: `hsla(${h}, ${s}%, ${l}%, 0.85)`,
-            border: `hsl(${h}, ${s}%, ${l - 10}%)`
-        };
-    }
-
-    groupTimetableByYear(timetable) {
-        const yearGroups = {};
-
-        timetable.forEach(entry => {
-            // Extract year from course_id or use a default method
-            let year = this.extractYearFromCourse(entry);
-
-            if (!yearGroups[year]) {
-                yearGroups[year] = [];
-            }
-            yearGroups[year].push(entry);
-        });
-
-        return yearGroups;
-    }
-
-    groupCoursesByType(courses) {
-        const typeGroups = {
-            lecture: [],
-            lab: [],
-            tutorial: [],
-            project: []
-        };
-
-        courses.forEach(course => {
-            const type = course.session_type.toLowerCase();
-            if (typeGroups[type]) {
-                typeGroups[type].push(course);
-            }
-        });
-
-        return typeGroups;
-    }
-
-    getYearStats(yearCourses) {
-        const stats = {
-            total: yearCourses.length,
-            lecture: 0,
-            lab: 0,
-            tutorial: 0,
-            project: 0
-        };
-
-        yearCourses.forEach(course => {
-            const type = course.session_type.toLowerCase();
-            if (stats.hasOwnProperty(type)) {
-                stats[type]++;
-            }
-        });
-
-        return `
-            <span class="stat-badge total">${stats.total} Total</span>
-            ${stats.lecture > 0 ? `<span class="stat-badge lecture">${stats.lecture} Lectures</span>` : ''}
-            ${stats.lab > 0 ? `<span class="stat-badge lab">${stats.lab} Labs</span>` : ''}
-            ${stats.tutorial > 0 ? `<span class="stat-badge tutorial">${stats.tutorial} Tutorials</span>` : ''}
-            ${stats.project > 0 ? `<span class="stat-badge project">${stats.project} Projects</span>` : ''}
-        `;
-    }
-
-    showStatus(message, type) {
-        const statusDiv = document.getElementById('status');
-        statusDiv.textContent = message;
-        statusDiv.className = `status ${type}`;
-
-        if (type === 'loading') {
-            statusDiv.innerHTML = `<span class="loading-spinner"></span>${message}`;
-        }
-    }
 }
 
 // Initialize the app when DOM is loaded
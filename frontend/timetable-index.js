@@ -0,0 +1,136 @@
+// Timetable indexing for the frontend views
+//
+// Loaded with a <script> tag this defines buildTimetableIndex() for the page; started as
+// new Worker('timetable-index.js') it builds the same index off the main thread, so a
+// large timetable is grouped, sorted and gridded once instead of on every view change.
+
+const TIME_SLOTS = [
+    '9:00 AM - 10:30 AM',
+    '10:45 AM - 12:15 PM',
+    '12:30 PM - 2:00 PM',
+    '2:15 PM - 3:45 PM'
+];
+const SLOT_STARTS = ['9:00 AM', '10:45 AM', '12:30 PM', '2:15 PM'];
+const DAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday'];
+const SESSION_TYPES = ['lecture', 'lab', 'tutorial', 'project'];
+
+function entryYear(entry) {
+    // First priority: Use the year data from the timetable entry (from CSV)
+    if (entry.year && entry.year >= 1 && entry.year <= 4) {
+        return entry.year;
+    }
+
+    // Second priority: Try to extract year from course_id (e.g., CSC 211 -> Year 2)
+    const match = (entry.course_id || '').match(/(\d)(\d)\d/);
+
+    if (match) {
+        const firstDigit = parseInt(match[1]);
+        const secondDigit = parseInt(match[2]);
+
+        // If second digit is 1-4, use it as year (more reliable for course numbering)
+        if (secondDigit >= 1 && secondDigit <= 4) {
+            return secondDigit;
+        }
+        // If first digit is 1-4, use it as year
+        if (firstDigit >= 1 && firstDigit <= 4) {
+            return firstDigit;
+        }
+    }
+
+    // Fallback: try to find year in course name
+    for (let year = 1; year <= 4; year++) {
+        if (entry.course_name && entry.course_name.includes(`(${year})`)) return year;
+    }
+
+    return 1; // Default to year 1
+}
+
+function affectedSections(entry, year) {
+    // Lectures affect entire groups (Group N is sections 3N-2 to 3N); other sessions one section
+    if (entry.session_type.toLowerCase() === 'lecture') {
+        const groupMatch = entry.sections.match(/Group (\d+)/);
+        if (!groupMatch) return [];
+        const group = parseInt(groupMatch[1]);
+        return [3 * group - 2, 3 * group - 1, 3 * group].map(section => `Y${year}S${section}`);
+    }
+    const sectionMatch = entry.sections.match(/Section (\d+)/);
+    return sectionMatch ? [`Y${year}S${sectionMatch[1]}`] : [];
+}
+
+function buildTimetableIndex(timetable) {
+    // Entries carry their derived fields, so views never re-parse day_time or years
+    const entries = timetable.map(entry => {
+        const [day, ...rest] = entry.day_time.split(' ');
+        const time = rest.join(' ');
+        return {
+            ...entry,
+            year: entryYear(entry),
+            day,
+            time,
+            slot: SLOT_STARTS.findIndex(start => time.includes(start)),
+            type: entry.session_type.toLowerCase()
+        };
+    });
+
+    const years = {};  // year -> { entries, stats, rows, sections }
+    const grid = {};   // day -> section -> slot index -> entry index
+    entries.forEach((entry, index) => {
+        if (!years[entry.year]) {
+            years[entry.year] = {
+                entries: [],
+                stats: { total: 0, lecture: 0, lab: 0, tutorial: 0, project: 0 },
+                rows: [],
+                sections: new Set()
+            };
+        }
+        const year = years[entry.year];
+        year.entries.push(index);
+        year.stats.total++;
+        if (year.stats.hasOwnProperty(entry.type)) {
+            year.stats[entry.type]++;
+        }
+
+        affectedSections(entry, entry.year).forEach(section => {
+            year.sections.add(section);
+            if (entry.slot < 0) return;
+            if (!grid[entry.day]) grid[entry.day] = {};
+            if (!grid[entry.day][section]) grid[entry.day][section] = {};
+            grid[entry.day][section][entry.slot] = index;
+        });
+    });
+
+    // Table rows per year: a type header, then that type's sessions by day and time
+    Object.values(years).forEach(year => {
+        SESSION_TYPES.forEach(type => {
+            const ofType = year.entries.filter(index => entries[index].type === type);
+            if (!ofType.length) return;
+            ofType.sort((a, b) => entries[a].day_time.localeCompare(entries[b].day_time));
+            year.rows.push({ kind: 'type', type, count: ofType.length });
+            ofType.forEach(index => year.rows.push({ kind: 'entry', index }));
+        });
+        year.sections = Array.from(year.sections).sort((a, b) => parseInt(a.split('S')[1]) - parseInt(b.split('S')[1]));
+    });
+
+    // Day view order: weekday, then slot, then time
+    const byDay = DAYS.map(day => ({
+        day,
+        entries: entries.map((entry, index) => index)
+            .filter(index => entries[index].day === day)
+            .sort((a, b) => (entries[a].slot - entries[b].slot) || entries[a].time.localeCompare(entries[b].time))
+    })).filter(day => day.entries.length);
+
+    return {
+        entries,
+        years,
+        yearList: Object.keys(years).map(Number).sort((a, b) => a - b),
+        byDay,
+        grid
+    };
+}
+
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+    self.onmessage = event => {
+        const { id, timetable } = event.data;
+        self.postMessage({ id, index: buildTimetableIndex(timetable) });
+    };
+}
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Cross-check of the network flow algorithms against brute force on small random graphs
+"""
+import itertools
+import os
+import random
+import sys
+
+# Add backend to path
+backend_path = os.path.join(os.path.dirname(__file__), 'backend')
+sys.path.insert(0, backend_path)
+
+from csp.flow import MaxFlow, MinCostFlow, hopcroft_karp
+
+GRAPHS = 200
+SEED = 0
+
+
+def random_edges(rng, nodes, count, capacities, costs=None, acyclic=False):
+    """(source, target, capacity, cost) edges between node numbers; acyclic ones point upwards"""
+    edges = []
+    for _ in range(count):
+        u, v = rng.sample(range(nodes), 2)
+        if acyclic and u > v:
+            u, v = v, u
+        edges.append((u, v, rng.choice(capacities), rng.choice(costs) if costs else 0))
+    return edges
+
+
+def brute_min_cut(nodes, edges, source, sink):
+    """Smallest capacity of the edges leaving a node set that holds the source but not the sink"""
+    others = [node for node in range(nodes) if node not in (source, sink)]
+    best = float('inf')
+    for size in range(len(others) + 1):
+        for chosen in itertools.combinations(others, size):
+            side = {source, *chosen}
+            best = min(best, sum(capacity for u, v, capacity, _ in edges if u in side and v not in side))
+    return best
+
+
+def brute_matching(adjacency):
+    """Size of a maximum matching, trying every right vertex (or none) for each left vertex in turn"""
+    lefts = list(adjacency)
+
+    def best(position, used):
+        if position == len(lefts):
+            return 0
+        size = best(position + 1, used)
+        for right in adjacency[lefts[position]]:
+            if right not in used:
+                size = max(size, 1 + best(position + 1, used | {right}))
+        return size
+
+    return best(0, frozenset())
+
+
+def brute_min_cost(nodes, edges, source, sink):
+    """{flow value: cheapest cost} over every integral flow that conserves flow at inner nodes"""
+    cheapest = {}
+    for flows in itertools.product(*(range(capacity + 1) for _, _, capacity, _ in edges)):
+        balance = [0] * nodes
+        for (u, v, _, _), flow in zip(edges, flows):
+            balance[u] -= flow
+            balance[v] += flow
+        if any(balance[node] for node in range(nodes) if node not in (source, sink)):
+            continue
+        value = balance[sink]
+        cost = sum(flow * cost for (_, _, _, cost), flow in zip(edges, flows))
+        cheapest[value] = min(cost, cheapest.get(value, cost))
+    return cheapest
+
+
+def test_max_flow_matches_min_cut():
+    rng = random.Random(SEED)
+    for number in range(GRAPHS):
+        nodes = rng.randint(2, 6)
+        edges = random_edges(rng, nodes, rng.randint(1, 12), capacities=range(0, 6))
+        graph = MaxFlow()
+        for node in range(nodes):
+            graph.node(node)
+        for u, v, capacity, _ in edges:
+            graph.add_edge(u, v, capacity)
+        flow = graph.max_flow(0, nodes - 1)
+        assert flow == brute_min_cut(nodes, edges, 0, nodes - 1), f"Graph {number}: {edges}"
+
+        # The residual graph's reachable side is a cut of the same capacity
+        side = graph.reachable_from(0)
+        assert nodes - 1 not in side
+        assert flow == sum(capacity for u, v, capacity, _ in edges if u in side and v not in side)
+    print(f"{GRAPHS} max flows agree")
+
+
+def test_matching_is_maximum():
+    rng = random.Random(SEED)
+    for number in range(GRAPHS):
+        rights = [f"r{index}" for index in range(rng.randint(1, 5))]
+        adjacency = {left: rng.sample(rights, rng.randint(0, len(rights))) for left in range(rng.randint(1, 6))}
+        matching = hopcroft_karp(adjacency)
+        assert all(right in adjacency[left] for left, right in matching.items()), f"Graph {number}: {adjacency}"
+        assert len(set(matching.values())) == len(matching), f"Graph {number}: {matching}"
+        assert len(matching) == brute_matching(adjacency), f"Graph {number}: {adjacency}"
+    print(f"{GRAPHS} matchings agree")
+
+
+def test_min_cost_flow_with_negative_costs():
+    """Negative costs, as InstructorBalancer sets when a role target is above an instructor's load"""
+    rng = random.Random(SEED)
+    for number in range(GRAPHS):
+        nodes = rng.randint(3, 6)
+        # Acyclic, so negative costs never form a negative cycle
+        edges = random_edges(rng, nodes, rng.randint(4, 10), capacities=(1, 2), costs=range(-5, 6), acyclic=True)
+        cheapest = brute_min_cost(nodes, edges, 0, nodes - 1)
+        most = max(cheapest)
+        for limit in sorted({most, rng.randint(0, most)}):
+            graph = MinCostFlow()
+            for node in range(nodes):
+                graph.node(node)
+            ids = [graph.add_edge(u, v, capacity, cost) for u, v, capacity, cost in edges]
+            flow, cost = graph.min_cost_flow(0, nodes - 1, limit=limit if limit < most else float('inf'))
+            assert (flow, cost) == (limit, cheapest[limit]), f"Graph {number}, limit {limit}: {edges}"
+            assert cost == sum(graph.flow_of(edge) * edges[index][3] for index, edge in enumerate(ids))
+    print(f"{GRAPHS} min-cost flows agree")
+
+
+if __name__ == '__main__':
+    test_max_flow_matches_min_cut()
+    test_matching_is_maximum()
+    test_min_cost_flow_with_negative_costs()
@@ -31,7 +31,7 @@ def test_solver():
         if timetable:
             print(f"Success! Generated timetable with {len(timetable)} classes:")
             for entry in timetable[:5]:  # Show first 5 entries
-                print(f"  {entry['course_name']} - {entry['section_id']} - {entry['day']} {entry['start_time']} - {entry['room']} - {entry['instructor']}")
+                print(f"  {entry['course_name']} - {entry['sections']} - {entry['day_time']} - {entry['room']} - {entry['instructor']}")
             if len(timetable) > 5:
                 print(f"  ... and {len(timetable) - 5} more classes")
         else:
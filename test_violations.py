@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Cross-check of the violation report against the solver's hard constraints
+"""
+import contextlib
+import copy
+import io
+import os
+import random
+import sys
+
+# Add backend to path
+backend_path = os.path.join(os.path.dirname(__file__), 'backend')
+sys.path.insert(0, backend_path)
+
+from utils.csv_loader import CSVDataLoader
+from csp.constraints import NoStudentConflictConstraint
+from csp.csp_solver import TimetableSolver
+from csp.model import Domain
+from csp.violations import check_timetable, session_id
+
+EDITS = 400
+SEED = 0
+
+# Checks of the report that ConstraintManager leaves to the domains instead
+DOMAIN_CHECKS = ('rest_day',)
+
+
+def solved_dataset():
+    solver = TimetableSolver(CSVDataLoader(os.path.join(backend_path, 'data')), mode='two_phase')
+    with contextlib.redirect_stdout(io.StringIO()):
+        compiled = solver.compile()
+        timetable = solver.generate_timetable(compiled)
+    return compiled, timetable
+
+
+def as_assignment(compiled, timetable):
+    grid = compiled.time_grid()
+    return {session_id(entry): Domain(entry['day_time'], entry['room'], entry['instructor'],
+                                      grid.slots[entry['day_time']])
+            for entry in timetable}
+
+
+def edit(timetable, compiled, rng):
+    """Copy of the timetable with one to three sessions moved to another timeslot, room or instructor"""
+    edited = copy.deepcopy(timetable)
+    rooms = sorted(compiled.records().room_lookup)
+    instructors = sorted(compiled.records().qualifications)
+    for _ in range(rng.choice([1, 1, 2, 3])):
+        entry = rng.choice(edited)
+        field = rng.choice(['day_time', 'day_time', 'room', 'instructor'])
+        if field == 'day_time':
+            entry['day_time'] = rng.choice(compiled.time_grid().labels)
+        elif field == 'room':
+            entry['room'] = rng.choice(rooms) if rng.random() < 0.3 else rng.choice(timetable)['room']
+        elif rng.random() < 0.2:
+            entry['instructor'] = rng.choice(instructors)
+        else:
+            entry['instructor'] = rng.choice([other['instructor'] for other in timetable
+                                              if other['course_id'] == entry['course_id']])
+    return edited
+
+
+def test_report_matches_hard_constraints():
+    compiled, timetable = solved_dataset()
+    report = check_timetable(compiled, timetable)
+    assert report['valid'], report['violations'][:3]
+
+    rng = random.Random(SEED)
+    seen = set()
+    for number in range(EDITS):
+        edited = edit(timetable, compiled, rng)
+        report = check_timetable(compiled, edited)
+        hard = [check for check in report['counts'] if check not in DOMAIN_CHECKS]
+        consistent = compiled.constraint_manager.check_hard_constraints(as_assignment(compiled, edited))
+        assert consistent == (not hard), f"Edit {number}: constraints say {consistent}, report {report['counts']}"
+        seen.update(report['counts'])
+    print(f"{EDITS} edits agree; checks seen: {sorted(seen)}")
+
+
+def test_section_session_before_group_lecture():
+    """A section's lab or tutorial clashes with its group's lecture whichever is assigned first"""
+    compiled, timetable = solved_dataset()
+    records = compiled.records()
+    variables = compiled.model.variables
+    lectures = {(entry['year'], entry['sections']): entry for entry in timetable
+                if entry['session_type'] == 'lecture' and entry['sections'].startswith('Group')}
+    for entry in timetable:
+        variable = variables[session_id(entry)]
+        if not variable.section_id:
+            continue
+        group = next((group for (year, group), members in records.group_sections.items()
+                      if year == variable.year and (year, variable.section_id) in members), None)
+        lecture = lectures.get((variable.year, f"Group {group}"))
+        if lecture is not None and lecture['room'] != entry['room']:
+            break
+    else:
+        raise AssertionError("No section session with a group lecture in another room")
+
+    moved = dict(entry, day_time=lecture['day_time'])
+    assignment = as_assignment(compiled, [moved, lecture])  # the section's session first
+    constraint = NoStudentConflictConstraint(variables, records, time_grid=compiled.time_grid())
+    assert not constraint.is_satisfied(assignment)
+    assert not constraint.is_satisfied(dict(reversed(list(assignment.items()))))
+
+    report = check_timetable(compiled, [moved if other is entry else other for other in timetable])
+    assert 'student_conflict' in report['counts']
+
+
+if __name__ == '__main__':
+    test_report_matches_hard_constraints()
+    test_section_session_before_group_lecture()